@@ -0,0 +1 @@
+"""Commit history ingestion, caching and aggregation."""
@@ -0,0 +1,261 @@
+"""Single-pass vectorized commit aggregates.
+
+Replaces the per-chart shell pipelines (``commits_by_hour.sh``,
+``commits_by_day_of_week.sh``, ``commits_by_month.sh``,
+``commit_distribution.sh`` and ``average_commits.sh``): every histogram is a
+marginal of one or two ``np.bincount`` calls over the timestamp columns, so
+cost is linear in the number of commits with no per-commit Python loop.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .commit_ingest import (
+    CommitTable, EPOCH_WEEKDAY_OFFSET, SECONDS_PER_DAY, SECONDS_PER_HOUR, SECONDS_PER_MINUTE
+)
+
+HOURS = 24
+WEEKDAYS = 7
+MONTHS = 12
+
+# Same buckets as commit_distribution.sh: lower edge of each commits-per-day range
+DISTRIBUTION_BUCKET_EDGES = np.array([1, 6, 11, 16, 21, 26, 31])
+DISTRIBUTION_BUCKET_LABELS = ['1-5', '6-10', '11-15', '16-20', '21-25', '26-30', '31+']
+
+
+@dataclass(frozen=True)
+class CommitAggregates:
+    """All count histograms for one commit history, in local author time.
+
+    Attributes:
+        by_hour: Commits per hour of day, index 0-23
+        by_weekday: Commits per day of week, index 0 (Sun) - 6 (Sat)
+        by_month: Commits per month, index 0 (Jan) - 11 (Dec)
+        hour_weekday: Commits per (weekday, hour), shape (7, 24)
+        daily_distribution: Days per commits-per-day bucket
+            (see ``DISTRIBUTION_BUCKET_LABELS``)
+        days_by_hour: Number of distinct days with a commit in each hour
+        active_days: Number of distinct days with at least one commit
+        weight: What ``by_hour``/``by_weekday``/``by_month``/``hour_weekday``
+            count: ``"commits"``, or the per-commit weight summed instead
+            (e.g. ``"churn"``); the day-based fields always count commits
+    """
+    by_hour: np.ndarray
+    by_weekday: np.ndarray
+    by_month: np.ndarray
+    hour_weekday: np.ndarray
+    daily_distribution: np.ndarray
+    days_by_hour: np.ndarray
+    active_days: int
+    weight: str = 'commits'
+
+    @property
+    def average_by_hour(self) -> np.ndarray:
+        """Mean commits per hour over days with commits in that hour.
+
+        Matches ``average_commits.sh``.
+        """
+        return self.by_hour / np.maximum(self.days_by_hour, 1)
+
+    @property
+    def total(self) -> int:
+        """Total number of commits aggregated (total weight if weighted)."""
+        return int(self.by_hour.sum())
+
+    def as_dict(self) -> dict:
+        """Return every histogram as JSON-serializable lists.
+
+        Index conventions match the attributes: hours 0-23, weekdays
+        0 (Sun) - 6 (Sat), months 0 (Jan) - 11 (Dec).
+        """
+        return {
+            'weight': self.weight,
+            'total': self.total,
+            'active_days': int(self.active_days),
+            'by_hour': self.by_hour.tolist(),
+            'by_weekday': self.by_weekday.tolist(),
+            'by_month': self.by_month.tolist(),
+            'hour_weekday': self.hour_weekday.tolist(),
+            'days_by_hour': self.days_by_hour.tolist(),
+            'average_by_hour': [round(value, 3) for value in self.average_by_hour.tolist()],
+            'daily_distribution': dict(zip(DISTRIBUTION_BUCKET_LABELS,
+                                           self.daily_distribution.tolist())),
+        }
+
+    def distribution_items(self) -> tuple[list[str], list[int]]:
+        """Return non-empty (bucket labels, day counts) for ``plot_bar_chart``."""
+        labels = [
+            label for label, count in zip(DISTRIBUTION_BUCKET_LABELS, self.daily_distribution)
+            if count
+        ]
+        return labels, [int(count) for count in self.daily_distribution if count]
+
+
+def local_calendar(
+    timestamps: np.ndarray,
+    tz_offsets: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Split epoch timestamps into local calendar fields.
+
+    Args:
+        timestamps: UTC epoch seconds, one per commit
+        tz_offsets: Per-commit offsets in minutes east of UTC; when omitted
+            the timestamps are treated as already local
+
+    Returns:
+        Tuple of (epoch day, hour 0-23, weekday 0 (Sun) - 6, month 0 (Jan) - 11)
+    """
+    local = np.asarray(timestamps, dtype=np.int64)
+    if tz_offsets is not None:
+        local = local + np.asarray(tz_offsets, dtype=np.int64) * SECONDS_PER_MINUTE
+    day, seconds = np.divmod(local, SECONDS_PER_DAY)
+    hour = seconds // SECONDS_PER_HOUR
+    weekday = (day + EPOCH_WEEKDAY_OFFSET) % WEEKDAYS
+    month = day.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64) % MONTHS
+    return day, hour, weekday, month
+
+
+def aggregate_timestamps(
+    timestamps: np.ndarray,
+    tz_offsets: np.ndarray | None = None,
+    weights: np.ndarray | None = None,
+    weight: str = 'commits'
+) -> CommitAggregates:
+    """Compute every commit histogram from epoch timestamps in one pass.
+
+    Args:
+        timestamps: UTC epoch seconds, one per commit
+        tz_offsets: Per-commit offsets in minutes east of UTC; when omitted
+            the timestamps are treated as already local
+        weights: Optional per-commit integer weights (e.g. lines changed)
+            summed into the hour/weekday/month histograms instead of counts
+        weight: Name of what ``weights`` measures, stored on the result
+
+    Returns:
+        The aggregated histograms
+    """
+    if len(timestamps) == 0:
+        return CommitAggregates(
+            by_hour=np.zeros(HOURS, dtype=np.int64),
+            by_weekday=np.zeros(WEEKDAYS, dtype=np.int64),
+            by_month=np.zeros(MONTHS, dtype=np.int64),
+            hour_weekday=np.zeros((WEEKDAYS, HOURS), dtype=np.int64),
+            daily_distribution=np.zeros(len(DISTRIBUTION_BUCKET_LABELS), dtype=np.int64),
+            days_by_hour=np.zeros(HOURS, dtype=np.int64),
+            active_days=0,
+            weight=weight,
+        )
+
+    day, hour, weekday, month = local_calendar(timestamps, tz_offsets)
+
+    # (weekday, hour, month) cube: hour/weekday/month histograms are its marginals
+    cube = np.bincount(
+        (weekday * HOURS + hour) * MONTHS + month, weights=weights,
+        minlength=WEEKDAYS * HOURS * MONTHS
+    ).reshape(WEEKDAYS, HOURS, MONTHS)
+    if weights is not None:
+        cube = np.rint(cube).astype(np.int64)
+    hour_weekday = cube.sum(axis=2)
+
+    # (day, hour) grid: per-day totals and active-days-per-hour are its marginals
+    day_offset = day - day.min()
+    day_span = int(day_offset.max()) + 1
+    day_hour = np.bincount(
+        day_offset * HOURS + hour, minlength=day_span * HOURS
+    ).reshape(day_span, HOURS)
+    per_day = day_hour.sum(axis=1)
+    per_day = per_day[per_day > 0]
+    buckets = np.searchsorted(DISTRIBUTION_BUCKET_EDGES, per_day, side='right') - 1
+
+    return CommitAggregates(
+        by_hour=hour_weekday.sum(axis=0),
+        by_weekday=hour_weekday.sum(axis=1),
+        by_month=cube.sum(axis=(0, 1)),
+        hour_weekday=hour_weekday,
+        daily_distribution=np.bincount(buckets, minlength=len(DISTRIBUTION_BUCKET_LABELS)),
+        days_by_hour=np.count_nonzero(day_hour, axis=0),
+        active_days=len(per_day),
+        weight=weight,
+    )
+
+
+def aggregate_commits(table: CommitTable) -> CommitAggregates:
+    """Compute every commit histogram for an ingested history."""
+    return aggregate_timestamps(table.timestamps, table.tz_offsets)
+
+
+def combine_aggregates(parts: list[CommitAggregates]) -> CommitAggregates:
+    """Sum per-repository aggregates into one combined view.
+
+    Day counts are summed per repository, so a calendar day on which two
+    repositories both saw commits counts as two active days.
+
+    Raises:
+        ValueError: If the parts were weighted differently
+    """
+    if not parts:
+        return aggregate_timestamps(np.empty(0, dtype=np.int64))
+    if len({p.weight for p in parts}) > 1:
+        raise ValueError("Cannot combine aggregates with different weights")
+    return CommitAggregates(
+        by_hour=sum(p.by_hour for p in parts),
+        by_weekday=sum(p.by_weekday for p in parts),
+        by_month=sum(p.by_month for p in parts),
+        hour_weekday=sum(p.hour_weekday for p in parts),
+        daily_distribution=sum(p.daily_distribution for p in parts),
+        days_by_hour=sum(p.days_by_hour for p in parts),
+        active_days=sum(p.active_days for p in parts),
+        weight=parts[0].weight,
+    )
+
+
+class AggregateState:
+    """Mergeable running state behind ``CommitAggregates``.
+
+    Keeps the (weekday, hour, month) commit cube and sparse per-(day, hour)
+    commit counts, so new commits can be folded in without revisiting old
+    ones. ``snapshot()`` equals ``aggregate_timestamps`` over every commit
+    added so far.
+    """
+
+    def __init__(self) -> None:
+        self._cube = np.zeros((WEEKDAYS, HOURS, MONTHS), dtype=np.int64)
+        # Sorted unique day * HOURS + hour keys and their commit counts
+        self._day_hour_keys = np.empty(0, dtype=np.int64)
+        self._day_hour_counts = np.empty(0, dtype=np.int64)
+
+    def add(self, timestamps: np.ndarray, tz_offsets: np.ndarray | None = None) -> None:
+        """Fold more commits into the state (see ``aggregate_timestamps``)."""
+        if len(timestamps) == 0:
+            return
+        day, hour, weekday, month = local_calendar(timestamps, tz_offsets)
+        self._cube += np.bincount(
+            (weekday * HOURS + hour) * MONTHS + month, minlength=WEEKDAYS * HOURS * MONTHS
+        ).reshape(WEEKDAYS, HOURS, MONTHS)
+
+        keys, inverse = np.unique(
+            np.concatenate([self._day_hour_keys, day * HOURS + hour]), return_inverse=True
+        )
+        weights = np.concatenate([self._day_hour_counts, np.ones(len(day), dtype=np.int64)])
+        self._day_hour_keys = keys
+        self._day_hour_counts = np.bincount(inverse, weights=weights).astype(np.int64)
+
+    def snapshot(self) -> CommitAggregates:
+        """Return the aggregates of everything added so far."""
+        if not len(self._day_hour_keys):
+            return aggregate_timestamps(np.empty(0, dtype=np.int64))
+        days, hours = np.divmod(self._day_hour_keys, HOURS)
+        # Keys are sorted, so each day's hours are contiguous
+        day_starts = np.flatnonzero(np.diff(days, prepend=days[0] - 1))
+        per_day = np.add.reduceat(self._day_hour_counts, day_starts)
+        buckets = np.searchsorted(DISTRIBUTION_BUCKET_EDGES, per_day, side='right') - 1
+        hour_weekday = self._cube.sum(axis=2)
+        return CommitAggregates(
+            by_hour=hour_weekday.sum(axis=0),
+            by_weekday=hour_weekday.sum(axis=1),
+            by_month=self._cube.sum(axis=(0, 1)),
+            hour_weekday=hour_weekday,
+            daily_distribution=np.bincount(buckets, minlength=len(DISTRIBUTION_BUCKET_LABELS)),
+            days_by_hour=np.bincount(hours, minlength=HOURS),
+            active_days=len(per_day),
+        )
@@ -0,0 +1,153 @@
+"""Vectorized per-author activity profiles.
+
+Authors are already interned by ingestion: ``CommitTable.author_ids``
+indexes the mailmap-normalized ``"Name <email>"`` identities in
+``CommitTable.authors``, so a per-author group-by never touches strings.
+Every author's hour, weekday and month histograms come from one
+``np.bincount`` over ``author_id * FIELDS + field`` keys, i.e. an
+``(authors, FIELDS)`` matrix whose column blocks are the three histograms.
+Memory is ``43 * authors`` counters regardless of history length.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .commit_aggregate import HOURS, MONTHS, WEEKDAYS, local_calendar
+from .commit_ingest import CommitTable
+
+# Column blocks of the per-author matrix
+_HOUR_COLUMNS = slice(0, HOURS)
+_WEEKDAY_COLUMNS = slice(HOURS, HOURS + WEEKDAYS)
+_MONTH_COLUMNS = slice(HOURS + WEEKDAYS, HOURS + WEEKDAYS + MONTHS)
+FIELDS = HOURS + WEEKDAYS + MONTHS
+
+# How identities are grouped before aggregating
+AUTHOR_KEYS = ('identity', 'email', 'name')
+
+
+@dataclass(frozen=True)
+class AuthorAggregates:
+    """Hour/weekday/month commit histograms for every author, in local author time.
+
+    Row ``i`` of every array belongs to ``authors[i]``.
+
+    Attributes:
+        authors: Author labels (identities, emails or names; see ``AUTHOR_KEYS``)
+        commits: Commits per author
+        by_hour: Commits per (author, hour of day), shape (authors, 24)
+        by_weekday: Commits per (author, weekday 0 (Sun) - 6), shape (authors, 7)
+        by_month: Commits per (author, month 0 (Jan) - 11), shape (authors, 12)
+        first_commit: Earliest author timestamp per author (UTC epoch seconds)
+        last_commit: Latest author timestamp per author (UTC epoch seconds)
+    """
+    authors: tuple[str, ...]
+    commits: np.ndarray
+    by_hour: np.ndarray
+    by_weekday: np.ndarray
+    by_month: np.ndarray
+    first_commit: np.ndarray
+    last_commit: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.authors)
+
+    def top(self, n: int) -> np.ndarray:
+        """Return the rows of the ``n`` most active authors, busiest first.
+
+        Ties keep first-appearance order (most recent history first).
+        """
+        active = np.flatnonzero(self.commits)
+        order = active[np.argsort(-self.commits[active], kind='stable')]
+        return order[:max(n, 0)]
+
+    def profile(self, row: int) -> dict:
+        """Return one author's activity as JSON-serializable data."""
+        return {
+            'author': self.authors[row],
+            'commits': int(self.commits[row]),
+            'first_commit': int(self.first_commit[row]),
+            'last_commit': int(self.last_commit[row]),
+            'by_hour': self.by_hour[row].tolist(),
+            'by_weekday': self.by_weekday[row].tolist(),
+            'by_month': self.by_month[row].tolist(),
+        }
+
+
+def author_groups(
+    authors: tuple[str, ...],
+    key: str = 'identity'
+) -> tuple[np.ndarray, tuple[str, ...]]:
+    """Map interned identities onto coarser author groups.
+
+    Args:
+        authors: Interned ``"Name <email>"`` identities
+        key: ``"identity"`` keeps them as-is, ``"email"`` merges identities by
+            case-folded email and ``"name"`` by name
+
+    Returns:
+        Tuple of (group id per author id, group labels)
+
+    Raises:
+        ValueError: If ``key`` is unknown
+    """
+    if key not in AUTHOR_KEYS:
+        raise ValueError(f"Unknown author key {key!r}; expected one of {AUTHOR_KEYS}")
+    if key == 'identity':
+        return np.arange(len(authors), dtype=np.int32), authors
+
+    labels: list[str] = []
+    index: dict[str, int] = {}
+    remap = np.empty(len(authors), dtype=np.int32)
+    for author_id, identity in enumerate(authors):
+        name, _, email = identity.rpartition(' <')
+        label = email.rstrip('>').casefold() if key == 'email' else name
+        group = index.get(label)
+        if group is None:
+            group = index[label] = len(labels)
+            labels.append(label)
+        remap[author_id] = group
+    return remap, tuple(labels)
+
+
+def aggregate_authors(table: CommitTable, key: str = 'identity') -> AuthorAggregates:
+    """Compute every author's activity histograms in one pass.
+
+    Args:
+        table: Commits to aggregate
+        key: How to group identities (see ``author_groups``)
+
+    Returns:
+        Per-author histograms, one row per author label
+    """
+    remap, labels = author_groups(table.authors, key)
+    groups = remap[table.author_ids].astype(np.int64)
+    _, hour, weekday, month = local_calendar(table.timestamps, table.tz_offsets)
+
+    base = groups * FIELDS
+    matrix = np.bincount(
+        np.concatenate([
+            base + hour,
+            base + _WEEKDAY_COLUMNS.start + weekday,
+            base + _MONTH_COLUMNS.start + month,
+        ]),
+        minlength=len(labels) * FIELDS,
+    ).reshape(len(labels), FIELDS)
+
+    first_commit = np.full(len(labels), np.iinfo(np.int64).max, dtype=np.int64)
+    last_commit = np.full(len(labels), np.iinfo(np.int64).min, dtype=np.int64)
+    np.minimum.at(first_commit, groups, table.timestamps)
+    np.maximum.at(last_commit, groups, table.timestamps)
+    by_hour = matrix[:, _HOUR_COLUMNS]
+    commits = by_hour.sum(axis=1)
+    first_commit[commits == 0] = 0
+    last_commit[commits == 0] = 0
+
+    return AuthorAggregates(
+        authors=labels,
+        commits=commits,
+        by_hour=by_hour,
+        by_weekday=matrix[:, _WEEKDAY_COLUMNS],
+        by_month=matrix[:, _MONTH_COLUMNS],
+        first_commit=first_commit,
+        last_commit=last_commit,
+    )
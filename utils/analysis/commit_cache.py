@@ -0,0 +1,155 @@
+"""Persistent per-repository cache of ingested commit tables.
+
+Each repository gets one ``.npz`` file keyed by its absolute git directory
+and stamped with the tip SHA it was built from. A refresh only walks
+``last_tip..HEAD`` and prepends the new rows; a full rebuild happens only
+when the old tip is no longer an ancestor (history was rewritten).
+"""
+import hashlib
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .commit_ingest import CommitTable, ingest_commits
+from .commit_shards import ingest_commits_sharded
+from .repo_utils import atomic_write, get_cache_dir, is_ancestor, resolve_tip, run_git
+from .tracing import increment, span
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class CachedHistory:
+    """A commit table together with the tip SHA it covers."""
+    tip: str
+    table: CommitTable
+
+
+def cache_path(repo_path: str = '.', ref: str = 'HEAD') -> Path:
+    """Return the cache file for a repository/ref pair."""
+    git_dir = run_git(repo_path, 'rev-parse', '--absolute-git-dir')
+    key = hashlib.sha1(f'{git_dir}\0{ref}'.encode()).hexdigest()
+    return get_cache_dir() / f'{key}.npz'
+
+
+def read_cache(path: Path) -> CachedHistory | None:
+    """Load a cached history, or None if it is missing or unreadable."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != CACHE_FORMAT_VERSION:
+                return None
+            table = CommitTable(
+                shas=data['shas'],
+                timestamps=data['timestamps'],
+                tz_offsets=data['tz_offsets'],
+                author_ids=data['author_ids'],
+                authors=tuple(data['authors'].tolist()),
+            )
+            return CachedHistory(tip=str(data['tip']), table=table)
+    except FileNotFoundError:
+        return None
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning("Ignoring unreadable commit cache %s: %s", path, e)
+        return None
+
+
+def write_cache(path: Path, history: CachedHistory) -> None:
+    """Atomically write a cached history to ``path``."""
+    table = history.table
+    with atomic_write(path) as f:
+        np.savez(
+            f,
+            version=np.array(CACHE_FORMAT_VERSION),
+            tip=np.array(history.tip),
+            shas=table.shas,
+            timestamps=table.timestamps,
+            tz_offsets=table.tz_offsets,
+            author_ids=table.author_ids,
+            authors=np.array(table.authors, dtype=str),
+        )
+
+
+def refresh_history(
+    repo_path: str,
+    cached: CachedHistory | None,
+    ref: str = 'HEAD',
+    workers: int | None = None
+) -> CachedHistory:
+    """Bring a cached history up to date with ``ref``.
+
+    Only ``cached.tip..tip`` is walked when the cached tip is still an
+    ancestor of the current one; otherwise the history is rebuilt, sharded
+    across worker processes if it is large.
+
+    Args:
+        repo_path: Path to the git working tree (or bare repository)
+        cached: Previously cached history, or None
+        ref: Revision whose history is tracked
+        workers: Ingestion processes for a full rebuild (default: CPU count)
+
+    Returns:
+        The up-to-date history
+    """
+    tip = resolve_tip(repo_path, ref)
+    if cached is not None and cached.tip == tip:
+        increment('commit_cache.hit')
+        return cached
+
+    if cached is not None and is_ancestor(repo_path, cached.tip, tip):
+        increment('commit_cache.append')
+        delta = ingest_commits(
+            repo_path, [f'{cached.tip}..{tip}'], known_authors=cached.table.authors
+        )
+        logger.info("Appended %d new commits to cached history", len(delta))
+        return CachedHistory(tip=tip, table=delta.concat(cached.table))
+
+    increment('commit_cache.rebuild')
+    if cached is not None:
+        logger.info("Cached tip %s is no longer an ancestor; rebuilding", cached.tip[:12])
+    return CachedHistory(
+        tip=tip, table=ingest_commits_sharded(repo_path, [tip], workers=workers)
+    )
+
+
+def load_history(
+    repo_path: str = '.',
+    ref: str = 'HEAD',
+    workers: int | None = None
+) -> CachedHistory:
+    """Return the up-to-date history for ``ref``, using and updating the disk cache.
+
+    Args:
+        repo_path: Path to the git working tree (or bare repository)
+        ref: Revision whose history is loaded
+        workers: Ingestion processes for a full rebuild (default: CPU count)
+
+    Returns:
+        The commit table covering all history reachable from ``ref``, with
+        the tip SHA it was built from
+    """
+    with span('commit_cache.load') as attrs:
+        path = cache_path(repo_path, ref)
+        with span('commit_cache.read'):
+            cached = read_cache(path)
+        history = refresh_history(repo_path, cached, ref, workers)
+        attrs['commits'] = len(history.table)
+        if history is not cached:
+            try:
+                with span('commit_cache.write'):
+                    write_cache(path, history)
+            except OSError as e:
+                logger.warning("Could not write commit cache %s: %s", path, e)
+    return history
+
+
+def load_commit_table(
+    repo_path: str = '.',
+    ref: str = 'HEAD',
+    workers: int | None = None
+) -> CommitTable:
+    """Return the commit table for ``ref`` (see ``load_history``)."""
+    return load_history(repo_path, ref, workers).table
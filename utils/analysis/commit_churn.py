@@ -0,0 +1,236 @@
+"""Per-commit churn (lines added/removed), cached permanently by SHA.
+
+A commit's diff never changes, so ``git log --numstat`` results are stored
+in one SHA-sorted ``.npz`` per repository (shared by every ref and worktree)
+and only commits missing from it are ever diffed again. Missing commits are
+diffed in batches by several ``git log --no-walk --stdin --numstat``
+processes at once.
+
+Merge commits have no diff against a single parent in ``git log`` and
+count as zero churn; binary files count as zero lines.
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .commit_aggregate import CommitAggregates, aggregate_timestamps
+from .commit_ingest import RECORD_SEP, SHA_DTYPE, CommitTable
+from .repo_utils import atomic_write, get_cache_dir, iter_git_lines, run_git
+
+logger = logging.getLogger(__name__)
+
+CHURN_FORMAT_VERSION = 1
+CHURN_WORKERS_ENV = 'GIT_COMMIT_VIZ_CHURN_WORKERS'
+DEFAULT_BATCH_SIZE = 500
+# Weight names accepted by aggregate_churn / plot_utils.load_repo_aggregates
+CHURN_WEIGHTS = ('churn', 'added', 'removed')
+
+
+@dataclass(frozen=True)
+class ChurnStore:
+    """Lines added and removed per commit, sorted by SHA.
+
+    Attributes:
+        shas: Commit SHAs (``S40``), sorted ascending and unique
+        added: Lines added per commit (``int64``)
+        removed: Lines removed per commit (``int64``)
+    """
+    shas: np.ndarray
+    added: np.ndarray
+    removed: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.shas)
+
+    @classmethod
+    def empty(cls) -> 'ChurnStore':
+        return cls(
+            shas=np.empty(0, dtype=SHA_DTYPE),
+            added=np.empty(0, dtype=np.int64),
+            removed=np.empty(0, dtype=np.int64),
+        )
+
+    def lookup(self, shas: np.ndarray) -> np.ndarray:
+        """Return the position of each of ``shas`` in this store, or -1."""
+        if not len(self.shas):
+            return np.full(len(shas), -1, dtype=np.int64)
+        pos = np.searchsorted(self.shas, shas).clip(max=len(self.shas) - 1)
+        return np.where(self.shas[pos] == shas, pos, -1)
+
+    @classmethod
+    def from_parts(cls, parts: list['ChurnStore']) -> 'ChurnStore':
+        """Combine stores into one; earlier parts win on duplicate SHAs."""
+        if not parts:
+            return cls.empty()
+        shas, first = np.unique(np.concatenate([p.shas for p in parts]), return_index=True)
+        return cls(
+            shas=shas,
+            added=np.concatenate([p.added for p in parts])[first],
+            removed=np.concatenate([p.removed for p in parts])[first],
+        )
+
+    def merge(self, other: 'ChurnStore') -> 'ChurnStore':
+        """Return a store holding the entries of both (``other`` wins on overlap)."""
+        return ChurnStore.from_parts([other, self])
+
+
+def churn_cache_path(repo_path: str = '.') -> Path:
+    """Return the churn cache file, shared by all refs and worktrees of a repository."""
+    common_dir = run_git(repo_path, 'rev-parse', '--path-format=absolute', '--git-common-dir')
+    key = hashlib.sha1(common_dir.encode()).hexdigest()
+    return get_cache_dir() / 'churn' / f'{key}.npz'
+
+
+def read_churn_cache(path: Path) -> ChurnStore:
+    """Load cached churn, or an empty store if missing or unreadable."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != CHURN_FORMAT_VERSION:
+                return ChurnStore.empty()
+            return ChurnStore(shas=data['shas'], added=data['added'], removed=data['removed'])
+    except FileNotFoundError:
+        return ChurnStore.empty()
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning("Ignoring unreadable churn cache %s: %s", path, e)
+        return ChurnStore.empty()
+
+
+def write_churn_cache(path: Path, store: ChurnStore) -> None:
+    """Atomically write cached churn to ``path``."""
+    with atomic_write(path) as f:
+        np.savez(
+            f,
+            version=np.array(CHURN_FORMAT_VERSION),
+            shas=store.shas,
+            added=store.added,
+            removed=store.removed,
+        )
+
+
+def compute_churn(repo_path: str, shas: list[str]) -> ChurnStore:
+    """Diff exactly ``shas`` with one ``git log --numstat``.
+
+    Raises:
+        subprocess.CalledProcessError: If ``git log`` fails
+    """
+    if not shas:
+        # git log --stdin with no revisions would fall back to HEAD
+        return ChurnStore.empty()
+    totals: dict[bytes, list[int]] = {}
+    current = None
+    for line in iter_git_lines(
+        repo_path,
+        ['log', '--no-walk=unsorted', '--stdin', '--numstat', f'--format={RECORD_SEP}%H'],
+        shas,
+    ):
+        if line.startswith(RECORD_SEP):
+            current = totals.setdefault(line[1:].strip().encode('ascii'), [0, 0])
+            continue
+        added, _, rest = line.partition('\t')
+        removed, _, _ = rest.partition('\t')
+        # Binary files report "-" for both counts
+        if current is not None and added.isdigit() and removed.isdigit():
+            current[0] += int(added)
+            current[1] += int(removed)
+
+    order = sorted(totals)
+    return ChurnStore(
+        shas=np.array(order, dtype=SHA_DTYPE),
+        added=np.array([totals[sha][0] for sha in order], dtype=np.int64),
+        removed=np.array([totals[sha][1] for sha in order], dtype=np.int64),
+    )
+
+
+def extract_churn(
+    repo_path: str,
+    shas: list[str],
+    workers: int | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> ChurnStore:
+    """Diff ``shas`` in parallel batches.
+
+    The diffing happens inside the git processes, so a thread per batch is
+    enough to keep ``workers`` cores busy.
+
+    Args:
+        repo_path: Path to the git working tree (or bare repository)
+        shas: Commits to diff
+        workers: Concurrent git processes (default: ``GIT_COMMIT_VIZ_CHURN_WORKERS``
+            or the CPU count)
+        batch_size: Commits per git process
+
+    Returns:
+        Churn for every commit in ``shas``
+    """
+    workers = workers or int(os.environ.get(CHURN_WORKERS_ENV, 0)) or os.cpu_count() or 1
+    batches = [shas[i:i + batch_size] for i in range(0, len(shas), batch_size)]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='churn') as pool:
+        parts = list(pool.map(lambda batch: compute_churn(repo_path, batch), batches))
+    return ChurnStore.from_parts(parts)
+
+
+def load_churn(
+    repo_path: str,
+    table: CommitTable,
+    workers: int | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return lines added and removed for every row of ``table``.
+
+    Only commits not already in the churn cache are diffed; the cache is
+    updated with them.
+
+    Returns:
+        Tuple of (added, removed) arrays aligned with ``table`` rows
+    """
+    path = churn_cache_path(repo_path)
+    store = read_churn_cache(path)
+    positions = store.lookup(table.shas)
+    missing = table.shas[positions < 0]
+    if len(missing):
+        logger.info("Computing churn for %d new commits", len(missing))
+        store = store.merge(extract_churn(
+            repo_path, [sha.decode('ascii') for sha in missing], workers
+        ))
+        try:
+            write_churn_cache(path, store)
+        except OSError as e:
+            logger.warning("Could not write churn cache %s: %s", path, e)
+        positions = store.lookup(table.shas)
+
+    found = positions >= 0
+    if not found.all():
+        logger.warning("git reported no churn for %d commits", int((~found).sum()))
+    added = np.zeros(len(table), dtype=np.int64)
+    removed = np.zeros(len(table), dtype=np.int64)
+    added[found] = store.added[positions[found]]
+    removed[found] = store.removed[positions[found]]
+    return added, removed
+
+
+def aggregate_churn(
+    repo_path: str,
+    table: CommitTable,
+    weight: str = 'churn',
+    workers: int | None = None
+) -> CommitAggregates:
+    """Aggregate ``table`` with its hour/weekday/month histograms weighted by churn.
+
+    Args:
+        repo_path: Repository the table was ingested from
+        table: Commits to aggregate
+        weight: ``"churn"`` (added + removed), ``"added"`` or ``"removed"``
+        workers: Concurrent git processes for commits not yet cached
+
+    Raises:
+        ValueError: If ``weight`` is unknown
+    """
+    if weight not in CHURN_WEIGHTS:
+        raise ValueError(f"Unknown churn weight {weight!r}; expected one of {CHURN_WEIGHTS}")
+    added, removed = load_churn(repo_path, table, workers)
+    weights = {'churn': added + removed, 'added': added, 'removed': removed}[weight]
+    return aggregate_timestamps(table.timestamps, table.tz_offsets, weights=weights, weight=weight)
@@ -0,0 +1,267 @@
+"""Streaming commit ingestion into a columnar in-memory table.
+
+Runs a single ``git log`` with a machine-readable format, streams its stdout
+line by line and builds NumPy columns directly, replacing the
+``commit_history.sh`` -> ``logs.txt`` -> grep/awk passes.
+
+Setting ``GIT_COMMIT_VIZ_BACKEND=native`` reads commits straight from the
+object database instead (``git_objects``), falling back to ``git log`` for
+repositories or revisions that reader does not support.
+"""
+import logging
+import os
+import subprocess
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import numpy as np
+
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+FIELD_SEP = '\x1f'
+RECORD_SEP = '\x1e'
+# SHA, author epoch, author ISO date (for the tz offset), mailmapped name/email
+LOG_FORMAT = FIELD_SEP.join(['%H', '%at', '%ai', '%aN', '%aE'])
+
+SECONDS_PER_MINUTE = 60
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+# 1970-01-01 was a Thursday; shift so that 0 = Sun as in commits_by_day.sh
+EPOCH_WEEKDAY_OFFSET = 4
+
+SHA_DTYPE = 'S40'
+
+BACKEND_ENV = 'GIT_COMMIT_VIZ_BACKEND'
+BACKENDS = ('git', 'native')
+
+
+@dataclass(frozen=True)
+class CommitTable:
+    """Columnar commit history, one row per commit in ``git log`` order.
+
+    Attributes:
+        shas: Commit SHAs as fixed-width bytes (``S40``)
+        timestamps: Author dates as UTC epoch seconds (``int64``)
+        tz_offsets: Author timezone offsets in minutes east of UTC (``int16``)
+        author_ids: Indices into ``authors`` (``int32``)
+        authors: Interned ``"Name <email>"`` identities
+    """
+    shas: np.ndarray
+    timestamps: np.ndarray
+    tz_offsets: np.ndarray
+    author_ids: np.ndarray
+    authors: tuple[str, ...]
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def empty(cls) -> 'CommitTable':
+        """Return a table with no rows."""
+        return cls(
+            shas=np.empty(0, dtype=SHA_DTYPE),
+            timestamps=np.empty(0, dtype=np.int64),
+            tz_offsets=np.empty(0, dtype=np.int16),
+            author_ids=np.empty(0, dtype=np.int32),
+            authors=(),
+        )
+
+    def concat(self, older: 'CommitTable') -> 'CommitTable':
+        """Return this table followed by the rows of ``older``.
+
+        ``self.authors`` must extend ``older.authors`` (see ``known_authors``
+        in ``ingest_commits``) so that ``older.author_ids`` remain valid.
+        """
+        if self.authors[:len(older.authors)] != older.authors:
+            raise ValueError("Author table does not extend the older table's authors")
+        return CommitTable(
+            shas=np.concatenate([self.shas, older.shas]),
+            timestamps=np.concatenate([self.timestamps, older.timestamps]),
+            tz_offsets=np.concatenate([self.tz_offsets, older.tz_offsets]),
+            author_ids=np.concatenate([self.author_ids, older.author_ids]),
+            authors=self.authors,
+        )
+
+    def take(self, rows: np.ndarray) -> 'CommitTable':
+        """Return the subset of rows at ``rows``, sharing the author table."""
+        return CommitTable(
+            shas=self.shas[rows],
+            timestamps=self.timestamps[rows],
+            tz_offsets=self.tz_offsets[rows],
+            author_ids=self.author_ids[rows],
+            authors=self.authors,
+        )
+
+
+def parse_tz_offset(iso_date: str) -> int:
+    """Convert the trailing ``+HHMM``/``-HHMM`` of a date to minutes."""
+    tz = iso_date[-5:]
+    minutes = int(tz[1:3]) * 60 + int(tz[3:5])
+    return -minutes if tz[0] == '-' else minutes
+
+
+def parse_log_line(line: str) -> tuple[str, int, int, str, str] | None:
+    """Parse one ``LOG_FORMAT`` line.
+
+    Returns:
+        Tuple of (sha, author epoch, tz offset in minutes, name, email), or
+        None if the line is malformed
+    """
+    parts = line.rstrip('\n').split(FIELD_SEP)
+    if len(parts) != 5:
+        return None
+    sha, epoch, iso_date, name, email = parts
+    try:
+        return sha, int(epoch), parse_tz_offset(iso_date), name, email
+    except ValueError:
+        return None
+
+
+class TableBuilder:
+    """Accumulates parsed log records into compact typed columns."""
+
+    def __init__(self, authors: list[str] | None = None) -> None:
+        self.shas: list[bytes] = []
+        self.timestamps = array('q')
+        self.tz_offsets = array('h')
+        self.author_ids = array('i')
+        self.authors: list[str] = list(authors or [])
+        self._author_index = {name: i for i, name in enumerate(self.authors)}
+
+    def add_line(self, line: str) -> bool:
+        """Parse one ``LOG_FORMAT`` line; return False if it is malformed."""
+        record = parse_log_line(line)
+        if record is None:
+            return False
+        self.add(*record)
+        return True
+
+    def add(self, sha: str, timestamp: int, tz_offset: int, name: str, email: str) -> None:
+        """Append one already-parsed commit record."""
+        identity = f"{name} <{email}>"
+        author_id = self._author_index.get(identity)
+        if author_id is None:
+            author_id = len(self.authors)
+            self._author_index[identity] = author_id
+            self.authors.append(identity)
+
+        self.shas.append(sha.encode('ascii'))
+        self.timestamps.append(timestamp)
+        self.tz_offsets.append(tz_offset)
+        self.author_ids.append(author_id)
+
+    def build(self) -> CommitTable:
+        """Freeze the accumulated columns into a ``CommitTable``."""
+        return CommitTable(
+            shas=np.array(self.shas, dtype=SHA_DTYPE),
+            timestamps=np.frombuffer(self.timestamps, dtype=np.int64).copy(),
+            tz_offsets=np.frombuffer(self.tz_offsets, dtype=np.int16).copy(),
+            author_ids=np.frombuffer(self.author_ids, dtype=np.int32).copy(),
+            authors=tuple(self.authors),
+        )
+
+
+def _git_log_command(rev_args: list[str] | None) -> list[str]:
+    return ['git', 'log', f'--format={LOG_FORMAT}', *(rev_args or [])]
+
+
+def ingest_commits(
+    repo_path: str = '.',
+    rev_args: list[str] | None = None,
+    known_authors: tuple[str, ...] = (),
+    backend: str | None = None
+) -> CommitTable:
+    """Run a single ``git log`` and stream it into a ``CommitTable``.
+
+    Args:
+        repo_path: Path to the git working tree (or bare repository)
+        rev_args: Extra revision arguments for ``git log`` (default: ``HEAD``)
+        known_authors: Author table to extend, so ids stay compatible with
+            a previously ingested table
+        backend: ``"git"`` or ``"native"`` (default: ``GIT_COMMIT_VIZ_BACKEND``,
+            else ``"git"``)
+
+    Returns:
+        The parsed commit table
+
+    Raises:
+        subprocess.CalledProcessError: If ``git log`` fails
+        ValueError: If ``backend`` is unknown
+    """
+    backend = backend or os.environ.get(BACKEND_ENV, 'git')
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown ingestion backend {backend!r}; expected one of {BACKENDS}")
+    with span('ingest', backend=backend) as attrs:
+        if backend == 'native':
+            from .git_objects import NativeReadError, read_commit_table
+            try:
+                table = read_commit_table(repo_path, rev_args, known_authors)
+                attrs['commits'] = len(table)
+                return table
+            except NativeReadError as e:
+                logger.info("Native object reader unavailable (%s); using git log", e)
+                attrs['backend'] = 'git'
+
+        builder = TableBuilder(list(known_authors))
+        skipped = 0
+        with subprocess.Popen(
+            _git_log_command(rev_args),
+            cwd=repo_path,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+        ) as proc:
+            for line in proc.stdout:
+                if not builder.add_line(line):
+                    skipped += 1
+        if proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, proc.args)
+        if skipped:
+            logger.warning("Skipped %d malformed git log records", skipped)
+
+        table = builder.build()
+        attrs['commits'] = len(table)
+    logger.info("Ingested %d commits from %s", len(table), repo_path)
+    return table
+
+
+def iter_commit_messages(
+    repo_path: str = '.',
+    rev_args: list[str] | None = None
+) -> Iterator[str]:
+    """Stream full commit messages from ``git log`` without a temp file.
+
+    Args:
+        repo_path: Path to the git working tree (or bare repository)
+        rev_args: Extra revision arguments for ``git log`` (default: ``HEAD``)
+
+    Yields:
+        One raw commit message (subject and body) per commit
+
+    Raises:
+        subprocess.CalledProcessError: If ``git log`` fails
+    """
+    with subprocess.Popen(
+        ['git', 'log', f'--format={RECORD_SEP}%B', *(rev_args or [])],
+        cwd=repo_path,
+        stdout=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+    ) as proc:
+        lines: list[str] | None = None
+        for line in proc.stdout:
+            if line.startswith(RECORD_SEP):
+                if lines is not None:
+                    yield ''.join(lines)
+                lines = [line[1:]]
+            elif lines is not None:
+                lines.append(line)
+        if lines is not None:
+            yield ''.join(lines)
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
@@ -0,0 +1,584 @@
+"""Inverted full-text index over commit messages.
+
+Messages are tokenized with the word cloud's rules (``analysis.commit_text``)
+and every distinct word maps to a posting list of the commits using it.
+A commit's document id is its position in ``MessageIndex.shas``; commits
+new since the cached tip are appended at the end, so their ids are larger
+than every existing one and updating a posting list only appends to it.
+
+Posting lists are delta-encoded LEB128 varints (one byte per gap below
+128), stored term-major in one byte array next to the commit cache. The
+file is an uncompressed ``.npz`` that is memory-mapped on load
+(``commit_snapshot.map_npz``), so a query only decodes the posting lists
+of its own terms, then maps the matches to commit table rows for the
+histograms.
+
+Query words must all occur (AND). ``word*`` matches every indexed word
+starting with ``word``; other words also match their plural or singular.
+
+Usage (from ``utils/``)::
+
+    python -m analysis.commit_messages build --repo .
+    python -m analysis.commit_messages query 'deadlock'
+    python -m analysis.commit_messages query 'flaky ci*' --since 2024-01-01
+"""
+import argparse
+import logging
+import subprocess
+import sys
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .commit_aggregate import CommitAggregates, aggregate_timestamps
+from .commit_cache import cache_path
+from .commit_ingest import RECORD_SEP, SHA_DTYPE
+from .commit_query import CommitFilter, CommitIndex, load_commit_index, rows_for_shas
+from .commit_snapshot import map_npz
+from .commit_text import TOKEN_PATTERN, is_excluded
+from .repo_utils import atomic_write, is_ancestor, resolve_tip
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+MESSAGES_FORMAT_VERSION = 1
+# Longer words (hashes, encoded blobs) are not indexed; terms are stored
+# as fixed-width UTF-8
+MAX_TERM_BYTES = 40
+MAX_CACHED_SEARCHES = 4
+PREFIX_WILDCARD = '*'
+
+_VARINT_MASK = 0x7F
+_VARINT_CONTINUE = 0x80
+_VARINT_SHIFT = 7
+
+
+def encode_varints(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """LEB128-encode non-negative integers.
+
+    Returns:
+        The concatenated bytes (``uint8``) and the byte length of each value
+    """
+    values = np.asarray(values, dtype=np.int64)
+    lengths = np.ones(len(values), dtype=np.int64)
+    rest = values >> _VARINT_SHIFT
+    while rest.any():
+        lengths += rest > 0
+        rest >>= _VARINT_SHIFT
+    starts = np.cumsum(lengths) - lengths
+    encoded = np.empty(int(lengths.sum()), dtype=np.uint8)
+    for k in range(int(lengths.max(initial=0))):
+        has_byte = lengths > k
+        chunk = (values[has_byte] >> (_VARINT_SHIFT * k)) & _VARINT_MASK
+        chunk |= np.where(lengths[has_byte] > k + 1, _VARINT_CONTINUE, 0)
+        encoded[starts[has_byte] + k] = chunk
+    return encoded, lengths
+
+
+def decode_varints(encoded: np.ndarray) -> np.ndarray:
+    """Decode concatenated LEB128 varints into ``int64`` values."""
+    encoded = np.asarray(encoded, dtype=np.uint8)
+    ends = np.flatnonzero(encoded < _VARINT_CONTINUE)
+    if len(ends) == len(encoded):
+        return encoded.astype(np.int64)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    shifts = _VARINT_SHIFT * (np.arange(len(encoded)) - np.repeat(starts, ends - starts + 1))
+    chunks = (encoded & _VARINT_MASK).astype(np.int64) << shifts
+    return np.add.reduceat(chunks, starts)
+
+
+@dataclass(frozen=True)
+class MessageIndex:
+    """Posting lists of the commits whose message uses each word.
+
+    Attributes:
+        shas: Commit SHA of every document id (``S40``)
+        terms: Indexed words, sorted (UTF-8 ``S``)
+        offsets: Byte range of each term's posting list in ``postings``
+            (``int64``, one more than ``terms``)
+        counts: Number of commits using each term (``int64``)
+        last_docs: Largest document id of each term, where appends resume (``int64``)
+        postings: Delta-encoded varint document ids, term-major (``uint8``)
+    """
+    shas: np.ndarray
+    terms: np.ndarray
+    offsets: np.ndarray
+    counts: np.ndarray
+    last_docs: np.ndarray
+    postings: np.ndarray
+
+    @classmethod
+    def empty(cls) -> 'MessageIndex':
+        return cls(
+            shas=np.empty(0, dtype=SHA_DTYPE),
+            terms=np.empty(0, dtype=f'S{MAX_TERM_BYTES}'),
+            offsets=np.zeros(1, dtype=np.int64),
+            counts=np.empty(0, dtype=np.int64),
+            last_docs=np.empty(0, dtype=np.int64),
+            postings=np.empty(0, dtype=np.uint8),
+        )
+
+    def __len__(self) -> int:
+        return len(self.shas)
+
+    def append(
+        self,
+        shas: np.ndarray,
+        words: list[bytes],
+        entry_words: np.ndarray,
+        entry_docs: np.ndarray
+    ) -> 'MessageIndex':
+        """Return this index followed by new commits.
+
+        Args:
+            shas: SHAs of the new commits; they get the next document ids
+            words: Words used by the new commits, unsorted
+            entry_words: Index into ``words`` of every (commit, word) entry
+            entry_docs: Index into ``shas`` of every entry, ascending
+
+        Returns:
+            The extended index; unchanged posting lists are copied as whole runs
+        """
+        new_terms = np.array(words, dtype=f'S{MAX_TERM_BYTES}')
+        terms = np.union1d(self.terms, new_terms).astype(f'S{MAX_TERM_BYTES}')
+        old_pos = np.searchsorted(terms, self.terms)
+
+        # Entries ordered by term, then document
+        entry_terms = np.searchsorted(terms, new_terms)[entry_words]
+        entry_docs = np.asarray(entry_docs, dtype=np.int64) + len(self.shas)
+        order = np.lexsort((entry_docs, entry_terms))
+        entry_terms, entry_docs = entry_terms[order], entry_docs[order]
+
+        # Each term's first new id is a gap from its last existing one
+        # (from 0 for a new term)
+        last_docs = np.zeros(len(terms), dtype=np.int64)
+        last_docs[old_pos] = self.last_docs
+        first = np.ones(len(entry_terms), dtype=bool)
+        first[1:] = entry_terms[1:] != entry_terms[:-1]
+        previous = np.empty_like(entry_docs)
+        previous[1:] = entry_docs[:-1]
+        previous[first] = last_docs[entry_terms[first]]
+        encoded, lengths = encode_varints(entry_docs - previous)
+        last = np.ones(len(entry_terms), dtype=bool)
+        last[:-1] = first[1:]
+        last_docs[entry_terms[last]] = entry_docs[last]
+
+        counts = np.zeros(len(terms), dtype=np.int64)
+        counts[old_pos] = self.counts
+        counts += np.bincount(entry_terms, minlength=len(terms))
+        term_bytes = np.zeros(len(terms), dtype=np.int64)
+        term_bytes[old_pos] = np.diff(self.offsets)
+        new_bytes = np.bincount(entry_terms, weights=lengths, minlength=len(terms)).astype(np.int64)
+        offsets = np.concatenate([[0], np.cumsum(term_bytes + new_bytes)])
+
+        # Interleave: the old blob up to the end of each updated term's old
+        # list, then that term's new entries
+        updated = entry_terms[first]
+        cuts = self.offsets[np.searchsorted(old_pos, updated, side='right')]
+        new_cuts = np.cumsum(new_bytes[updated])
+        pieces = []
+        old_start = new_start = 0
+        for cut, new_end in zip(cuts.tolist(), new_cuts.tolist()):
+            pieces.append(self.postings[old_start:cut])
+            pieces.append(encoded[new_start:new_end])
+            old_start, new_start = cut, new_end
+        pieces.append(self.postings[old_start:])
+
+        return MessageIndex(
+            shas=np.concatenate([self.shas, np.asarray(shas, dtype=SHA_DTYPE)]),
+            terms=terms,
+            offsets=offsets,
+            counts=counts,
+            last_docs=last_docs,
+            postings=np.concatenate(pieces).astype(np.uint8, copy=False),
+        )
+
+    def term_range(self, word: str, prefix: bool = False) -> tuple[int, int]:
+        """Range of term ids equal to (or, with ``prefix``, starting with) ``word``."""
+        key = word.encode()
+        lo = int(np.searchsorted(self.terms, key, side='left'))
+        if prefix:
+            # No UTF-8 byte sequence continues with 0xff
+            hi = int(np.searchsorted(self.terms, key + b'\xff', side='left'))
+        else:
+            hi = lo + (lo < len(self.terms) and self.terms[lo] == key)
+        return lo, hi
+
+    def _posting_docs(self, lo: int, hi: int) -> np.ndarray:
+        """Document ids of the posting lists of terms ``lo..hi``, list after list."""
+        if lo >= hi:
+            return np.empty(0, dtype=np.int64)
+        gaps = decode_varints(self.postings[self.offsets[lo]:self.offsets[hi]])
+        ids = np.cumsum(gaps)
+        if hi - lo > 1:
+            # Restart the running sum at every list boundary
+            counts = self.counts[lo:hi]
+            starts = np.cumsum(counts) - counts
+            ids -= np.repeat(ids[starts] - gaps[starts], counts)
+        return ids
+
+    def docs_in_range(self, lo: int, hi: int) -> np.ndarray:
+        """Sorted unique document ids in the posting lists of terms ``lo..hi``."""
+        ids = self._posting_docs(lo, hi)
+        return ids if hi - lo <= 1 else np.unique(ids)
+
+    def term_counts(self, docs: np.ndarray | None = None) -> np.ndarray:
+        """Number of commits using each term, among the documents where ``docs`` is True.
+
+        Args:
+            docs: Boolean mask over document ids; None counts every commit
+        """
+        if docs is None:
+            return self.counts
+        terms = np.repeat(np.arange(len(self.terms)), self.counts)
+        used = docs[self._posting_docs(0, len(self.terms))]
+        return np.bincount(terms[used], minlength=len(self.terms))
+
+    def docs_matching(self, word: str) -> np.ndarray:
+        """Sorted document ids of commits using ``word`` (see the module docstring)."""
+        if word.endswith(PREFIX_WILDCARD):
+            return self.docs_in_range(*self.term_range(word.rstrip(PREFIX_WILDCARD), prefix=True))
+        forms = {word, word + 's'}
+        if word.endswith('s') and not word.endswith('ss'):
+            forms.add(word[:-1])
+        chunks = [self.docs_in_range(*self.term_range(form)) for form in sorted(forms)]
+        chunks = [chunk for chunk in chunks if len(chunk)]
+        if len(chunks) == 1:
+            return chunks[0]
+        return np.unique(np.concatenate(chunks)) if chunks else np.empty(0, dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class CachedMessages:
+    """A message index together with the tip SHA it covers."""
+    tip: str
+    index: MessageIndex
+
+
+def ingest_messages(
+    repo_path: str = '.',
+    rev_args: list[str] | None = None,
+    base: MessageIndex | None = None
+) -> MessageIndex:
+    """Stream commit messages from ``git log`` and append them to ``base``.
+
+    Raises:
+        subprocess.CalledProcessError: If ``git log`` fails
+    """
+    findall = TOKEN_PATTERN.findall
+    shas: list[bytes] = []
+    word_ids: dict[str, int] = {}
+    entry_docs = array('i')
+    entry_words = array('i')
+    commit_words: set[str] = set()
+
+    def finish_commit() -> None:
+        for word in commit_words:
+            if is_excluded(word) or len(word.encode()) > MAX_TERM_BYTES:
+                continue
+            entry_docs.append(len(shas) - 1)
+            entry_words.append(word_ids.setdefault(word, len(word_ids)))
+        commit_words.clear()
+
+    with subprocess.Popen(
+        ['git', 'log', f'--format={RECORD_SEP}%H%n%B', *(rev_args or [])],
+        cwd=repo_path,
+        stdout=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+    ) as proc:
+        for line in proc.stdout:
+            if line.startswith(RECORD_SEP):
+                if shas:
+                    finish_commit()
+                shas.append(line[1:].rstrip('\n').encode('ascii'))
+            elif shas:
+                commit_words.update(token.lower() for token in findall(line))
+        if shas:
+            finish_commit()
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+    index = (base or MessageIndex.empty()).append(
+        shas=np.array(shas, dtype=SHA_DTYPE),
+        words=[word.encode() for word in word_ids],
+        entry_words=np.frombuffer(entry_words, dtype=np.int32),
+        entry_docs=np.frombuffer(entry_docs, dtype=np.int32),
+    )
+    logger.info("Indexed %d words across %d commits", len(word_ids), len(shas))
+    return index
+
+
+def messages_cache_path(repo_path: str = '.', ref: str = 'HEAD') -> Path:
+    """Return the message index cache file for a repository/ref pair."""
+    return cache_path(repo_path, ref).with_suffix('.messages.npz')
+
+
+def read_messages_cache(path: Path) -> CachedMessages | None:
+    """Memory-map a cached message index, or None if it is missing or unreadable."""
+    try:
+        data = map_npz(path)
+        if int(data['version']) != MESSAGES_FORMAT_VERSION:
+            return None
+        index = MessageIndex(
+            shas=data['shas'],
+            terms=data['terms'],
+            offsets=data['offsets'],
+            counts=data['counts'],
+            last_docs=data['last_docs'],
+            postings=data['postings'],
+        )
+        return CachedMessages(tip=str(data['tip'][()]), index=index)
+    except FileNotFoundError:
+        return None
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning("Ignoring unreadable message index cache %s: %s", path, e)
+        return None
+
+
+def write_messages_cache(path: Path, cached: CachedMessages) -> None:
+    """Atomically write a cached message index to ``path`` (uncompressed, for mapping)."""
+    index = cached.index
+    with atomic_write(path) as f:
+        np.savez(
+            f,
+            version=np.array(MESSAGES_FORMAT_VERSION),
+            tip=np.array(cached.tip),
+            shas=index.shas,
+            terms=index.terms,
+            offsets=index.offsets,
+            counts=index.counts,
+            last_docs=index.last_docs,
+            postings=index.postings,
+        )
+
+
+def load_message_index(repo_path: str = '.', ref: str = 'HEAD') -> CachedMessages:
+    """Return the message index for ``ref``, reading only messages new since the cache.
+
+    Args:
+        repo_path: Path to the git working tree (or bare repository)
+        ref: Revision whose history is indexed
+
+    Returns:
+        The index covering all history reachable from ``ref``, with its tip
+    """
+    with span('messages.load') as attrs:
+        path = messages_cache_path(repo_path, ref)
+        cached = read_messages_cache(path)
+        tip = resolve_tip(repo_path, ref)
+        if cached is not None and cached.tip == tip:
+            attrs['outcome'] = 'hit'
+            return cached
+
+        if cached is not None and is_ancestor(repo_path, cached.tip, tip):
+            attrs['outcome'] = 'append'
+            index = ingest_messages(repo_path, [f'{cached.tip}..{tip}'], base=cached.index)
+        else:
+            attrs['outcome'] = 'rebuild'
+            index = ingest_messages(repo_path, [tip])
+        cached = CachedMessages(tip=tip, index=index)
+        try:
+            write_messages_cache(path, cached)
+        except OSError as e:
+            logger.warning("Could not write message index cache %s: %s", path, e)
+        return cached
+
+
+@dataclass(frozen=True)
+class MessageMatches:
+    """Commits whose messages match a query, and when they were made.
+
+    Attributes:
+        query: The query as given
+        words: Indexed words searched for (excluded words removed)
+        rows: Matching rows of the commit table, ascending
+        aggregates: Histograms of the matching commits
+        first_commit: Earliest matching author timestamp (UTC epoch seconds, 0 if none)
+        last_commit: Latest matching author timestamp (UTC epoch seconds, 0 if none)
+    """
+    query: str
+    words: tuple[str, ...]
+    rows: np.ndarray
+    aggregates: CommitAggregates
+    first_commit: int
+    last_commit: int
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def query_words(query: str) -> tuple[str, ...]:
+    """Split a query into indexed words, keeping ``*`` prefix wildcards.
+
+    Raises:
+        ValueError: If no word of the query is indexed
+    """
+    words = []
+    for part in query.split():
+        tokens = [token.lower() for token in TOKEN_PATTERN.findall(part) if token]
+        # An excluded word can still be the stem of indexed ones ("fix*")
+        stem = tokens.pop() if tokens and part.endswith(PREFIX_WILDCARD) else None
+        words.extend(token for token in tokens if not is_excluded(token))
+        if stem is not None:
+            words.append(stem + PREFIX_WILDCARD)
+    if not words:
+        raise ValueError(f"Nothing to search for in {query!r}: numbers, stopwords and "
+                         "commit types are not indexed")
+    return tuple(dict.fromkeys(words))
+
+
+_searches: OrderedDict[tuple[str, str], tuple[MessageIndex, np.ndarray]] = OrderedDict()
+_searches_lock = threading.Lock()
+
+
+def _rows_of_docs(repo_path: str, ref: str) -> tuple[MessageIndex, np.ndarray, CommitIndex]:
+    """Message index, commit table row of each document id, and the commit index."""
+    commit_index = load_commit_index(repo_path, ref)
+    cached = load_message_index(repo_path, ref)
+    key = (str(messages_cache_path(repo_path, ref)), cached.tip)
+    with _searches_lock:
+        entry = _searches.get(key)
+        if entry is not None:
+            _searches.move_to_end(key)
+            return entry[0], entry[1], commit_index
+    # Commits the table does not know about (the tip moved in between) map to row -1
+    doc_rows = rows_for_shas(commit_index.table.shas, cached.index.shas)
+    with _searches_lock:
+        _searches[key] = (cached.index, doc_rows)
+        while len(_searches) > MAX_CACHED_SEARCHES:
+            _searches.popitem(last=False)
+    return cached.index, doc_rows, commit_index
+
+
+def message_word_counts(
+    rows: np.ndarray | None = None,
+    repo_path: str = '.',
+    ref: str = 'HEAD'
+) -> Counter[str]:
+    """Count the commits using each indexed word, e.g. for the word cloud.
+
+    Args:
+        rows: Commit table rows to count (e.g. ``CommitIndex.select``); None
+            counts the whole history
+        repo_path: Path to the git working tree (or bare repository)
+        ref: Revision whose history is counted
+
+    Returns:
+        Word (lower case, excluded words already dropped) -> number of commits
+    """
+    with span('messages.word_counts') as attrs:
+        index, doc_rows, commit_index = _rows_of_docs(repo_path, ref)
+        docs = None
+        if rows is not None:
+            selected = np.zeros(len(commit_index.table) + 1, dtype=bool)
+            selected[rows] = True
+            # Row -1 (a document the table does not know) hits the spare False slot
+            docs = selected[doc_rows]
+        counts = index.term_counts(docs)
+        used = np.flatnonzero(counts)
+        attrs['words'] = len(used)
+        return Counter(dict(zip((term.decode() for term in index.terms[used]),
+                                counts[used].tolist())))
+
+
+def search_messages(
+    query: str,
+    commit_filter: CommitFilter | None = None,
+    repo_path: str = '.',
+    ref: str = 'HEAD'
+) -> MessageMatches:
+    """Find the commits whose messages contain every word of ``query``.
+
+    Args:
+        query: Words to search for; ``word*`` matches a prefix
+        commit_filter: Further restrict matches by date, author or path
+        repo_path: Path to the git working tree (or bare repository)
+        ref: Revision whose history is searched
+
+    Returns:
+        The matching commits and their hour/weekday/month histograms
+
+    Raises:
+        ValueError: If the query has no indexed word, or the filter's dates
+            are not ISO 8601
+    """
+    words = query_words(query)
+    with span('messages.search', words=len(words)) as attrs:
+        index, doc_rows, commit_index = _rows_of_docs(repo_path, ref)
+        docs = None
+        for word in words:
+            matching = index.docs_matching(word)
+            docs = matching if docs is None else np.intersect1d(docs, matching, assume_unique=True)
+            if not len(docs):
+                break
+        rows = doc_rows[docs]
+        rows = np.sort(rows[rows >= 0])
+        if commit_filter is not None and not commit_filter.is_empty():
+            rows = np.intersect1d(rows, commit_index.select(commit_filter), assume_unique=True)
+        attrs['matches'] = len(rows)
+        table = commit_index.table
+        timestamps = table.timestamps[rows]
+        return MessageMatches(
+            query=query,
+            words=words,
+            rows=rows,
+            aggregates=aggregate_timestamps(timestamps, table.tz_offsets[rows]),
+            first_commit=int(timestamps.min()) if len(rows) else 0,
+            last_commit=int(timestamps.max()) if len(rows) else 0,
+        )
+
+
+def main() -> int:
+    """Build the message index, or print match counts and histograms for a query."""
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description='Full-text index over commit messages')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='Build or update the index')
+    query = commands.add_parser('query', help='Count matching commits and when they were made')
+    query.add_argument('query', help="Words that must all occur; 'word*' matches a prefix")
+    query.add_argument('--since', help='Only commits on or after this ISO date')
+    query.add_argument('--until', help='Only commits up to this ISO date (inclusive)')
+    query.add_argument('--author', help='Only commits whose "Name <email>" contains this')
+    query.add_argument('--path', help='Only commits touching this file or directory')
+    for command in (build, query):
+        command.add_argument('--repo', default='.', help='Repository to read (default: .)')
+        command.add_argument('--ref', default='HEAD', help='Revision to index (default: HEAD)')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        cached = load_message_index(args.repo, args.ref)
+        index = cached.index
+        print(f"Indexed {len(index.terms)} words across {len(index)} commits "
+              f"({len(index.postings)} posting bytes) at {cached.tip[:12]}")
+        return 0
+    commit_filter = CommitFilter(since=args.since, until=args.until,
+                                 author=args.author, path=args.path)
+    try:
+        start = time.perf_counter()
+        matches = search_messages(args.query, commit_filter, args.repo, args.ref)
+        elapsed = time.perf_counter() - start
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    aggregates = matches.aggregates
+    print(json.dumps({
+        'words': matches.words,
+        'commits': len(matches),
+        'by_hour': aggregates.by_hour.tolist(),
+        'by_weekday': aggregates.by_weekday.tolist(),
+        'by_month': aggregates.by_month.tolist(),
+        'seconds': round(elapsed, 4),
+    }, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""Per-commit touched-path index.
+
+Streams ``git log --name-only --no-renames`` into a path-major index: unique paths are
+stored sorted and every (commit, path) entry is ordered by path, so all
+commits touching a directory are one contiguous slice found by binary
+search. Rename detection is off, so a rename is indexed under both its
+old and new path, as ``git log -- <path>`` reports it. The index is cached
+next to the commit cache and refreshed incrementally in the same way.
+"""
+import bisect
+import logging
+import subprocess
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .commit_cache import cache_path
+from .commit_ingest import RECORD_SEP, SHA_DTYPE
+from .repo_utils import atomic_write, is_ancestor, resolve_tip
+
+logger = logging.getLogger(__name__)
+
+PATHS_FORMAT_VERSION = 2
+# Sorts after every character that can appear in a path
+_PATH_MAX_CHAR = '\U0010ffff'
+
+
+@dataclass(frozen=True)
+class PathIndex:
+    """Files touched by each commit, ordered by path for prefix lookups.
+
+    Attributes:
+        shas: Commit SHAs, one per ingested commit (``S40``)
+        paths: Unique repository-relative paths, sorted
+        entry_paths: Path id of every (commit, path) entry, ascending (``int32``)
+        entry_commits: Index into ``shas`` of every entry (``int32``)
+    """
+    shas: np.ndarray
+    paths: tuple[str, ...]
+    entry_paths: np.ndarray
+    entry_commits: np.ndarray
+
+    @classmethod
+    def from_entries(
+        cls,
+        shas: np.ndarray,
+        paths: list[str],
+        entry_commits: np.ndarray,
+        entry_paths: np.ndarray
+    ) -> 'PathIndex':
+        """Build an index from entries whose path ids refer to unsorted ``paths``."""
+        order = sorted(range(len(paths)), key=paths.__getitem__)
+        rank = np.empty(len(paths), dtype=np.int32)
+        rank[order] = np.arange(len(paths), dtype=np.int32)
+        entry_paths = rank[entry_paths]
+        by_path = np.argsort(entry_paths, kind='stable')
+        return cls(
+            shas=shas,
+            paths=tuple(paths[i] for i in order),
+            entry_paths=entry_paths[by_path],
+            entry_commits=np.asarray(entry_commits, dtype=np.int32)[by_path],
+        )
+
+    def concat(self, older: 'PathIndex') -> 'PathIndex':
+        """Return this index followed by the commits of ``older``."""
+        paths = sorted(set(self.paths).union(older.paths))
+        path_ids = {path: i for i, path in enumerate(paths)}
+        remap_new = np.array([path_ids[p] for p in self.paths], dtype=np.int32)
+        remap_old = np.array([path_ids[p] for p in older.paths], dtype=np.int32)
+        return PathIndex.from_entries(
+            shas=np.concatenate([self.shas, older.shas]),
+            paths=paths,
+            entry_commits=np.concatenate(
+                [self.entry_commits, older.entry_commits + len(self.shas)]
+            ),
+            entry_paths=np.concatenate(
+                [remap_new[self.entry_paths], remap_old[older.entry_paths]]
+            ),
+        )
+
+    def commits_touching(self, path: str) -> np.ndarray:
+        """Return indices into ``shas`` of commits touching ``path``.
+
+        ``path`` matches the file itself or anything below it as a
+        directory; an empty path matches every commit with file changes.
+
+        Returns:
+            Sorted unique commit indices
+        """
+        path = path.strip().removeprefix('./').strip('/')
+        if not path:
+            id_ranges = [(0, len(self.paths))]
+        else:
+            # The file itself, then everything under "path/"; siblings such
+            # as "path-x" sort between the two ranges
+            lo = bisect.bisect_left(self.paths, path)
+            exact_hi = lo + (lo < len(self.paths) and self.paths[lo] == path)
+            id_ranges = [
+                (lo, exact_hi),
+                (bisect.bisect_left(self.paths, path + '/'),
+                 bisect.bisect_left(self.paths, path + '/' + _PATH_MAX_CHAR)),
+            ]
+        chunks = []
+        for lo, hi in id_ranges:
+            start, end = np.searchsorted(self.entry_paths, [lo, hi], side='left')
+            chunks.append(self.entry_commits[start:end])
+        return np.unique(np.concatenate(chunks))
+
+
+@dataclass(frozen=True)
+class CachedPaths:
+    """A path index together with the tip SHA it covers."""
+    tip: str
+    index: PathIndex
+
+
+def ingest_paths(repo_path: str = '.', rev_args: list[str] | None = None) -> PathIndex:
+    """Run ``git log --name-only --no-renames`` and stream it into a ``PathIndex``.
+
+    Raises:
+        subprocess.CalledProcessError: If ``git log`` fails
+    """
+    shas: list[bytes] = []
+    path_ids: dict[str, int] = {}
+    entry_commits = array('i')
+    entry_paths = array('i')
+    with subprocess.Popen(
+        ['git', '-c', 'core.quotePath=false', 'log', f'--format={RECORD_SEP}%H',
+         '--name-only', '--no-renames', *(rev_args or [])],
+        cwd=repo_path,
+        stdout=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+    ) as proc:
+        for line in proc.stdout:
+            line = line.rstrip('\n')
+            if line.startswith(RECORD_SEP):
+                shas.append(line[1:].encode('ascii'))
+            elif line and shas:
+                entry_commits.append(len(shas) - 1)
+                entry_paths.append(path_ids.setdefault(line, len(path_ids)))
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+    index = PathIndex.from_entries(
+        shas=np.array(shas, dtype=SHA_DTYPE),
+        paths=list(path_ids),
+        entry_commits=np.frombuffer(entry_commits, dtype=np.int32).copy(),
+        entry_paths=np.frombuffer(entry_paths, dtype=np.int32).copy(),
+    )
+    logger.info("Indexed %d paths across %d commits", len(index.paths), len(shas))
+    return index
+
+
+def paths_cache_path(repo_path: str = '.', ref: str = 'HEAD') -> Path:
+    """Return the path index cache file for a repository/ref pair."""
+    return cache_path(repo_path, ref).with_suffix('.paths.npz')
+
+
+def read_paths_cache(path: Path) -> CachedPaths | None:
+    """Load a cached path index, or None if it is missing or unreadable."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != PATHS_FORMAT_VERSION:
+                return None
+            index = PathIndex(
+                shas=data['shas'],
+                paths=tuple(data['paths'].tolist()),
+                entry_paths=data['entry_paths'],
+                entry_commits=data['entry_commits'],
+            )
+            return CachedPaths(tip=str(data['tip']), index=index)
+    except FileNotFoundError:
+        return None
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning("Ignoring unreadable path index cache %s: %s", path, e)
+        return None
+
+
+def write_paths_cache(path: Path, cached: CachedPaths) -> None:
+    """Atomically write a cached path index to ``path``."""
+    index = cached.index
+    with atomic_write(path) as f:
+        np.savez(
+            f,
+            version=np.array(PATHS_FORMAT_VERSION),
+            tip=np.array(cached.tip),
+            shas=index.shas,
+            paths=np.array(index.paths, dtype=str),
+            entry_paths=index.entry_paths,
+            entry_commits=index.entry_commits,
+        )
+
+
+def load_path_index(repo_path: str = '.', ref: str = 'HEAD') -> PathIndex:
+    """Return the path index for ``ref``, walking only commits new since the cache.
+
+    Args:
+        repo_path: Path to the git working tree (or bare repository)
+        ref: Revision whose history is indexed
+
+    Returns:
+        The path index covering all history reachable from ``ref``
+    """
+    path = paths_cache_path(repo_path, ref)
+    cached = read_paths_cache(path)
+    tip = resolve_tip(repo_path, ref)
+    if cached is not None and cached.tip == tip:
+        return cached.index
+
+    if cached is not None and is_ancestor(repo_path, cached.tip, tip):
+        index = ingest_paths(repo_path, [f'{cached.tip}..{tip}']).concat(cached.index)
+    else:
+        index = ingest_paths(repo_path, [tip])
+    try:
+        write_paths_cache(path, CachedPaths(tip=tip, index=index))
+    except OSError as e:
+        logger.warning("Could not write path index cache %s: %s", path, e)
+    return index
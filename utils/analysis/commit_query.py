@@ -0,0 +1,210 @@
+"""Indexed filtering of a cached commit table.
+
+Answers "which commits" questions without re-running ``git log``:
+
+* time ranges binary-search a sorted copy of the timestamps,
+* authors are looked up in an inverted index from author id to rows,
+* paths go through the touched-path index (``commit_paths``), which is
+  only built on the first path query.
+
+Indexes are built once per repository tip and kept in memory, so repeated
+filtered charts cost a few array slices and an aggregation pass.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .commit_cache import cache_path, load_history
+from .commit_ingest import CommitTable
+
+if TYPE_CHECKING:
+    from .commit_paths import PathIndex
+
+logger = logging.getLogger(__name__)
+
+# Number of repositories/tips whose indexes are kept in memory
+MAX_CACHED_INDEXES = 8
+
+
+@dataclass(frozen=True)
+class CommitFilter:
+    """Optional restrictions on which commits are counted.
+
+    Attributes:
+        since: ISO 8601 date or datetime; commits at or after it are kept
+        until: ISO 8601 date or datetime; commits before it are kept. A
+            bare date includes that whole day
+        author: Case-insensitive substring of ``"Name <email>"``
+        path: File or directory (relative to the repository root) that the
+            commit must touch
+    """
+    since: str | None = None
+    until: str | None = None
+    author: str | None = None
+    path: str | None = None
+
+    def is_empty(self) -> bool:
+        return all(getattr(self, f.name) is None for f in fields(self))
+
+    def describe(self) -> str:
+        """Short human-readable summary, e.g. for chart titles."""
+        parts = [f"{f.name} {getattr(self, f.name)}" for f in fields(self)
+                 if getattr(self, f.name) is not None]
+        return ', '.join(parts)
+
+
+def parse_time(value: str, end_of_day: bool = False) -> int:
+    """Convert an ISO 8601 date or datetime to epoch seconds.
+
+    Naive values are taken as UTC.
+
+    Args:
+        value: e.g. ``"2024-03-01"`` or ``"2024-03-01T12:00:00+01:00"``
+        end_of_day: For a bare date, return the start of the following day
+
+    Raises:
+        ValueError: If ``value`` is not ISO 8601
+    """
+    value = value.strip()
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    if end_of_day and len(value) == len('YYYY-MM-DD'):
+        parsed += timedelta(days=1)
+    return int(parsed.timestamp())
+
+
+class CommitIndex:
+    """Query indexes over one ``CommitTable``.
+
+    Row numbers returned by every method refer to ``table`` and are sorted
+    ascending (i.e. in ``git log`` order).
+    """
+
+    def __init__(self, table: CommitTable, repo_path: str = '.', ref: str = 'HEAD') -> None:
+        self.table = table
+        self.repo_path = repo_path
+        self.ref = ref
+        self._time_order = np.argsort(table.timestamps, kind='stable')
+        self._sorted_timestamps = table.timestamps[self._time_order]
+        # CSR layout: rows of author i are _author_rows[offsets[i]:offsets[i + 1]]
+        self._author_rows = np.argsort(table.author_ids, kind='stable')
+        self._author_offsets = np.concatenate([
+            [0], np.cumsum(np.bincount(table.author_ids, minlength=len(table.authors)))
+        ])
+        self._path_lock = threading.Lock()
+        self._path_index: 'PathIndex | None' = None
+        self._path_rows: np.ndarray | None = None
+
+    def rows_between(self, since: int | None = None, until: int | None = None) -> np.ndarray:
+        """Rows with ``since <= timestamp < until`` (epoch seconds)."""
+        lo = 0 if since is None else np.searchsorted(self._sorted_timestamps, since, 'left')
+        hi = (len(self.table) if until is None
+              else np.searchsorted(self._sorted_timestamps, until, 'left'))
+        return np.sort(self._time_order[lo:hi])
+
+    def rows_by_author(self, pattern: str) -> np.ndarray:
+        """Rows whose author identity contains ``pattern`` (case-insensitive)."""
+        needle = pattern.casefold()
+        chunks = [
+            self._author_rows[self._author_offsets[i]:self._author_offsets[i + 1]]
+            for i, identity in enumerate(self.table.authors)
+            if needle in identity.casefold()
+        ]
+        if not chunks:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(chunks))
+
+    def rows_touching(self, path: str) -> np.ndarray:
+        """Rows of commits that touch ``path`` (a file or directory)."""
+        path_index, path_rows = self._load_paths()
+        rows = path_rows[path_index.commits_touching(path)]
+        return np.unique(rows[rows >= 0])
+
+    def _load_paths(self) -> tuple['PathIndex', np.ndarray]:
+        with self._path_lock:
+            if self._path_index is None:
+                from .commit_paths import load_path_index
+                path_index = load_path_index(self.repo_path, self.ref)
+                # Commits the table does not know about (the tip moved in
+                # between) map to row -1
+                self._path_rows = rows_for_shas(self.table.shas, path_index.shas)
+                self._path_index = path_index
+            return self._path_index, self._path_rows
+
+    def select(self, commit_filter: CommitFilter) -> np.ndarray:
+        """Return the sorted rows matching every condition of ``commit_filter``.
+
+        Raises:
+            ValueError: If ``since``/``until`` are not ISO 8601
+        """
+        rows = None
+        if commit_filter.since is not None or commit_filter.until is not None:
+            rows = self.rows_between(
+                None if commit_filter.since is None else parse_time(commit_filter.since),
+                None if commit_filter.until is None
+                else parse_time(commit_filter.until, end_of_day=True),
+            )
+        if commit_filter.author is not None:
+            rows = _intersect(rows, self.rows_by_author(commit_filter.author))
+        if commit_filter.path is not None:
+            rows = _intersect(rows, self.rows_touching(commit_filter.path))
+        if rows is None:
+            return np.arange(len(self.table))
+        return rows
+
+    def filter(self, commit_filter: CommitFilter | None) -> CommitTable:
+        """Return the sub-table matching ``commit_filter`` (all rows if None/empty)."""
+        if commit_filter is None or commit_filter.is_empty():
+            return self.table
+        return self.table.take(self.select(commit_filter))
+
+
+def rows_for_shas(table_shas: np.ndarray, shas: np.ndarray) -> np.ndarray:
+    """Row of each of ``shas`` within ``table_shas``, or -1 where absent."""
+    if len(table_shas) == 0:
+        return np.full(len(shas), -1, dtype=np.int64)
+    order = np.argsort(table_shas)
+    sorted_shas = table_shas[order]
+    pos = np.searchsorted(sorted_shas, shas).clip(max=len(sorted_shas) - 1)
+    return np.where(sorted_shas[pos] == shas, order[pos], -1)
+
+
+def _intersect(rows: np.ndarray | None, other: np.ndarray) -> np.ndarray:
+    if rows is None:
+        return other
+    return np.intersect1d(rows, other, assume_unique=True)
+
+
+_indexes: OrderedDict[tuple[str, str], CommitIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def load_commit_index(repo_path: str = '.', ref: str = 'HEAD') -> CommitIndex:
+    """Return the query index for ``ref``, rebuilding it only when the tip moves.
+
+    Args:
+        repo_path: Path to the git working tree (or bare repository)
+        ref: Revision whose history is indexed
+
+    Returns:
+        An index over the up-to-date commit table
+    """
+    history = load_history(repo_path, ref)
+    key = (str(cache_path(repo_path, ref)), history.tip)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+    index = CommitIndex(history.table, repo_path, ref)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
@@ -0,0 +1,141 @@
+"""Parallel, sharded ingestion of very large histories.
+
+``git rev-list`` lists the commits in ``git log`` order, which is cheap
+compared to formatting them. The list is cut into contiguous shards and each
+worker process formats and parses its shard with
+``git log --no-walk=unsorted --stdin``. Shards are concatenated in order
+and their author tables re-interned, so the merged table is identical to
+the one ``ingest_commits`` builds serially.
+"""
+import logging
+import multiprocessing
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .commit_ingest import (
+    BACKEND_ENV, CommitTable, LOG_FORMAT, TableBuilder, ingest_commits
+)
+from .repo_utils import iter_git_lines
+
+logger = logging.getLogger(__name__)
+
+INGEST_WORKERS_ENV = 'GIT_COMMIT_VIZ_INGEST_WORKERS'
+# Below this many commits a single git log is faster than starting workers
+MIN_SHARDED_COMMITS = 50_000
+
+
+def default_workers() -> int:
+    """Worker count from ``GIT_COMMIT_VIZ_INGEST_WORKERS``, else the CPU count."""
+    return int(os.environ.get(INGEST_WORKERS_ENV, 0)) or os.cpu_count() or 1
+
+
+def list_commits(repo_path: str, rev_args: list[str] | None = None) -> list[str]:
+    """Return commit SHAs in ``git log`` order.
+
+    Raises:
+        subprocess.CalledProcessError: If ``git rev-list`` fails
+    """
+    output = subprocess.check_output(
+        ['git', 'rev-list', *(rev_args or ['HEAD'])], cwd=repo_path, text=True
+    )
+    return output.split()
+
+
+def ingest_shard(repo_path: str, shas: list[str]) -> CommitTable:
+    """Format and parse exactly ``shas``, in the given order.
+
+    Raises:
+        subprocess.CalledProcessError: If ``git log`` fails
+    """
+    builder = TableBuilder()
+    if not shas:
+        # git log --stdin with no revisions would fall back to HEAD
+        return builder.build()
+    for line in iter_git_lines(
+        repo_path, ['log', '--no-walk=unsorted', '--stdin', f'--format={LOG_FORMAT}'], shas
+    ):
+        builder.add_line(line)
+    return builder.build()
+
+
+def merge_shards(shards: list[CommitTable], known_authors: tuple[str, ...] = ()) -> CommitTable:
+    """Concatenate shards in order, re-interning authors by first appearance.
+
+    Args:
+        shards: Tables for consecutive, disjoint slices of one history
+        known_authors: Author table the result must extend
+
+    Returns:
+        The same table a serial ``ingest_commits`` would have produced
+    """
+    authors = list(known_authors)
+    author_index = {name: i for i, name in enumerate(authors)}
+    author_ids = []
+    for shard in shards:
+        remap = np.empty(len(shard.authors), dtype=np.int32)
+        for local_id, name in enumerate(shard.authors):
+            global_id = author_index.get(name)
+            if global_id is None:
+                global_id = author_index[name] = len(authors)
+                authors.append(name)
+            remap[local_id] = global_id
+        author_ids.append(remap[shard.author_ids])
+
+    merged = CommitTable(
+        shas=np.concatenate([s.shas for s in shards]),
+        timestamps=np.concatenate([s.timestamps for s in shards]),
+        tz_offsets=np.concatenate([s.tz_offsets for s in shards]),
+        author_ids=np.concatenate(author_ids),
+        authors=tuple(authors),
+    )
+    if len(np.unique(merged.shas)) != len(merged):
+        raise ValueError("Shards overlap: duplicate commits after merge")
+    return merged
+
+
+def ingest_commits_sharded(
+    repo_path: str = '.',
+    rev_args: list[str] | None = None,
+    known_authors: tuple[str, ...] = (),
+    workers: int | None = None
+) -> CommitTable:
+    """Ingest a history across ``workers`` processes.
+
+    Small histories, a single worker or the native backend use plain
+    ``ingest_commits``; a small history is only recognised after listing its
+    commits, so it costs one extra ``git rev-list``.
+
+    Args:
+        repo_path: Path to the git working tree (or bare repository)
+        rev_args: Revision arguments for ``git rev-list`` (default: ``HEAD``)
+        known_authors: Author table to extend
+        workers: Worker processes (default: ``default_workers()``)
+
+    Returns:
+        The parsed commit table, identical to ``ingest_commits``' output
+
+    Raises:
+        subprocess.CalledProcessError: If git fails
+    """
+    workers = workers or default_workers()
+    if workers <= 1 or os.environ.get(BACKEND_ENV, 'git') != 'git':
+        return ingest_commits(repo_path, rev_args, known_authors)
+
+    shas = list_commits(repo_path, rev_args)
+    if len(shas) < MIN_SHARDED_COMMITS:
+        return ingest_commits(repo_path, rev_args, known_authors)
+
+    shard_size = -(-len(shas) // workers)
+    chunks = [shas[i:i + shard_size] for i in range(0, len(shas), shard_size)]
+    # spawn: callers may be multi-threaded (e.g. the MCP server)
+    with ProcessPoolExecutor(
+        max_workers=len(chunks), mp_context=multiprocessing.get_context('spawn')
+    ) as pool:
+        shards = list(pool.map(ingest_shard, [repo_path] * len(chunks), chunks))
+
+    table = merge_shards(shards, known_authors)
+    logger.info("Ingested %d commits from %s in %d shards", len(table), repo_path, len(chunks))
+    return table
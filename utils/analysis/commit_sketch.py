@@ -0,0 +1,324 @@
+"""Constant-memory approximate statistics for very large histories.
+
+Instead of materializing a ``CommitTable`` (or a full word ``Counter``),
+``git log`` is streamed in fixed-size chunks into sketches whose size does
+not depend on history length:
+
+- the hour/weekday/month histograms are the same fixed (7, 24, 12)
+  counter cube ``aggregate_timestamps`` uses, so they stay exact;
+- distinct authors, active days and active days per hour are HyperLogLog
+  estimates (relative standard error ``1.04 / sqrt(2**precision)``);
+- commit-message token frequencies come from a count-min sketch, which
+  over-counts a token by at most ``e / width * total_tokens`` with
+  probability ``1 - exp(-depth)``, plus a bounded set of heavy-hitter
+  candidates for the word cloud.
+
+The per-day commit distribution needs every day's exact count and is not
+available in this mode.
+"""
+import hashlib
+import logging
+import math
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+
+from .commit_aggregate import (
+    DISTRIBUTION_BUCKET_LABELS, HOURS, MONTHS, WEEKDAYS, CommitAggregates, local_calendar
+)
+from .commit_ingest import LOG_FORMAT, parse_log_line
+from .repo_utils import iter_git_lines
+
+logger = logging.getLogger(__name__)
+
+HLL_PRECISION = 14
+CMS_WIDTH = 2 ** 16
+CMS_DEPTH = 5
+TOP_TOKENS = 2000
+CHUNK_SIZE = 65_536
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def hash_ints(values: np.ndarray, seed: int = 0) -> np.ndarray:
+    """SplitMix64 finalizer over integers: well-mixed 64-bit hashes, vectorized."""
+    with np.errstate(over='ignore'):
+        x = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15 + seed)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def hash_str(value: str) -> int:
+    """Stable 64-bit hash of a string (unlike ``hash()``, not salted per process)."""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'little')
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Exact ``int.bit_length`` of each uint64, by binary search over shifts."""
+    x = values.copy()
+    length = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = x >= (np.uint64(1) << np.uint64(shift))
+        length[high] += shift
+        x[high] >>= np.uint64(shift)
+    return length + (x > 0)
+
+
+class HyperLogLog:
+    """A row of independent HyperLogLog distinct-count estimators.
+
+    ``rows`` estimators share one register matrix, so e.g. "distinct days per
+    hour" is 24 estimators updated in one vectorized call.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION, rows: int = 1) -> None:
+        self.precision = precision
+        self.registers = np.zeros((rows, 1 << precision), dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of each estimate."""
+        return 1.04 / math.sqrt(self.registers.shape[1])
+
+    def add(self, hashes: np.ndarray, rows: np.ndarray | int = 0) -> None:
+        """Add 64-bit hashes, each to estimator ``rows`` (scalar or per hash)."""
+        if not len(hashes):
+            return
+        tail_bits = 64 - self.precision
+        index = (hashes >> np.uint64(tail_bits)).astype(np.int64)
+        tail = hashes & np.uint64((1 << tail_bits) - 1)
+        rank = (tail_bits - _bit_length(tail) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, (rows, index), rank)
+
+    def estimate(self) -> np.ndarray:
+        """Estimated distinct count per row (with small-range correction)."""
+        m = self.registers.shape[1]
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)), axis=1)
+        zeros = np.count_nonzero(self.registers == 0, axis=1)
+        linear = m * np.log(m / np.maximum(zeros, 1))
+        return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class CountMinSketch:
+    """Count-min sketch over string keys."""
+
+    def __init__(self, width: int = CMS_WIDTH, depth: int = CMS_DEPTH) -> None:
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    @property
+    def epsilon(self) -> float:
+        """Over-count bound as a fraction of ``total``."""
+        return math.e / self.width
+
+    @property
+    def delta(self) -> float:
+        """Probability that an estimate exceeds the bound."""
+        return math.exp(-self.depth)
+
+    def _columns(self, keys: list[str]) -> np.ndarray:
+        hashes = np.array([hash_str(key) for key in keys], dtype=np.uint64)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        with np.errstate(over='ignore'):
+            return ((h1 + rows * h2) % np.uint64(self.width)).astype(np.int64)
+
+    def update(self, counts: Counter[str]) -> np.ndarray:
+        """Add a batch of key counts; return the keys' new estimates."""
+        if not counts:
+            return np.empty(0, dtype=np.int64)
+        keys = list(counts)
+        columns = self._columns(keys)
+        values = np.fromiter(counts.values(), dtype=np.int64, count=len(keys))
+        rows = np.arange(self.depth)[:, None]
+        np.add.at(self.table, (np.broadcast_to(rows, columns.shape), columns),
+                  np.broadcast_to(values, columns.shape))
+        self.total += int(values.sum())
+        return self.table[rows, columns].min(axis=0)
+
+    def estimate(self, keys: list[str]) -> np.ndarray:
+        """Estimated counts for ``keys`` (never below the true count)."""
+        if not keys:
+            return np.empty(0, dtype=np.int64)
+        columns = self._columns(keys)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+
+class TokenSketch:
+    """Approximate token frequencies in bounded memory.
+
+    A count-min sketch estimates every token; the ``capacity`` tokens with the
+    highest estimates so far are kept as heavy-hitter candidates.
+    """
+
+    def __init__(self, capacity: int = TOP_TOKENS, width: int = CMS_WIDTH,
+                 depth: int = CMS_DEPTH) -> None:
+        self.capacity = capacity
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates: dict[str, int] = {}
+
+    def update(self, counts: Counter[str]) -> None:
+        """Fold a (bounded) batch of token counts in."""
+        estimates = self.sketch.update(counts)
+        self.candidates.update(zip(counts, estimates.tolist()))
+        if len(self.candidates) > 2 * self.capacity:
+            keep = sorted(self.candidates.items(), key=lambda item: item[1], reverse=True)
+            self.candidates = dict(keep[:self.capacity])
+
+    def most_common(self) -> Counter[str]:
+        """Estimated counts of the current heavy-hitter candidates."""
+        keys = list(self.candidates)
+        ranked = Counter(dict(zip(keys, self.sketch.estimate(keys).tolist())))
+        return Counter(dict(ranked.most_common(self.capacity)))
+
+    def error_bounds(self) -> dict:
+        return {
+            'tokens': self.sketch.total,
+            'max_overcount': math.ceil(self.sketch.epsilon * self.sketch.total),
+            'confidence': round(1 - self.sketch.delta, 4),
+        }
+
+
+def sketch_tokens(
+    lines: Iterable[str],
+    tokenize,
+    batch_lines: int = 1000,
+    capacity: int = TOP_TOKENS
+) -> TokenSketch:
+    """Stream text into a ``TokenSketch``, ``batch_lines`` lines at a time.
+
+    Args:
+        lines: Text to tokenize, consumed lazily
+        tokenize: Function returning the tokens of one line
+        batch_lines: Lines counted exactly before each sketch update
+        capacity: Heavy-hitter candidates to keep
+    """
+    sketch = TokenSketch(capacity)
+    batch: Counter[str] = Counter()
+    for i, line in enumerate(lines, 1):
+        batch.update(tokenize(line))
+        if i % batch_lines == 0:
+            del batch['']
+            sketch.update(batch)
+            batch = Counter()
+    del batch['']
+    sketch.update(batch)
+    return sketch
+
+
+@dataclass
+class CommitSketch:
+    """Fixed-size summary of a commit history.
+
+    Attributes:
+        cube: Exact commits per (weekday, hour, month)
+        authors: Distinct-author estimator
+        days: Distinct active-day estimator
+        days_by_hour: Distinct active days per hour of day (24 estimators)
+        commits: Exact number of commits seen
+    """
+    cube: np.ndarray
+    authors: HyperLogLog
+    days: HyperLogLog
+    days_by_hour: HyperLogLog
+    commits: int = 0
+
+    @classmethod
+    def empty(cls, precision: int = HLL_PRECISION) -> 'CommitSketch':
+        return cls(
+            cube=np.zeros((WEEKDAYS, HOURS, MONTHS), dtype=np.int64),
+            authors=HyperLogLog(precision),
+            days=HyperLogLog(precision),
+            # Hours only ever see a few thousand days each; smaller registers suffice
+            days_by_hour=HyperLogLog(min(precision, 10), rows=HOURS),
+        )
+
+    def add(self, timestamps: np.ndarray, tz_offsets: np.ndarray, author_hashes: np.ndarray) -> None:
+        """Fold one chunk of commits in."""
+        if not len(timestamps):
+            return
+        day, hour, weekday, month = local_calendar(timestamps, tz_offsets)
+        self.cube += np.bincount(
+            (weekday * HOURS + hour) * MONTHS + month, minlength=WEEKDAYS * HOURS * MONTHS
+        ).reshape(WEEKDAYS, HOURS, MONTHS)
+        day_hashes = hash_ints(day)
+        self.days.add(day_hashes)
+        self.days_by_hour.add(day_hashes, hour)
+        self.authors.add(author_hashes)
+        self.commits += len(timestamps)
+
+    def to_aggregates(self) -> CommitAggregates:
+        """``CommitAggregates`` with exact histograms and estimated day counts.
+
+        ``daily_distribution`` is all zeros: it cannot be sketched.
+        """
+        hour_weekday = self.cube.sum(axis=2)
+        return CommitAggregates(
+            by_hour=hour_weekday.sum(axis=0),
+            by_weekday=hour_weekday.sum(axis=1),
+            by_month=self.cube.sum(axis=(0, 1)),
+            hour_weekday=hour_weekday,
+            daily_distribution=np.zeros(len(DISTRIBUTION_BUCKET_LABELS), dtype=np.int64),
+            days_by_hour=np.rint(self.days_by_hour.estimate()).astype(np.int64),
+            active_days=int(round(self.days.estimate()[0])),
+        )
+
+    def summary(self) -> dict:
+        """Estimates with their error bounds, JSON-serializable."""
+        return {
+            'commits': self.commits,
+            'histograms': 'exact',
+            'distinct_authors': int(round(self.authors.estimate()[0])),
+            'active_days': int(round(self.days.estimate()[0])),
+            'relative_error': {
+                'distinct_authors': round(self.authors.relative_error, 4),
+                'active_days': round(self.days.relative_error, 4),
+                'days_by_hour': round(self.days_by_hour.relative_error, 4),
+            },
+            'memory_bytes': int(self.cube.nbytes + self.authors.registers.nbytes
+                                + self.days.registers.nbytes + self.days_by_hour.registers.nbytes),
+        }
+
+
+def sketch_commits(
+    repo_path: str = '.',
+    rev_args: list[str] | None = None,
+    chunk_size: int = CHUNK_SIZE
+) -> CommitSketch:
+    """Stream ``git log`` into a ``CommitSketch`` without building a table.
+
+    Memory is bounded by ``chunk_size`` records plus the fixed sketch size.
+
+    Raises:
+        subprocess.CalledProcessError: If ``git log`` fails
+    """
+    sketch = CommitSketch.empty()
+    timestamps = np.empty(chunk_size, dtype=np.int64)
+    tz_offsets = np.empty(chunk_size, dtype=np.int64)
+    author_hashes = np.empty(chunk_size, dtype=np.uint64)
+    filled = skipped = 0
+    for line in iter_git_lines(repo_path, ['log', f'--format={LOG_FORMAT}', *(rev_args or [])]):
+        record = parse_log_line(line)
+        if record is None:
+            skipped += 1
+            continue
+        _, timestamp, tz_offset, name, email = record
+        timestamps[filled] = timestamp
+        tz_offsets[filled] = tz_offset
+        author_hashes[filled] = hash_str(f"{name} <{email}>")
+        filled += 1
+        if filled == chunk_size:
+            sketch.add(timestamps, tz_offsets, author_hashes)
+            filled = 0
+    sketch.add(timestamps[:filled], tz_offsets[:filled], author_hashes[:filled])
+    if skipped:
+        logger.warning("Skipped %d malformed git log records", skipped)
+    logger.info("Sketched %d commits from %s", sketch.commits, repo_path)
+    return sketch
@@ -0,0 +1,273 @@
+"""Versioned binary snapshot of every aggregate of one repository.
+
+Replaces the ``commit_counts*.txt``/``average_commits.txt`` handoff between
+analysis and plotting with one file per repository holding the
+hour/weekday/month histograms, the daily distribution, the dense per-day
+series and the per-author matrices, stamped with their provenance (git
+directory, ref, tip SHA, first/last commit time).
+
+The file is an ordinary uncompressed ``.npz`` (``np.load`` reads it), but
+``load_snapshot`` memory-maps it and views every member in place instead
+of copying: uncompressed zip members are contiguous, so each ``.npy``
+payload is one ``np.frombuffer`` over the mapping. Loading costs the same
+for a 1k- or a 1M-commit history, and pages are only read when a chart
+touches them.
+
+Usage (from ``utils/``)::
+
+    python -m analysis.commit_snapshot build --repo . -o commit_snapshot.npz
+    python -m analysis.commit_snapshot show commit_snapshot.npz
+    python -m plotting.plot_commits_by_hour --input commit_snapshot.npz
+"""
+import argparse
+import logging
+import math
+import mmap
+import sys
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .commit_aggregate import CommitAggregates, aggregate_commits
+from .commit_authors import AuthorAggregates, aggregate_authors
+from .commit_cache import load_history
+from .commit_timeseries import DailySeries, daily_series
+from .repo_utils import atomic_write, run_git
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+DEFAULT_SNAPSHOT_FILE = 'commit_snapshot.npz'
+
+# Fixed part of a zip local file header, before the name and extra field
+_ZIP_LOCAL_HEADER_SIZE = 30
+_ZIP_LOCAL_HEADER_MAGIC = b'PK\x03\x04'
+_AGGREGATE_FIELDS = ('by_hour', 'by_weekday', 'by_month', 'hour_weekday',
+                     'daily_distribution', 'days_by_hour')
+_AUTHOR_FIELDS = ('commits', 'by_hour', 'by_weekday', 'by_month', 'first_commit', 'last_commit')
+
+
+@dataclass(frozen=True)
+class AggregateSnapshot:
+    """Every aggregate of one commit history, with where it came from.
+
+    Arrays loaded by ``load_snapshot`` are read-only views of the mapped file.
+
+    Attributes:
+        aggregates: Hour/weekday/month histograms and daily distribution
+        daily: Commits per local calendar day
+        authors: Per-author hour/weekday/month matrices (identity-keyed)
+        git_dir: Absolute git directory of the repository
+        ref: Revision the history was read from
+        tip: SHA the history ends at
+        commits: Number of commits aggregated
+        first_commit: Earliest author timestamp (UTC epoch seconds, 0 if empty)
+        last_commit: Latest author timestamp (UTC epoch seconds, 0 if empty)
+        created: When the snapshot was built (UTC epoch seconds)
+    """
+    aggregates: CommitAggregates
+    daily: DailySeries
+    authors: AuthorAggregates
+    git_dir: str
+    ref: str
+    tip: str
+    commits: int
+    first_commit: int
+    last_commit: int
+    created: int
+
+    def provenance(self) -> dict:
+        """JSON-serializable provenance fields, with ISO dates for the time range."""
+        def iso(timestamp: int) -> str | None:
+            if not self.commits:
+                return None
+            return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+        return {
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'git_dir': self.git_dir,
+            'ref': self.ref,
+            'tip': self.tip,
+            'commits': self.commits,
+            'first_commit': iso(self.first_commit),
+            'last_commit': iso(self.last_commit),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.created)),
+        }
+
+
+def build_snapshot(repo_path: str = '.', ref: str = 'HEAD') -> AggregateSnapshot:
+    """Aggregate a repository's history (via the commit cache) into a snapshot.
+
+    Args:
+        repo_path: Path to the git working tree (or bare repository)
+        ref: Revision whose history is aggregated
+
+    Returns:
+        The snapshot, ready for ``write_snapshot``
+    """
+    history = load_history(repo_path, ref)
+    table = history.table
+    with span('snapshot.build', commits=len(table)):
+        return AggregateSnapshot(
+            aggregates=aggregate_commits(table),
+            daily=daily_series(table),
+            authors=aggregate_authors(table),
+            git_dir=run_git(repo_path, 'rev-parse', '--absolute-git-dir'),
+            ref=ref,
+            tip=history.tip,
+            commits=len(table),
+            first_commit=int(table.timestamps.min()) if len(table) else 0,
+            last_commit=int(table.timestamps.max()) if len(table) else 0,
+            created=int(time.time()),
+        )
+
+
+def write_snapshot(path: str | Path, snapshot: AggregateSnapshot) -> None:
+    """Atomically write ``snapshot`` to ``path`` as an uncompressed ``.npz``."""
+    aggregates, authors = snapshot.aggregates, snapshot.authors
+    arrays = {
+        'version': np.array(SNAPSHOT_FORMAT_VERSION),
+        'git_dir': np.array(snapshot.git_dir),
+        'ref': np.array(snapshot.ref),
+        'tip': np.array(snapshot.tip),
+        'commits': np.array(snapshot.commits),
+        'first_commit': np.array(snapshot.first_commit),
+        'last_commit': np.array(snapshot.last_commit),
+        'created': np.array(snapshot.created),
+        'weight': np.array(aggregates.weight),
+        'active_days': np.array(aggregates.active_days),
+        'daily_start': np.array(snapshot.daily.start_day),
+        'daily_step': np.array(snapshot.daily.step),
+        'daily_counts': snapshot.daily.counts,
+        'author_names': np.array(authors.authors, dtype=str),
+        **{field: getattr(aggregates, field) for field in _AGGREGATE_FIELDS},
+        **{f'author_{field}': getattr(authors, field) for field in _AUTHOR_FIELDS},
+    }
+    with atomic_write(path) as f:
+        # Uncompressed, so load_snapshot can map members in place
+        np.savez(f, **arrays)
+
+
+def map_npz(path: str | Path) -> dict[str, np.ndarray]:
+    """View every ``.npy`` member of an uncompressed ``.npz`` in a read-only mapping.
+
+    Raises:
+        ValueError: If the file is not an uncompressed ``.npz``
+    """
+    with open(path, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError(f"{path} is empty") from None
+    try:
+        with zipfile.ZipFile(path) as archive:
+            members = archive.infolist()
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"{path} is not a snapshot: {e}") from None
+
+    arrays = {}
+    for info in members:
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f"{path}: member {info.filename} is compressed")
+        offset = info.header_offset
+        if buffer[offset:offset + 4] != _ZIP_LOCAL_HEADER_MAGIC:
+            raise ValueError(f"{path}: corrupt zip header for {info.filename}")
+        name_length = int.from_bytes(buffer[offset + 26:offset + 28], 'little')
+        extra_length = int.from_bytes(buffer[offset + 28:offset + 30], 'little')
+        buffer.seek(offset + _ZIP_LOCAL_HEADER_SIZE + name_length + extra_length)
+        version = np.lib.format.read_magic(buffer)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(buffer)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(buffer)
+        else:
+            raise ValueError(f"{path}: unsupported .npy version {version}")
+        if dtype.hasobject:
+            raise ValueError(f"{path}: member {info.filename} holds Python objects")
+        array = np.frombuffer(buffer, dtype=dtype, count=math.prod(shape), offset=buffer.tell())
+        arrays[info.filename.removesuffix('.npy')] = array.reshape(
+            shape, order='F' if fortran_order else 'C'
+        )
+    return arrays
+
+
+def load_snapshot(path: str | Path) -> AggregateSnapshot:
+    """Memory-map a snapshot written by ``write_snapshot`` without copying its arrays.
+
+    Raises:
+        FileNotFoundError: If ``path`` does not exist
+        ValueError: If it is not a snapshot or has another format version
+    """
+    with span('snapshot.load'):
+        data = map_npz(path)
+        try:
+            version = int(data['version'])
+            if version != SNAPSHOT_FORMAT_VERSION:
+                raise ValueError(f"{path} has snapshot format {version}, "
+                                 f"expected {SNAPSHOT_FORMAT_VERSION}; rebuild it")
+            aggregates = CommitAggregates(
+                **{field: data[field] for field in _AGGREGATE_FIELDS},
+                active_days=int(data['active_days']),
+                weight=str(data['weight'][()]),
+            )
+            authors = AuthorAggregates(
+                authors=tuple(data['author_names'].tolist()),
+                **{field: data[f'author_{field}'] for field in _AUTHOR_FIELDS},
+            )
+            daily = DailySeries(int(data['daily_start']), data['daily_counts'],
+                                int(data['daily_step']))
+            return AggregateSnapshot(
+                aggregates=aggregates,
+                daily=daily,
+                authors=authors,
+                git_dir=str(data['git_dir'][()]),
+                ref=str(data['ref'][()]),
+                tip=str(data['tip'][()]),
+                commits=int(data['commits']),
+                first_commit=int(data['first_commit']),
+                last_commit=int(data['last_commit']),
+                created=int(data['created']),
+            )
+        except KeyError as e:
+            raise ValueError(f"{path} is not a snapshot: missing {e}") from None
+
+
+def main() -> int:
+    """Build a snapshot, or print the provenance and totals of one."""
+    import json
+
+    parser = argparse.ArgumentParser(description='Build or inspect binary aggregate snapshots')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='Aggregate a repository into a snapshot')
+    build.add_argument('--repo', default='.', help='Repository to read (default: .)')
+    build.add_argument('--ref', default='HEAD', help='Revision to aggregate (default: HEAD)')
+    build.add_argument('-o', '--output', default=DEFAULT_SNAPSHOT_FILE,
+                       help=f'Snapshot file (default: {DEFAULT_SNAPSHOT_FILE})')
+    show = commands.add_parser('show', help='Print provenance and totals')
+    show.add_argument('snapshot', help='Snapshot file')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        write_snapshot(args.output, build_snapshot(args.repo, args.ref))
+        print(f"Snapshot written to {args.output}")
+        return 0
+    try:
+        snapshot = load_snapshot(args.snapshot)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps({
+        **snapshot.provenance(),
+        'active_days': snapshot.aggregates.active_days,
+        'days': len(snapshot.daily),
+        'authors': len(snapshot.authors),
+    }, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""Commit message tokenization shared by the word cloud and the message index.
+
+Only ``re`` is imported, so plotting entry points can use these rules
+without loading NumPy.
+"""
+import re
+
+# Stopwords excluded from the word cloud and the message index
+STOPWORDS = {
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
+    'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
+    'could', 'should', 'may', 'might', 'must', 'shall', 'can', 'need',
+    'this', 'that', 'these', 'those', 'it', 'its', 'they', 'them', 'their',
+    'we', 'us', 'our', 'you', 'your', 'i', 'me', 'my', 'he', 'she', 'his', 'her',
+    'not', 'no', 'yes', 'so', 'if', 'then', 'else', 'when', 'where', 'which',
+    'who', 'whom', 'what', 'how', 'why', 'all', 'each', 'every', 'both',
+    'few', 'more', 'most', 'other', 'some', 'such', 'only', 'own', 'same',
+    'than', 'too', 'very', 'just', 'also', 'now', 'here', 'there', 'use',
+    'used', 'using', 'add', 'added', 'adding', 'update', 'updated', 'updating',
+    'remove', 'removed', 'removing', 'change', 'changed', 'changes', 'changing',
+    'new', 'file', 'files', 'code', 'via', 'into', 'etc', 'eg', 'ie'
+}
+
+# Conventional commit types are dropped as well
+COMMIT_TYPE_WORDS = {'fix', 'feat', 'docs', 'style', 'refactor', 'chore', 'test', 'perf', 'ci', 'build'}
+
+# One pass per line: URLs and file paths match (and are discarded) before the
+# word alternative can see their pieces; only group 1 captures a word
+TOKEN_PATTERN = re.compile(
+    r'https?://\S+'
+    r'|[\w/]+\.(?:js|ts|tsx|jsx|scss|css|html|md|json|yml|yaml|py|sh)\b'
+    r'|(\w\w+)'
+)
+
+_EXCLUDED_WORDS = frozenset(STOPWORDS | COMMIT_TYPE_WORDS | {''})
+
+
+def is_excluded(word: str) -> bool:
+    """Whether a token is dropped: a number, a stopword or a commit type."""
+    return word.isdigit() or word.lower() in _EXCLUDED_WORDS
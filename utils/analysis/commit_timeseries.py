@@ -0,0 +1,185 @@
+"""Vectorized daily commit time series.
+
+Replaces the string-keyed awk arrays of ``average_commits.sh``: the history
+becomes one dense array of commits per local calendar day (one
+``np.bincount``), from which
+
+- rolling means come from a single cumulative sum (O(n) for any window);
+- rolling percentiles come from cumulative per-value counts, so each
+  window's distribution is a difference of two rows (O(n * distinct daily
+  counts), independent of the window length);
+- commits-per-day distributions use any bucket edges, not just the fixed
+  ``1-5 ... 31+`` ranges;
+- ``lttb`` downsamples long series to a fixed number of points for plotting.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .commit_aggregate import DISTRIBUTION_BUCKET_EDGES, local_calendar
+from .commit_ingest import CommitTable
+
+
+def bucket_labels(edges: np.ndarray | list[int]) -> list[str]:
+    """Labels for commits-per-day buckets given their lower edges.
+
+    ``[1, 6, 11]`` gives ``['1-5', '6-10', '11+']``; a bucket one value
+    wide is labelled with that value alone.
+    """
+    edges = [int(edge) for edge in edges]
+    labels = []
+    for low, next_low in zip(edges, edges[1:]):
+        high = next_low - 1
+        labels.append(str(low) if high == low else f'{low}-{high}')
+    labels.append(f'{edges[-1]}+')
+    return labels
+
+
+def parse_bucket_edges(value: str) -> list[int]:
+    """Parse ``"1,2,5,10"`` into strictly increasing positive lower edges.
+
+    Raises:
+        ValueError: If the edges are not positive and strictly increasing
+    """
+    edges = [int(part) for part in value.split(',') if part.strip()]
+    if not edges or edges[0] < 1 or any(b <= a for a, b in zip(edges, edges[1:])):
+        raise ValueError(f"Bucket edges must be positive and increasing: {value!r}")
+    return edges
+
+
+@dataclass(frozen=True)
+class DailySeries:
+    """Commits per local calendar day, including days without commits.
+
+    Attributes:
+        start_day: Epoch day (days since 1970-01-01) of ``counts[0]``
+        counts: Commits per day, or per ``step`` days once resampled (``int64``)
+        step: Days covered by each entry
+    """
+    start_day: int
+    counts: np.ndarray
+    step: int = 1
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @property
+    def dates(self) -> np.ndarray:
+        """``datetime64[D]`` first date of every entry."""
+        days = self.start_day + self.step * np.arange(len(self.counts))
+        return days.astype('datetime64[D]')
+
+    def rolling_mean(self, window: int) -> np.ndarray:
+        """Mean commits per day over the trailing ``window`` days.
+
+        The first ``window - 1`` days average over the days available so far.
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        cumulative = np.concatenate([[0], np.cumsum(self.counts)])
+        ends = np.arange(1, len(self.counts) + 1)
+        starts = np.maximum(ends - window, 0)
+        return (cumulative[ends] - cumulative[starts]) / (ends - starts)
+
+    def rolling_percentiles(self, window: int, percentiles: list[float]) -> np.ndarray:
+        """Percentiles of commits per day over the trailing ``window`` days.
+
+        Uses the lower ("nearest rank") definition, so every value is an
+        actual daily count. Cost is O(days * distinct daily counts).
+
+        Args:
+            window: Trailing window in days (shorter at the start of history)
+            percentiles: Percentiles in [0, 100]
+
+        Returns:
+            Array of shape (len(percentiles), days)
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        if any(not 0 <= percentile <= 100 for percentile in percentiles):
+            raise ValueError("percentiles must be between 0 and 100")
+        if not len(self.counts):
+            return np.empty((len(percentiles), 0), dtype=self.counts.dtype)
+        values, inverse = np.unique(self.counts, return_inverse=True)
+        # cumulative[i, v]: days before day i whose count is values[v]
+        onehot = np.zeros((len(self.counts) + 1, len(values)), dtype=np.int32)
+        onehot[np.arange(1, len(self.counts) + 1), inverse] = 1
+        cumulative = np.cumsum(onehot, axis=0, out=onehot)
+
+        ends = np.arange(1, len(self.counts) + 1)
+        starts = np.maximum(ends - window, 0)
+        window_cdf = np.cumsum(cumulative[ends] - cumulative[starts], axis=1)
+        sizes = ends - starts
+        result = np.empty((len(percentiles), len(self.counts)), dtype=self.counts.dtype)
+        for row, percentile in enumerate(percentiles):
+            rank = np.maximum(np.ceil(sizes * percentile / 100), 1)[:, None]
+            result[row] = values[np.argmax(window_cdf >= rank, axis=1)]
+        return result
+
+    def distribution(self, edges: np.ndarray | list[int] = DISTRIBUTION_BUCKET_EDGES) -> np.ndarray:
+        """Number of active days per commits-per-day bucket (lower ``edges``)."""
+        active = self.counts[self.counts >= edges[0]]
+        buckets = np.searchsorted(np.asarray(edges), active, side='right') - 1
+        return np.bincount(buckets, minlength=len(edges))
+
+    def distribution_items(
+        self, edges: np.ndarray | list[int] = DISTRIBUTION_BUCKET_EDGES
+    ) -> tuple[list[str], list[int]]:
+        """Return non-empty (bucket labels, day counts) for ``plot_bar_chart``."""
+        counts = self.distribution(edges)
+        labels = [label for label, count in zip(bucket_labels(edges), counts) if count]
+        return labels, [int(count) for count in counts if count]
+
+    def resample(self, days: int) -> 'DailySeries':
+        """Sum into consecutive ``days``-entry buckets (e.g. 7 for weekly)."""
+        padded = np.concatenate([
+            self.counts, np.zeros(-len(self.counts) % days, dtype=self.counts.dtype)
+        ])
+        return DailySeries(self.start_day, padded.reshape(-1, days).sum(axis=1), self.step * days)
+
+
+def daily_series(table: CommitTable) -> DailySeries:
+    """Build the per-day commit series of a history, in local author time."""
+    if not len(table):
+        return DailySeries(0, np.zeros(0, dtype=np.int64))
+    day, _, _, _ = local_calendar(table.timestamps, table.tz_offsets)
+    start = int(day.min())
+    return DailySeries(start, np.bincount(day - start))
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of ``threshold - 2``
+    equal buckets in between, the point forming the largest triangle with
+    the previously kept point and the next bucket's mean, preserving peaks
+    and troughs that plain striding would drop.
+
+    Args:
+        x: Monotonic x values (e.g. day numbers)
+        y: Values to plot
+        threshold: Number of points to keep
+
+    Returns:
+        Indices of the kept points, ascending
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        next_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+        px, py = x[previous], y[previous]
+        areas = np.abs((px - next_x) * (y[start:stop] - py) - (px - x[start:stop]) * (next_y - py))
+        previous = start + int(np.argmax(areas))
+        kept[i + 1] = previous
+    return kept
@@ -0,0 +1,170 @@
+"""Keep a repository's aggregates hot in memory and update them on ref changes.
+
+``RepoWatcher`` polls the modification times of ``HEAD``, ``packed-refs``
+and the loose refs under ``refs/`` (a few ``stat`` calls, no git process).
+When they change it refreshes the cached history, which only walks the new
+commits, folds those commits into a running ``AggregateState`` and reports
+which ``CommitAggregates`` fields actually changed, so callers can redraw
+just the charts that depend on them. Rewritten history (the old tip is no
+longer in the table) rebuilds the state from scratch.
+
+The poll interval defaults to ``GIT_COMMIT_VIZ_WATCH_INTERVAL`` seconds.
+"""
+import dataclasses
+import logging
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+
+from .commit_aggregate import AggregateState, CommitAggregates
+from .commit_cache import CachedHistory, load_history
+from .repo_utils import run_git
+
+logger = logging.getLogger(__name__)
+
+WATCH_INTERVAL_ENV = 'GIT_COMMIT_VIZ_WATCH_INTERVAL'
+DEFAULT_INTERVAL_SECONDS = 2.0
+
+
+def ref_fingerprint(git_dir: Path, common_dir: Path) -> tuple:
+    """Return (path, mtime, size) for HEAD, packed-refs and every loose ref."""
+    paths = [git_dir / 'HEAD', common_dir / 'packed-refs']
+    for root, _, files in os.walk(common_dir / 'refs'):
+        paths.extend(Path(root) / name for name in files)
+    entries = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(entries))
+
+
+def changed_fields(old: CommitAggregates | None, new: CommitAggregates) -> set[str]:
+    """Return the names of the ``CommitAggregates`` fields that differ."""
+    names = {field.name for field in dataclasses.fields(CommitAggregates)}
+    if old is None:
+        return names
+    return {name for name in names if not np.array_equal(getattr(old, name), getattr(new, name))}
+
+
+class RepoWatcher:
+    """In-memory, incrementally updated aggregates for one repository/ref.
+
+    ``poll()`` may be called directly, or ``start()`` runs it on a daemon
+    thread every ``interval`` seconds. Reads of ``aggregates``/``history``
+    are safe from any thread.
+    """
+
+    def __init__(
+        self,
+        repo_path: str = '.',
+        ref: str = 'HEAD',
+        interval: float | None = None
+    ) -> None:
+        self.repo_path = repo_path
+        self.ref = ref
+        self.interval = interval or float(
+            os.environ.get(WATCH_INTERVAL_ENV, DEFAULT_INTERVAL_SECONDS)
+        )
+        self._git_dir = Path(run_git(repo_path, 'rev-parse', '--absolute-git-dir'))
+        self._common_dir = Path(
+            run_git(repo_path, 'rev-parse', '--path-format=absolute', '--git-common-dir')
+        )
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._fingerprint: tuple | None = None
+        self._history: CachedHistory | None = None
+        self._state = AggregateState()
+        self._aggregates: CommitAggregates | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def history(self) -> CachedHistory:
+        """The current history, loading it on first use."""
+        if self._history is None:
+            self.poll()
+        with self._lock:
+            return self._history
+
+    @property
+    def aggregates(self) -> CommitAggregates:
+        """The current aggregates, loading them on first use."""
+        if self._aggregates is None:
+            self.poll()
+        with self._lock:
+            return self._aggregates
+
+    def poll(self) -> set[str]:
+        """Check the refs once and update the aggregates if they moved.
+
+        Returns:
+            Names of the ``CommitAggregates`` fields that changed (all of
+            them on the first poll, none if nothing moved)
+        """
+        with self._poll_lock:
+            # Fingerprint first: a ref moving during the refresh is seen next poll
+            fingerprint = ref_fingerprint(self._git_dir, self._common_dir)
+            if fingerprint == self._fingerprint:
+                return set()
+            history = load_history(self.repo_path, self.ref)
+            old = self._history
+            if old is not None and history.tip == old.tip:
+                self._fingerprint = fingerprint
+                return set()
+
+            new_rows = len(history.table) - len(old.table) if old is not None else -1
+            if new_rows >= 0 and np.array_equal(history.table.shas[new_rows:], old.table.shas):
+                state = self._state
+                state.add(history.table.timestamps[:new_rows], history.table.tz_offsets[:new_rows])
+            else:
+                if old is not None:
+                    logger.info("History of %s was rewritten; re-aggregating", self.ref)
+                new_rows = len(history.table)
+                state = AggregateState()
+                state.add(history.table.timestamps, history.table.tz_offsets)
+            aggregates = state.snapshot()
+            changed = changed_fields(self._aggregates, aggregates)
+
+            with self._lock:
+                self._state = state
+                self._history = history
+                self._aggregates = aggregates
+            self._fingerprint = fingerprint
+            logger.info("%s moved to %s: %d new commits, changed %s",
+                        self.ref, history.tip[:12], new_rows, sorted(changed))
+            return changed
+
+    def run(self, on_change: Callable[[set[str]], None] | None = None) -> None:
+        """Poll until ``stop()``, calling ``on_change`` with each non-empty change set.
+
+        Errors from git or ``on_change`` are logged and polling continues.
+        """
+        while not self._stop.is_set():
+            try:
+                changed = self.poll()
+                if changed and on_change is not None:
+                    on_change(changed)
+            except Exception:
+                logger.exception("Watch poll failed for %s", self.repo_path)
+            self._stop.wait(self.interval)
+
+    def start(self, on_change: Callable[[set[str]], None] | None = None) -> None:
+        """Run ``run(on_change)`` on a daemon thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run, args=(on_change,), name='repo-watch', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the polling thread started by ``start()``."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
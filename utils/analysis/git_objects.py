@@ -0,0 +1,739 @@
+"""Pure-Python reader for a repository's git object database.
+
+An optional ingestion backend that reads commits straight from ``.git``
+instead of parsing ``git log`` output:
+
+* refs are resolved from loose ref files and ``packed-refs``,
+* pack indexes (v2) and packfiles are mmapped; only the commit objects that
+  are visited get inflated, with ``OFS_DELTA``/``REF_DELTA`` chains applied,
+* loose objects and ``objects/info/alternates`` are supported,
+* when ``objects/info/commit-graph`` exists, the walk takes parents and
+  commit dates from it, so ordering and ``a..b`` exclusion need no inflation
+  (author name and date live only in the commit object itself).
+
+Anything this reader does not handle raises ``NativeReadError`` so callers
+can fall back to git: a mailmap from any source (``.mailmap`` in the working
+tree, ``HEAD:.mailmap`` in a bare repository, ``mailmap.*`` in any config
+file or ``git -c``), config includes, commits with a non-UTF-8 ``encoding``
+header, replace refs, grafts, SHA-256 repositories, and revision syntax
+beyond ``rev``, ``^rev`` and ``a..b``.
+"""
+import heapq
+import logging
+import mmap
+import os
+import re
+import struct
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterator
+from pathlib import Path
+
+from .commit_ingest import CommitTable, TableBuilder, parse_tz_offset
+
+logger = logging.getLogger(__name__)
+
+OBJ_COMMIT = 1
+OBJ_TREE = 2
+OBJ_BLOB = 3
+OBJ_TAG = 4
+OBJ_OFS_DELTA = 6
+OBJ_REF_DELTA = 7
+TYPE_NAMES = {b'commit': OBJ_COMMIT, b'tree': OBJ_TREE, b'blob': OBJ_BLOB, b'tag': OBJ_TAG}
+
+SHA_HEX = re.compile(r'[0-9a-f]{40}')
+PACK_INDEX_MAGIC = b'\xfftOc'
+COMMIT_GRAPH_MAGIC = b'CGPH'
+GRAPH_PARENT_NONE = 0x70000000
+GRAPH_EXTRA_EDGES = 0x80000000
+# Resolved delta bases kept per pack
+DELTA_BASE_CACHE_SIZE = 256
+# Extra walk steps once only uninteresting commits are queued, absorbing
+# commit date skew (git's SLOP)
+_WALK_SLOP = 5
+# Where git builds commonly look for the system config; checking one that
+# git does not read only costs a fallback
+SYSTEM_CONFIG_FILES = (
+    Path('/etc/gitconfig'), Path('/usr/local/etc/gitconfig'), Path('/opt/homebrew/etc/gitconfig')
+)
+_MAILMAP_SECTION = re.compile(r'^\s*\[\s*mailmap\b', re.MULTILINE | re.IGNORECASE)
+_INCLUDE_SECTION = re.compile(r'^\s*\[\s*include', re.MULTILINE | re.IGNORECASE)
+
+
+class NativeReadError(Exception):
+    """The repository or request is outside what the native reader supports."""
+
+
+def find_git_dir(repo_path: str = '.') -> Path:
+    """Locate the git directory for a working tree, worktree or bare repository.
+
+    Raises:
+        NativeReadError: If no repository is found
+    """
+    start = Path(repo_path).resolve()
+    for candidate in [start, *start.parents]:
+        dot_git = candidate / '.git'
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            content = dot_git.read_text().strip()
+            if content.startswith('gitdir:'):
+                return (candidate / content[len('gitdir:'):].strip()).resolve()
+        if (candidate / 'HEAD').is_file() and (candidate / 'objects').is_dir():
+            return candidate
+    raise NativeReadError(f"Not a git repository: {repo_path}")
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, '').lower() not in ('', '0', 'false', 'no', 'off')
+
+
+def user_config_files() -> list[Path]:
+    """Global, XDG and system config files git reads besides the repository's."""
+    files = []
+    if 'GIT_CONFIG_GLOBAL' in os.environ:
+        files.append(Path(os.environ['GIT_CONFIG_GLOBAL']))
+    else:
+        home = Path(os.path.expanduser('~'))
+        xdg = Path(os.environ.get('XDG_CONFIG_HOME') or home / '.config')
+        files += [xdg / 'git' / 'config', home / '.gitconfig']
+    if not _env_flag('GIT_CONFIG_NOSYSTEM'):
+        if 'GIT_CONFIG_SYSTEM' in os.environ:
+            files.append(Path(os.environ['GIT_CONFIG_SYSTEM']))
+        else:
+            files.extend(SYSTEM_CONFIG_FILES)
+    return files
+
+
+def _read_config(path: Path) -> str:
+    try:
+        return path.read_text(errors='replace') if path.is_file() else ''
+    except OSError:
+        return ''
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    """Read a little-endian base-128 size from a delta header."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Rebuild an object from its delta base and a git delta stream.
+
+    Raises:
+        NativeReadError: If the delta is corrupt
+    """
+    source_size, pos = _read_varint(delta, 0)
+    target_size, pos = _read_varint(delta, pos)
+    if source_size != len(base):
+        raise NativeReadError("Delta base size mismatch")
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            # Copy from base: bits 0-3 select offset bytes, 4-6 size bytes
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise NativeReadError("Invalid delta opcode 0")
+    if len(out) != target_size:
+        raise NativeReadError("Delta result size mismatch")
+    return bytes(out)
+
+
+def _map_file(path: Path) -> mmap.mmap:
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class PackIndex:
+    """Memory-mapped version 2 pack index (``.idx``)."""
+
+    def __init__(self, path: Path) -> None:
+        self._map = _map_file(path)
+        if self._map[:4] != PACK_INDEX_MAGIC or struct.unpack('>I', self._map[4:8])[0] != 2:
+            self._map.close()
+            raise NativeReadError(f"Unsupported pack index version: {path}")
+        self._fanout = struct.unpack('>256I', self._map[8:8 + 1024])
+        self.count = self._fanout[255]
+        self._shas = 8 + 1024
+        self._offsets = self._shas + 24 * self.count
+        self._large_offsets = self._offsets + 4 * self.count
+
+    def find(self, sha: bytes) -> int | None:
+        """Return the pack offset of a binary SHA, or None if absent."""
+        first = sha[0]
+        lo = self._fanout[first - 1] if first else 0
+        hi = self._fanout[first]
+        view = self._map
+        base = self._shas
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = base + 20 * mid
+            candidate = view[start:start + 20]
+            if candidate < sha:
+                lo = mid + 1
+            elif candidate > sha:
+                hi = mid
+            else:
+                offset = struct.unpack_from('>I', view, self._offsets + 4 * mid)[0]
+                if offset & 0x80000000:
+                    large = self._large_offsets + 8 * (offset & 0x7fffffff)
+                    offset = struct.unpack_from('>Q', view, large)[0]
+                return offset
+        return None
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class Pack:
+    """A memory-mapped packfile with its index."""
+
+    def __init__(self, idx_path: Path) -> None:
+        self.index = PackIndex(idx_path)
+        self._map = _map_file(idx_path.with_suffix('.pack'))
+        self._bases: OrderedDict[int, tuple[int, bytes]] = OrderedDict()
+
+    def _inflate(self, pos: int, size: int) -> bytes:
+        decompressor = zlib.decompressobj()
+        view = memoryview(self._map)
+        chunk = max(size * 2, 256)
+        out = b''
+        while len(out) < size and not decompressor.eof and pos < len(view):
+            out += decompressor.decompress(view[pos:pos + chunk], size - len(out))
+            pos += chunk
+        if len(out) != size:
+            raise NativeReadError("Truncated packed object")
+        return out
+
+    def read_at(self, offset: int, store: 'ObjectStore') -> tuple[int, bytes]:
+        """Read (and undeltify) the object at ``offset``.
+
+        Returns:
+            Tuple of (object type, object content)
+        """
+        cached = self._bases.get(offset)
+        if cached is not None:
+            self._bases.move_to_end(offset)
+            return cached
+
+        view = self._map
+        pos = offset
+        byte = view[pos]
+        pos += 1
+        obj_type = (byte >> 4) & 7
+        size = byte & 0x0f
+        shift = 4
+        while byte & 0x80:
+            byte = view[pos]
+            pos += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+
+        if obj_type == OBJ_OFS_DELTA:
+            byte = view[pos]
+            pos += 1
+            distance = byte & 0x7f
+            while byte & 0x80:
+                byte = view[pos]
+                pos += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7f)
+            base_type, base = self.read_at(offset - distance, store)
+            result = (base_type, apply_delta(base, self._inflate(pos, size)))
+        elif obj_type == OBJ_REF_DELTA:
+            base_sha = bytes(view[pos:pos + 20])
+            base_type, base = store.read(base_sha)
+            result = (base_type, apply_delta(base, self._inflate(pos + 20, size)))
+        else:
+            result = (obj_type, self._inflate(pos, size))
+
+        self._bases[offset] = result
+        if len(self._bases) > DELTA_BASE_CACHE_SIZE:
+            self._bases.popitem(last=False)
+        return result
+
+    def close(self) -> None:
+        self.index.close()
+        self._map.close()
+
+
+class CommitGraph:
+    """Memory-mapped ``commit-graph`` file (single file, SHA-1)."""
+
+    def __init__(self, path: Path) -> None:
+        self._map = _map_file(path)
+        view = self._map
+        # Version 1, SHA-1, no base graphs (split chains are not supported)
+        if view[:4] != COMMIT_GRAPH_MAGIC or tuple(view[4:6]) != (1, 1) or view[7] != 0:
+            self._map.close()
+            raise NativeReadError(f"Unsupported commit-graph: {path}")
+        chunk_count = view[6]
+        chunks = {}
+        for i in range(chunk_count):
+            entry = 8 + 12 * i
+            chunk_id = bytes(view[entry:entry + 4])
+            chunks[chunk_id] = struct.unpack_from('>Q', view, entry + 4)[0]
+        try:
+            self._fanout = struct.unpack_from('>256I', view, chunks[b'OIDF'])
+            self._oids = chunks[b'OIDL']
+            self._data = chunks[b'CDAT']
+        except KeyError:
+            self._map.close()
+            raise NativeReadError(f"commit-graph is missing required chunks: {path}") from None
+        self._edges = chunks.get(b'EDGE')
+        self.count = self._fanout[255]
+
+    def position(self, sha: bytes) -> int | None:
+        """Return the graph position of a binary SHA, or None if absent."""
+        first = sha[0]
+        lo = self._fanout[first - 1] if first else 0
+        hi = self._fanout[first]
+        view = self._map
+        base = self._oids
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = base + 20 * mid
+            candidate = view[start:start + 20]
+            if candidate < sha:
+                lo = mid + 1
+            elif candidate > sha:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def sha_at(self, position: int) -> bytes:
+        start = self._oids + 20 * position
+        return self._map[start:start + 20]
+
+    def commit(self, position: int) -> tuple[int, list[bytes]]:
+        """Return (commit date, parent SHAs) for a graph position."""
+        parent1, parent2, date_high, date_low = struct.unpack_from(
+            '>IIII', self._map, self._data + 36 * position + 20
+        )
+        commit_time = ((date_high & 0x3) << 32) | date_low
+        positions = []
+        if parent1 != GRAPH_PARENT_NONE:
+            positions.append(parent1)
+        if parent2 != GRAPH_PARENT_NONE:
+            if parent2 & GRAPH_EXTRA_EDGES:
+                edge = parent2 & 0x7fffffff
+                while True:
+                    value = struct.unpack_from('>I', self._map, self._edges + 4 * edge)[0]
+                    positions.append(value & 0x7fffffff)
+                    if value & GRAPH_EXTRA_EDGES:
+                        break
+                    edge += 1
+            else:
+                positions.append(parent2)
+        return commit_time, [self.sha_at(p) for p in positions]
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class ObjectStore:
+    """Read-only access to a repository's refs and objects."""
+
+    def __init__(self, repo_path: str = '.') -> None:
+        self.git_dir = find_git_dir(repo_path)
+        commondir = self.git_dir / 'commondir'
+        self.common_dir = (
+            (self.git_dir / commondir.read_text().strip()).resolve()
+            if commondir.is_file() else self.git_dir
+        )
+        self._check_supported()
+
+        object_dirs = [self.common_dir / 'objects']
+        alternates = object_dirs[0] / 'info' / 'alternates'
+        if alternates.is_file():
+            for line in alternates.read_text().splitlines():
+                if line.strip() and not line.startswith('#'):
+                    object_dirs.append((object_dirs[0] / line.strip()).resolve())
+        self._object_dirs = object_dirs
+
+        self._packs: list[Pack] = []
+        for object_dir in object_dirs:
+            idx_files = sorted(
+                (object_dir / 'pack').glob('*.idx'), key=lambda p: p.stat().st_mtime, reverse=True
+            )
+            self._packs.extend(Pack(idx) for idx in idx_files if idx.with_suffix('.pack').exists())
+
+        self.graph: CommitGraph | None = None
+        graph_path = object_dirs[0] / 'info' / 'commit-graph'
+        if graph_path.is_file():
+            try:
+                self.graph = CommitGraph(graph_path)
+            except NativeReadError as e:
+                logger.info("Ignoring commit-graph: %s", e)
+
+        shallow = self.common_dir / 'shallow'
+        self.shallow = (
+            {bytes.fromhex(line) for line in shallow.read_text().split()}
+            if shallow.is_file() else set()
+        )
+        self._packed_refs: dict[str, str] | None = None
+        try:
+            self._check_bare_mailmap()
+        except NativeReadError:
+            self.close()
+            raise
+
+    def _check_supported(self) -> None:
+        """Reject repository features that change what ``git log`` reports."""
+        repo_config = (_read_config(self.common_dir / 'config')
+                       + _read_config(self.git_dir / 'config.worktree'))
+        if re.search(r'objectformat\s*=\s*sha256', repo_config, re.IGNORECASE):
+            raise NativeReadError("SHA-256 repositories are not supported")
+        for text, origin in [(repo_config, 'repository config'),
+                             *((_read_config(path), str(path)) for path in user_config_files())]:
+            if _MAILMAP_SECTION.search(text):
+                raise NativeReadError(f"mailmap configuration in {origin} is not supported")
+            # An included file could configure a mailmap
+            if _INCLUDE_SECTION.search(text):
+                raise NativeReadError(f"config includes in {origin} are not supported")
+        # git -c and GIT_CONFIG_COUNT/GIT_CONFIG_KEY_<n>
+        command_line = [os.environ.get('GIT_CONFIG_PARAMETERS', '')] + [
+            value for key, value in os.environ.items() if key.startswith('GIT_CONFIG_KEY_')
+        ]
+        if any('mailmap.' in value.lower() for value in command_line):
+            raise NativeReadError("mailmap configuration on the command line is not supported")
+
+        self.worktree = self._find_worktree(repo_config)
+        if self.worktree is not None and (self.worktree / '.mailmap').is_file():
+            raise NativeReadError(".mailmap is not supported")
+        if (self.common_dir / 'info' / 'grafts').is_file():
+            raise NativeReadError("grafts are not supported")
+        replace_dir = self.common_dir / 'refs' / 'replace'
+        if replace_dir.is_dir() and any(replace_dir.iterdir()):
+            raise NativeReadError("replace refs are not supported")
+
+    def _find_worktree(self, repo_config: str) -> Path | None:
+        """Top of the working tree, or None for a bare repository."""
+        gitdir = self.git_dir / 'gitdir'
+        if gitdir.is_file():
+            # Linked worktree: gitdir names the worktree's .git file
+            return Path(gitdir.read_text().strip()).parent
+        worktree = re.search(r'^\s*worktree\s*=\s*(.+?)\s*$', repo_config, re.MULTILINE)
+        if worktree:
+            return (self.git_dir / worktree.group(1)).resolve()
+        if re.search(r'^\s*bare\s*=\s*true\s*$', repo_config, re.MULTILINE | re.IGNORECASE):
+            return None
+        return self.git_dir.parent if self.git_dir.name == '.git' else None
+
+    def _check_bare_mailmap(self) -> None:
+        """Bare repositories use ``HEAD:.mailmap`` (git's default ``mailmap.blob``)."""
+        head = self._read_ref('HEAD')
+        if self.worktree is not None or head is None:
+            return
+        _, commit = self.read(bytes.fromhex(head))
+        _, tree = self.read(bytes.fromhex(commit[5:45].decode('ascii')))
+        if _tree_has_entry(tree, b'.mailmap'):
+            raise NativeReadError("HEAD:.mailmap in a bare repository is not supported")
+
+    def close(self) -> None:
+        for pack in self._packs:
+            pack.close()
+        if self.graph is not None:
+            self.graph.close()
+
+    def __enter__(self) -> 'ObjectStore':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    # Refs
+
+    def _read_packed_refs(self) -> dict[str, str]:
+        if self._packed_refs is None:
+            refs = {}
+            packed = self.common_dir / 'packed-refs'
+            if packed.is_file():
+                for line in packed.read_text().splitlines():
+                    if line and line[0] not in '#^':
+                        sha, _, name = line.partition(' ')
+                        refs[name] = sha
+            if any(name.startswith('refs/replace/') for name in refs):
+                raise NativeReadError("replace refs are not supported")
+            self._packed_refs = refs
+        return self._packed_refs
+
+    def _read_ref(self, name: str, depth: int = 0) -> str | None:
+        if depth > 5:
+            raise NativeReadError(f"Symbolic ref loop at {name}")
+        # HEAD and other pseudo-refs are per-worktree; refs/ are shared
+        base = self.common_dir if name.startswith('refs/') else self.git_dir
+        path = base / name
+        if path.is_file():
+            content = path.read_text().strip()
+            if content.startswith('ref:'):
+                return self._read_ref(content[4:].strip(), depth + 1)
+            return content
+        return self._read_packed_refs().get(name)
+
+    def resolve(self, rev: str) -> bytes:
+        """Resolve a full SHA or ref name to a commit SHA (binary), peeling tags.
+
+        Raises:
+            NativeReadError: For unknown refs or unsupported revision syntax
+        """
+        if SHA_HEX.fullmatch(rev):
+            sha = rev
+        else:
+            if not re.fullmatch(r'[\w./-]+', rev) or '..' in rev:
+                raise NativeReadError(f"Unsupported revision syntax: {rev}")
+            for candidate in (rev, f'refs/{rev}', f'refs/tags/{rev}', f'refs/heads/{rev}',
+                              f'refs/remotes/{rev}', f'refs/remotes/{rev}/HEAD'):
+                sha = self._read_ref(candidate)
+                if sha is not None:
+                    break
+            else:
+                raise NativeReadError(f"Unknown revision: {rev}")
+
+        binary = bytes.fromhex(sha)
+        for _ in range(10):
+            obj_type, data = self.read(binary)
+            if obj_type == OBJ_COMMIT:
+                return binary
+            if obj_type != OBJ_TAG:
+                raise NativeReadError(f"{rev} does not point at a commit")
+            binary = bytes.fromhex(data[7:47].decode('ascii'))  # "object <sha>"
+        raise NativeReadError(f"Tag chain too long at {rev}")
+
+    # Objects
+
+    def read(self, sha: bytes) -> tuple[int, bytes]:
+        """Return (type, content) of an object by binary SHA.
+
+        Raises:
+            NativeReadError: If the object does not exist
+        """
+        for pack in self._packs:
+            offset = pack.index.find(sha)
+            if offset is not None:
+                return pack.read_at(offset, self)
+        hex_sha = sha.hex()
+        for object_dir in self._object_dirs:
+            path = object_dir / hex_sha[:2] / hex_sha[2:]
+            if path.is_file():
+                raw = zlib.decompress(path.read_bytes())
+                header, _, content = raw.partition(b'\0')
+                return TYPE_NAMES[header.split(b' ')[0]], content
+        raise NativeReadError(f"Missing object {hex_sha}")
+
+
+_PARENT_LINE = re.compile(rb'^parent ([0-9a-f]{40})$', re.MULTILINE)
+_ENCODING_LINE = re.compile(rb'^encoding (.+)$', re.MULTILINE)
+_COMMITTER_TIME = re.compile(rb'^committer [^\n]*> (\d+) ', re.MULTILINE)
+
+
+def _commit_header(data: bytes) -> bytes:
+    end = data.find(b'\n\n')
+    return data if end < 0 else data[:end + 1]
+
+
+def _parse_commit(data: bytes) -> tuple[int, list[bytes]]:
+    """Extract (committer time, parent SHAs) from a commit object."""
+    header = _commit_header(data)
+    committer = _COMMITTER_TIME.search(header)
+    return (int(committer.group(1)) if committer else 0,
+            [bytes.fromhex(sha.decode('ascii')) for sha in _PARENT_LINE.findall(header)])
+
+
+def _tree_has_entry(tree: bytes, name: bytes) -> bool:
+    """Whether a tree object lists ``name`` (entries: ``mode name\\0<20-byte sha>``)."""
+    pos = 0
+    while pos < len(tree):
+        space = tree.index(b' ', pos)
+        nul = tree.index(b'\0', space)
+        if tree[space + 1:nul] == name:
+            return True
+        pos = nul + 21
+    return False
+
+
+def _check_encoding(data: bytes) -> None:
+    """git log re-encodes commits that declare another encoding; this reader does not."""
+    encoding = _ENCODING_LINE.search(_commit_header(data))
+    if encoding and encoding.group(1).strip().lower() not in (b'utf-8', b'utf8'):
+        raise NativeReadError(f"Commit encoding {encoding.group(1).decode(errors='replace')} "
+                              "is not supported")
+
+
+def _author_line(data: bytes) -> bytes:
+    """Return the ``author`` header value (``Name <email> epoch +HHMM``)."""
+    start = data.find(b'\nauthor ') + len(b'\nauthor ')
+    return data[start:data.find(b'\n', start)]
+
+
+def _parse_signature(signature: bytes) -> tuple[str, str, int, int]:
+    """Split ``Name <email> epoch +HHMM`` into (name, email, epoch, tz minutes)."""
+    text = signature.decode('utf-8', errors='replace')
+    email_start = text.find('<')
+    email_end = text.rfind('>')
+    epoch, tz = text[email_end + 1:].split()
+    return (text[:email_start].strip(), text[email_start + 1:email_end],
+            int(epoch), parse_tz_offset(tz))
+
+
+def _parse_rev_args(store: ObjectStore, rev_args: list[str] | None) -> tuple[list[bytes], list[bytes]]:
+    include, exclude = [], []
+    for arg in rev_args or ['HEAD']:
+        if arg.startswith('^'):
+            exclude.append(store.resolve(arg[1:]))
+        elif '..' in arg:
+            old, _, new = arg.partition('..')
+            if new.startswith('.'):
+                raise NativeReadError(f"Unsupported revision range: {arg}")
+            exclude.append(store.resolve(old or 'HEAD'))
+            include.append(store.resolve(new or 'HEAD'))
+        elif arg.startswith('-'):
+            raise NativeReadError(f"Unsupported git log option: {arg}")
+        else:
+            include.append(store.resolve(arg))
+    return include, exclude
+
+
+def walk_commits(
+    store: ObjectStore,
+    include: list[bytes],
+    exclude: list[bytes] = ()
+) -> Iterator[tuple[bytes, bytes]]:
+    """Yield (SHA, commit content) reachable from ``include`` but not ``exclude``.
+
+    Commits come out newest commit date first, like ``git log``'s default
+    order. Parents and commit dates are taken from the commit-graph when it
+    covers a commit, so only yielded commits are necessarily inflated.
+
+    Included and excluded tips are walked together in one date-ordered
+    queue, as git's ``limit_list`` does: excluded commits mark their
+    ancestors uninteresting, and the walk stops ``_WALK_SLOP`` steps after
+    every queued commit is uninteresting, so ``old..new`` only visits
+    the commits near the range instead of all of ``old``'s history.
+    """
+    graph = store.graph
+    # Content of commits inflated only to learn their date/parents
+    pending: dict[bytes, bytes] = {}
+    # Parents of every queued (or already popped) commit
+    parents_of: dict[bytes, list[bytes]] = {}
+    popped: set[bytes] = set()
+    uninteresting: set[bytes] = set()
+    queue: list[tuple[int, int, bytes]] = []
+    sequence = 0
+
+    def mark_uninteresting(sha: bytes) -> None:
+        stack = [sha]
+        while stack:
+            sha = stack.pop()
+            if sha in uninteresting:
+                continue
+            uninteresting.add(sha)
+            pending.pop(sha, None)
+            # Popped commits already queued their parents; pass the mark on
+            if sha in popped:
+                stack.extend(parents_of[sha])
+
+    def push(sha: bytes, excluded: bool) -> None:
+        nonlocal sequence
+        if sha in parents_of:
+            if excluded:
+                mark_uninteresting(sha)
+            return
+        position = graph.position(sha) if graph is not None else None
+        if position is not None:
+            commit_time, parents = graph.commit(position)
+        else:
+            data = store.read(sha)[1]
+            if not excluded:
+                pending[sha] = data
+            commit_time, parents = _parse_commit(data)
+        parents_of[sha] = [] if sha in store.shallow else parents
+        if excluded:
+            uninteresting.add(sha)
+        heapq.heappush(queue, (-commit_time, sequence, sha))
+        sequence += 1
+
+    for sha in exclude:
+        push(sha, True)
+    for sha in include:
+        push(sha, False)
+
+    limited = bool(exclude)
+    output: list[bytes] = []
+    slop = _WALK_SLOP
+    while queue:
+        _, _, sha = heapq.heappop(queue)
+        popped.add(sha)
+        excluded = sha in uninteresting
+        if not excluded:
+            if limited:
+                output.append(sha)
+            else:
+                data = pending.pop(sha, None)
+                yield sha, data if data is not None else store.read(sha)[1]
+        for parent in parents_of[sha]:
+            push(parent, excluded)
+        if limited:
+            if all(queued in uninteresting for _, _, queued in queue):
+                slop -= 1
+                if not slop:
+                    break
+            else:
+                slop = _WALK_SLOP
+
+    # A commit popped as interesting may have been reached from an excluded
+    # tip later on
+    for sha in output:
+        if sha not in uninteresting:
+            data = pending.pop(sha, None)
+            yield sha, data if data is not None else store.read(sha)[1]
+
+
+def read_commit_table(
+    repo_path: str = '.',
+    rev_args: list[str] | None = None,
+    known_authors: tuple[str, ...] = ()
+) -> CommitTable:
+    """Build a ``CommitTable`` from the object database without running git.
+
+    Accepts the same arguments as ``commit_ingest.ingest_commits``.
+
+    Raises:
+        NativeReadError: If the repository or ``rev_args`` are unsupported
+    """
+    builder = TableBuilder(list(known_authors))
+    with ObjectStore(repo_path) as store:
+        include, exclude = _parse_rev_args(store, rev_args)
+        for sha, data in walk_commits(store, include, exclude):
+            _check_encoding(data)
+            try:
+                name, email, epoch, tz_offset = _parse_signature(_author_line(data))
+            except ValueError:
+                logger.warning("Skipping commit %s with malformed author", sha.hex())
+                continue
+            builder.add(sha.hex(), epoch, tz_offset, name, email)
+    table = builder.build()
+    logger.info("Read %d commits from the object database of %s", len(table), repo_path)
+    return table
@@ -0,0 +1,113 @@
+"""Parallel ingestion and aggregation across many repositories.
+
+Each repository is loaded (through the commit cache) and aggregated in its
+own worker process. Failures are captured per repository so one broken
+checkout never aborts the batch.
+"""
+import logging
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+from .commit_aggregate import CommitAggregates, aggregate_commits
+from .commit_cache import load_commit_table
+from .repo_utils import get_repo_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCAN_DEPTH = 2
+
+
+@dataclass(frozen=True)
+class RepoAnalysis:
+    """Outcome of analyzing one repository."""
+    repo_path: str
+    repo_name: str
+    aggregates: CommitAggregates | None
+    seconds: float
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def discover_repos(root: str, max_depth: int = DEFAULT_SCAN_DEPTH) -> list[str]:
+    """Find git repositories under ``root``.
+
+    A directory counts as a repository if it contains ``.git`` (a directory
+    or, for worktrees/submodules, a file). Repositories are not searched for
+    nested repositories.
+
+    Args:
+        root: Directory to scan
+        max_depth: How many directory levels below ``root`` to search
+
+    Returns:
+        Sorted repository paths
+    """
+    found = []
+    pending = [(Path(root), 0)]
+    while pending:
+        path, depth = pending.pop()
+        if (path / '.git').exists():
+            found.append(str(path))
+            continue
+        if depth >= max_depth:
+            continue
+        try:
+            children = [p for p in path.iterdir() if p.is_dir() and not p.name.startswith('.')]
+        except OSError as e:
+            logger.warning("Cannot scan %s: %s", path, e)
+            continue
+        pending.extend((child, depth + 1) for child in children)
+    return sorted(found)
+
+
+def analyze_repo(repo_path: str) -> RepoAnalysis:
+    """Load and aggregate one repository; never raises."""
+    start = time.perf_counter()
+    # Kept if looking up the name fails too
+    repo_name = Path(repo_path).name
+    try:
+        repo_name = get_repo_name(repo_path) or Path(repo_path).resolve().name
+        # Repositories are already spread across processes; ingest each serially
+        aggregates = aggregate_commits(load_commit_table(repo_path, workers=1))
+    except Exception as e:
+        return RepoAnalysis(repo_path, repo_name, None, time.perf_counter() - start, str(e))
+    return RepoAnalysis(repo_path, repo_name, aggregates, time.perf_counter() - start)
+
+
+def analyze_repos(
+    repo_paths: list[str],
+    max_workers: int | None = None,
+    on_result: Callable[[RepoAnalysis, int, int], None] | None = None
+) -> list[RepoAnalysis]:
+    """Analyze repositories in parallel across a bounded process pool.
+
+    Args:
+        repo_paths: Repositories to analyze
+        max_workers: Worker processes (default: CPU count)
+        on_result: Progress callback called as ``(result, done, total)``
+
+    Returns:
+        One result per repository, in input order
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    results: dict[str, RepoAnalysis] = {}
+    with ProcessPoolExecutor(max_workers=min(max_workers, max(len(repo_paths), 1))) as pool:
+        futures = {pool.submit(analyze_repo, path): path for path in repo_paths}
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Worker process died (e.g. killed for memory); isolate it
+                result = RepoAnalysis(path, Path(path).name, None, 0.0, f"worker failed: {e}")
+            results[path] = result
+            if on_result is not None:
+                on_result(result, done, len(repo_paths))
+    return [results[path] for path in repo_paths]
@@ -1,21 +1,140 @@
 """Shared utility functions for repository operations."""
 import logging
+import os
 import subprocess
+import tempfile
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any
+
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
+GET_REPO_NAME_SCRIPT = Path(__file__).with_name('get_repo_name.sh')
+CACHE_DIR_ENV = 'GIT_COMMIT_VIZ_CACHE_DIR'
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'git-commit-viz'
+
 
-def get_repo_name() -> str | None:
-    """Run get_repo_name.sh to get the current GitHub repository name.
+def get_repo_name(repo_path: str = '.') -> str | None:
+    """Run get_repo_name.sh to get a repository's GitHub repository name.
+
+    Args:
+        repo_path: Working tree to inspect (default: current directory).
 
     Returns:
         The repository name, or None if an error occurs.
     """
     try:
-        result = subprocess.check_output(["./get_repo_name.sh"], text=True)
+        with span('repo.get_repo_name'):
+            result = subprocess.check_output([str(GET_REPO_NAME_SCRIPT)], cwd=repo_path, text=True)
         # Extract repo name from "Repository name: <name>"
         repo_name = result.split(": ")[1].strip()
         return repo_name
     except (subprocess.CalledProcessError, IndexError):
         logger.error("Could not get repository name from get_repo_name.sh")
         return None
+
+
+def get_cache_dir() -> Path:
+    """Return the cache root, honouring ``GIT_COMMIT_VIZ_CACHE_DIR``."""
+    return Path(os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR))
+
+
+@contextmanager
+def atomic_write(path: str | Path, mode: str = 'wb', **open_args: Any) -> Iterator[IO]:
+    """Open a temporary file beside ``path`` that replaces it once written.
+
+    Readers see either the old file or the complete new one. If writing
+    fails, the temporary file is removed and ``path`` is left as it was.
+
+    Args:
+        path: File to (re)place; its directory is created if needed
+        mode: ``open`` mode, ``'wb'`` or ``'w'``
+        **open_args: Further ``open`` arguments, e.g. ``encoding``
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, **open_args) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def run_git(repo_path: str, *args: str) -> str:
+    """Run a git command in ``repo_path`` and return its stripped stdout.
+
+    Raises:
+        subprocess.CalledProcessError: If git exits non-zero
+    """
+    return subprocess.check_output(['git', *args], cwd=repo_path, text=True).strip()
+
+
+def iter_git_lines(
+    repo_path: str,
+    args: list[str],
+    stdin_lines: list[str] | None = None
+) -> Iterator[str]:
+    """Stream a git command's stdout line by line.
+
+    Args:
+        repo_path: Directory to run git in
+        args: Arguments after ``git``
+        stdin_lines: Lines written to the command's stdin (e.g. for ``--stdin``)
+
+    Yields:
+        Output lines, including their trailing newline
+
+    Raises:
+        subprocess.CalledProcessError: If git exits non-zero
+    """
+    with subprocess.Popen(
+        ['git', *args],
+        cwd=repo_path,
+        stdin=subprocess.PIPE if stdin_lines is not None else None,
+        stdout=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+    ) as proc:
+        writer = None
+        if stdin_lines is not None:
+            def feed() -> None:
+                with proc.stdin:
+                    proc.stdin.write(''.join(f'{line}\n' for line in stdin_lines))
+
+            # Write from a thread so a full stdout pipe cannot deadlock us
+            writer = threading.Thread(target=feed, daemon=True)
+            writer.start()
+        yield from proc.stdout
+        if writer is not None:
+            writer.join()
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+
+def resolve_tip(repo_path: str = '.', ref: str = 'HEAD') -> str:
+    """Return the full SHA that ``ref`` points at.
+
+    Raises:
+        subprocess.CalledProcessError: If ``ref`` cannot be resolved
+    """
+    with span('repo.resolve_tip'):
+        return run_git(repo_path, 'rev-parse', '--verify', f'{ref}^{{commit}}')
+
+
+def is_ancestor(repo_path: str, old_tip: str, new_tip: str) -> bool:
+    """Return True if ``old_tip`` is reachable from ``new_tip``."""
+    result = subprocess.run(
+        ['git', 'merge-base', '--is-ancestor', old_tip, new_tip],
+        cwd=repo_path,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return result.returncode == 0
@@ -0,0 +1,322 @@
+"""Lightweight timing spans and counters for the chart pipeline.
+
+A span costs two clock reads, a context-variable swap and a ring-buffer
+append, so tracing is always on. Each span name keeps its last
+``GIT_COMMIT_VIZ_TRACE_WINDOW`` durations for rolling p50/p95 latencies
+(``latency_stats``); counters record events such as commit-cache hits.
+
+Spans nest through a context variable: work started inside a span (also
+in executor threads via ``in_context``, and in render worker processes via
+``collect``/``record_spans``) shares its trace id and points to it as the
+parent. Set ``GIT_COMMIT_VIZ_TRACE_FILE`` to also append every finished
+span as one JSON line, shaped after OpenTelemetry spans (trace/span ids,
+unix-nano timestamps, attributes, status).
+
+Only light standard-library modules are imported (no dataclasses, json
+or random at import time), so entry points stay cheap.
+
+Usage (from ``utils/``)::
+
+    GIT_COMMIT_VIZ_TRACE_FILE=trace.jsonl python -m mcp_server
+    python -m analysis.tracing trace.jsonl    # p50/p95 per span name
+"""
+import argparse
+import atexit
+import contextvars
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any, TextIO
+
+logger = logging.getLogger(__name__)
+
+TRACE_FILE_ENV = 'GIT_COMMIT_VIZ_TRACE_FILE'
+TRACE_WINDOW_ENV = 'GIT_COMMIT_VIZ_TRACE_WINDOW'
+DEFAULT_WINDOW = 512
+SERVICE_NAME = 'git-commit-viz'
+
+# (trace id, span id) of the innermost open span
+_current: contextvars.ContextVar[tuple[str, str] | None] = contextvars.ContextVar(
+    'trace_parent', default=None
+)
+# Set in render workers: finished spans go here instead of the local sinks
+_collector: contextvars.ContextVar[list['Span'] | None] = contextvars.ContextVar(
+    'trace_collector', default=None
+)
+
+
+class Span:
+    """One finished (or, inside ``span()``, running) timed operation.
+
+    Attributes:
+        name: Stage name, e.g. ``mcp.chart`` or ``plot.save_chart``
+        trace_id: 32-hex-digit id shared by every span of one request
+        span_id: 16-hex-digit id of this span
+        parent_id: ``span_id`` of the enclosing span, if any
+        start_ns: Wall-clock start, nanoseconds since the epoch
+        duration_ns: Elapsed monotonic time in nanoseconds
+        attributes: Extra key/values; may be added to while the span runs
+        error: Exception type and message if the span raised
+    """
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_ns', 'duration_ns',
+                 'attributes', 'error')
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        span_id: str,
+        parent_id: str | None,
+        start_ns: int,
+        duration_ns: int = 0,
+        attributes: dict[str, Any] | None = None,
+        error: str | None = None
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start_ns = start_ns
+        self.duration_ns = duration_ns
+        self.attributes = attributes if attributes is not None else {}
+        self.error = error
+
+    def as_otel(self) -> dict[str, Any]:
+        """JSON-serializable record using OpenTelemetry span field names."""
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_id or '',
+            'start_time_unix_nano': self.start_ns,
+            'end_time_unix_nano': self.start_ns + self.duration_ns,
+            'attributes': self.attributes,
+            'status': {'code': 'ERROR', 'message': self.error} if self.error else {'code': 'OK'},
+            'resource': {'service.name': SERVICE_NAME, 'process.pid': os.getpid()},
+        }
+
+
+def _percentile(ordered: list[int], percentile: float) -> int:
+    """Nearest-rank percentile of an ascending, non-empty list."""
+    rank = max(1, -(-len(ordered) * percentile // 100))
+    return ordered[int(rank) - 1]
+
+
+class Tracer:
+    """Rolling per-name latencies, counters and an optional JSONL export."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW, export_path: str | None = None) -> None:
+        self.window = window
+        self.export_path = export_path
+        self._durations: dict[str, deque[int]] = {}
+        self._totals: Counter[str] = Counter()
+        self._errors: Counter[str] = Counter()
+        self._counters: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._export: TextIO | None = None
+
+    def record(self, span: Span) -> None:
+        """Add a finished span to the latency windows and the export file."""
+        with self._lock:
+            durations = self._durations.get(span.name)
+            if durations is None:
+                durations = self._durations[span.name] = deque(maxlen=self.window)
+            durations.append(span.duration_ns)
+            self._totals[span.name] += 1
+            if span.error:
+                self._errors[span.name] += 1
+            if self.export_path:
+                self._write(span)
+
+    def _write(self, span: Span) -> None:
+        import json
+        try:
+            if self._export is None:
+                # Line-buffered: one write per span, nothing lost on a crash
+                self._export = open(self.export_path, 'a', buffering=1, encoding='utf-8')
+                atexit.register(self._export.close)
+            self._export.write(json.dumps(span.as_otel(), default=str) + '\n')
+        except OSError as e:
+            logger.warning("Disabling trace export to %s: %s", self.export_path, e)
+            self.export_path = None
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def counters(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def latency_stats(self) -> dict[str, dict[str, float]]:
+        """Per span name: total count, errors, and p50/p95/max over the window (ms)."""
+        with self._lock:
+            windows = {name: sorted(durations) for name, durations in self._durations.items()}
+            totals = dict(self._totals)
+            errors = dict(self._errors)
+        return {
+            name: {
+                'count': totals[name],
+                'errors': errors.get(name, 0),
+                'window': len(ordered),
+                'p50_ms': round(_percentile(ordered, 50) / 1e6, 3),
+                'p95_ms': round(_percentile(ordered, 95) / 1e6, 3),
+                'max_ms': round(ordered[-1] / 1e6, 3),
+            }
+            for name, ordered in sorted(windows.items())
+        }
+
+
+_tracer = Tracer(
+    window=int(os.environ.get(TRACE_WINDOW_ENV, DEFAULT_WINDOW)),
+    export_path=os.environ.get(TRACE_FILE_ENV) or None,
+)
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+def _child(name: str, start_ns: int, attributes: dict[str, Any]) -> Span:
+    parent = _current.get()
+    trace_id = parent[0] if parent else _new_id(16)
+    return Span(name, trace_id, _new_id(8), parent[1] if parent else None,
+                start_ns, attributes=attributes)
+
+
+def _finish(finished: Span) -> None:
+    collector = _collector.get()
+    if collector is not None:
+        collector.append(finished)
+    else:
+        _tracer.record(finished)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[dict[str, Any]]:
+    """Time the enclosed block as a child of the current span.
+
+    Yields the span's attribute dict so the block can annotate the outcome
+    (e.g. ``attrs['cached'] = True``). Exceptions are recorded and re-raised.
+    """
+    current = _child(name, time.time_ns(), attributes)
+    token = _current.set((current.trace_id, current.span_id))
+    start = time.perf_counter_ns()
+    try:
+        yield current.attributes
+    except BaseException as e:
+        current.error = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        current.duration_ns = time.perf_counter_ns() - start
+        _current.reset(token)
+        _finish(current)
+
+
+def record_interval(name: str, start_ns: int, duration_ns: int, **attributes: Any) -> None:
+    """Record an already-measured interval as a child of the current span."""
+    finished = _child(name, start_ns, attributes)
+    finished.duration_ns = duration_ns
+    _finish(finished)
+
+
+def current_parent() -> tuple[str, str] | None:
+    """(trace id, span id) to hand to work running in another process."""
+    return _current.get()
+
+
+def in_context(func: Callable, *args: Any) -> Callable[[], Any]:
+    """Bind ``func`` to the current context, e.g. for ``run_in_executor``.
+
+    Executor threads do not inherit context variables, so without this
+    their spans would start new traces.
+    """
+    return functools.partial(contextvars.copy_context().run, func, *args)
+
+
+@contextmanager
+def collect(parent: tuple[str, str] | None) -> Iterator[list[Span]]:
+    """Gather the spans finished in this block, parented to ``parent``.
+
+    Used in render workers; the spans travel back with the job result and
+    are recorded by the parent process with ``record_spans``.
+    """
+    spans: list[Span] = []
+    collector_token = _collector.set(spans)
+    parent_token = _current.set(parent)
+    try:
+        yield spans
+    finally:
+        _current.reset(parent_token)
+        _collector.reset(collector_token)
+
+
+def record_spans(spans: Iterable[Span]) -> None:
+    """Record spans finished elsewhere (e.g. returned by a render worker)."""
+    for finished in spans:
+        _tracer.record(finished)
+
+
+def increment(name: str, amount: int = 1) -> None:
+    """Bump an event counter, e.g. ``commit_cache.hit``."""
+    _tracer.increment(name, amount)
+
+
+def counters() -> dict[str, int]:
+    return _tracer.counters()
+
+
+def latency_stats() -> dict[str, dict[str, float]]:
+    """Rolling latency percentiles per span name (see ``Tracer.latency_stats``)."""
+    return _tracer.latency_stats()
+
+
+def export_path() -> str | None:
+    return _tracer.export_path
+
+
+def summarize_file(path: str, window: int | None = None) -> dict[str, dict[str, float]]:
+    """Latency percentiles per span name over a JSONL trace export.
+
+    Args:
+        path: File written via ``GIT_COMMIT_VIZ_TRACE_FILE``
+        window: Only use each name's last ``window`` spans (default: all)
+    """
+    import json
+    tracer = Tracer(window=window or sys.maxsize)
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            start = record['start_time_unix_nano']
+            tracer.record(Span(
+                record['name'], record['trace_id'], record['span_id'],
+                record['parent_span_id'] or None, start,
+                record['end_time_unix_nano'] - start,
+                error=record['status'].get('message'),
+            ))
+    return tracer.latency_stats()
+
+
+def main() -> int:
+    """Print p50/p95 latencies per span name from a trace export."""
+    parser = argparse.ArgumentParser(description='Summarize a JSONL span export')
+    parser.add_argument('trace_file', help=f'File written via {TRACE_FILE_ENV}')
+    parser.add_argument('--window', type=int, help='Only use the last N spans per name')
+    args = parser.parse_args()
+
+    stats = summarize_file(args.trace_file, args.window)
+    print(f"{'span':<28} {'count':>7} {'errors':>7} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}")
+    for name, row in stats.items():
+        print(f"{name:<28} {row['count']:>7} {row['errors']:>7} {row['p50_ms']:>10.2f} "
+              f"{row['p95_ms']:>10.2f} {row['max_ms']:>10.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Cold-start import-time budget for the CLIs and the MCP server.
+
+Each entry point is imported in a fresh interpreter under
+``python -X importtime``; the median cumulative import time over several
+runs is compared against its budget. Entry points must also not pull in
+the heavy rendering/data stack at import time. Exits non-zero on any
+regression.
+
+Usage (from ``utils/``)::
+
+    python -m benchmarks.import_time [--runs 5] [--scale 1.5]
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+UTILS_DIR = Path(__file__).resolve().parent.parent
+
+# Median cumulative import time budget per entry point, in milliseconds
+IMPORT_BUDGETS_MS = {
+    'plotting.plot_repo': 30,
+    'plotting.plot_dashboard': 30,
+    'plotting.plot_commits_by_hour': 25,
+    'plotting.plot_pie_day': 25,
+    'plotting.plot_pie_month': 25,
+    'plotting.plot_avg_commits': 25,
+    'plotting.plot_timeseries': 25,
+    'plotting.generate_wordcloud': 25,
+    'plotting.plot_batch': 30,
+    'plotting.watch_charts': 30,
+    'plotting.optimize_images': 30,
+    # Data modules built on NumPy arrays; dominated by importing NumPy
+    'analysis.commit_snapshot': 150,
+    'analysis.commit_messages': 150,
+    # Dominated by importing the mcp SDK itself
+    'mcp_server': 600,
+}
+# Modules that must only be imported on first render/ingest
+LAZY_MODULES = ('matplotlib', 'numpy', 'wordcloud', 'PIL')
+# Entry points allowed to import some of LAZY_MODULES eagerly
+EAGER_ALLOWED = {
+    'analysis.commit_snapshot': {'numpy'},
+    'analysis.commit_messages': {'numpy'},
+}
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def measure_import(module: str) -> tuple[float, set[str]]:
+    """Import ``module`` in a fresh interpreter.
+
+    Returns:
+        Tuple of (cumulative import time in ms, top-level packages imported)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=UTILS_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = 0
+    imported = set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        imported.add(name.split('.')[0])
+        if name == module:
+            cumulative_us = int(match.group(2))
+    return cumulative_us / 1000, imported
+
+
+def main() -> int:
+    """Measure every entry point and report budget violations."""
+    parser = argparse.ArgumentParser(description='Check cold-start import-time budgets')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per entry point (median is used)')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Multiply every budget, e.g. for slow CI machines')
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'entry point':<34} {'median ms':>10} {'budget ms':>10}")
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        samples = []
+        leaked: set[str] = set()
+        for _ in range(args.runs):
+            elapsed_ms, imported = measure_import(module)
+            samples.append(elapsed_ms)
+            leaked |= imported.intersection(LAZY_MODULES) - EAGER_ALLOWED.get(module, set())
+        median = statistics.median(samples)
+        limit = budget * args.scale
+        print(f"{module:<34} {median:>10.1f} {limit:>10.0f}")
+        if median > limit:
+            failures.append(f"{module}: {median:.1f} ms exceeds budget of {limit:.0f} ms")
+        if leaked:
+            failures.append(f"{module}: eagerly imports {', '.join(sorted(leaked))}")
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Compare the ``git log`` and native object-database ingestion backends.
+
+Both backends ingest the full history of each repository several times;
+the median wall time and throughput are reported, and the two commit
+tables are checked for identical records. Exits non-zero if the backends
+disagree.
+
+Usage (from ``utils/``)::
+
+    python -m benchmarks.ingest_backends /path/to/repo [...] [--runs 3] [--ref HEAD]
+"""
+import argparse
+import statistics
+import sys
+import time
+from collections.abc import Callable
+
+from analysis.commit_ingest import CommitTable, ingest_commits
+from analysis.git_objects import NativeReadError, read_commit_table
+
+
+def _records(table: CommitTable) -> list[tuple]:
+    authors = [table.authors[i] for i in table.author_ids]
+    return sorted(zip(table.shas.tolist(), table.timestamps.tolist(),
+                      table.tz_offsets.tolist(), authors))
+
+
+def _time_runs(ingest: Callable[[], CommitTable], runs: int) -> tuple[float, CommitTable]:
+    samples = []
+    table = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        table = ingest()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), table
+
+
+def main() -> int:
+    """Benchmark both backends on every repository given."""
+    parser = argparse.ArgumentParser(description='Benchmark git log vs native commit ingestion')
+    parser.add_argument('repos', nargs='+', help='Repository paths')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per backend (median is used)')
+    parser.add_argument('--ref', default='HEAD', help='Revision to ingest (default: HEAD)')
+    args = parser.parse_args()
+
+    mismatches = []
+    print(f"{'repository':<40} {'commits':>9} {'git s':>8} {'native s':>9} {'speedup':>8}")
+    for repo in args.repos:
+        git_seconds, git_table = _time_runs(
+            lambda: ingest_commits(repo, [args.ref], backend='git'), args.runs
+        )
+        try:
+            native_seconds, native_table = _time_runs(
+                lambda: read_commit_table(repo, [args.ref]), args.runs
+            )
+        except NativeReadError as e:
+            print(f"{repo:<40} {len(git_table):>9} {git_seconds:>8.3f} {'unsupported':>9}  ({e})")
+            continue
+
+        print(f"{repo:<40} {len(git_table):>9} {git_seconds:>8.3f} {native_seconds:>9.3f} "
+              f"{git_seconds / native_seconds:>7.2f}x")
+        if _records(git_table) != _records(native_table):
+            mismatches.append(repo)
+
+    for repo in mismatches:
+        print(f"FAIL {repo}: native records differ from git log", file=sys.stderr)
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,366 @@
+"""Benchmark every stage of the commit chart pipeline on synthetic histories.
+
+For each history size a synthetic repository is generated (and reused on
+later runs, see ``benchmarks.synthetic_repo``), then each stage is timed
+over several runs and its median recorded:
+
+- ``shell.*``: ``commit_history.sh`` writing ``logs.txt`` and the awk
+  scripts counting it, as the original pipeline does;
+- ``python.*``: their replacements, ``git log`` and native ingestion,
+  vectorized aggregation, and loading through the commit cache (cold and
+  warm);
+- ``read_count_file``, ``chart.bar``/``chart.pie``
+  (``create_*_chart`` + ``save_chart``) and ``wordcloud``;
+- ``mcp.cold``/``mcp.warm``: the MCP server's ``_generate_chart`` end to
+  end (ingest, aggregate and render through the warm pool; then a render
+  cache hit).
+
+Results are written as JSON and compared with a baseline: a stage
+regresses when its median exceeds ``baseline * tolerance + slack``.
+Exits non-zero on any regression; ``--update-baseline`` records the
+current run as the new baseline instead. Timings only mean something on
+the machine they were recorded on, so no baseline is shipped: it lives in
+the work directory, and when its recorded environment (Python, CPU count,
+platform, git) differs from the current one the comparison is reported
+but does not fail the run.
+
+Usage (from ``utils/``)::
+
+    python -m benchmarks.pipeline                          # 1k, 10k, 100k
+    python -m benchmarks.pipeline --sizes 1000 1000000 --runs 1
+    python -m benchmarks.pipeline --stages python mcp --update-baseline
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+
+from analysis.repo_utils import CACHE_DIR_ENV
+from .synthetic_repo import create_synthetic_repo
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent / 'analysis'
+DEFAULT_WORK_DIR = Path(tempfile.gettempdir()) / 'git-commit-viz-bench'
+BASELINE_NAME = 'pipeline_baseline.json'
+# Baseline environment fields that must match for regressions to fail the run
+ENVIRONMENT_KEYS = ('python', 'cpus', 'platform', 'git')
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+STAGE_GROUPS = ('shell', 'python', 'charts', 'wordcloud', 'mcp')
+# A stage regresses above baseline * DEFAULT_TOLERANCE + DEFAULT_SLACK_SECONDS;
+# the slack keeps millisecond-scale stages from failing on timer noise
+DEFAULT_TOLERANCE = 1.5
+DEFAULT_SLACK_SECONDS = 0.05
+
+SHELL_SCRIPTS = {
+    'shell.hour': 'commits_by_hour.sh',
+    'shell.day_of_week': 'commits_by_day_of_week.sh',
+    'shell.month': 'commits_by_month.sh',
+    'shell.distribution': 'commit_distribution.sh',
+}
+
+
+class SkipStage(Exception):
+    """A stage cannot run in this environment (e.g. optional dependency missing)."""
+
+
+def _median_seconds(stage: Callable[[], object], runs: int,
+                    setup: Callable[[], object] | None = None) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        stage()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _run_script(repo: Path, script: str) -> None:
+    subprocess.run([str(SCRIPT_DIR / script)], cwd=repo, check=True, stdout=subprocess.DEVNULL)
+
+
+def _clear_cache(cache_dir: Path) -> None:
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def _shell_stages(repo: Path) -> dict[str, tuple]:
+    stages = {'shell.git_log': (lambda: _run_script(repo, 'commit_history.sh'), None)}
+    for stage, script in SHELL_SCRIPTS.items():
+        stages[stage] = (lambda script=script: _run_script(repo, script), None)
+    return stages
+
+
+def _python_stages(repo: Path, cache_dir: Path) -> dict[str, tuple]:
+    from analysis.commit_aggregate import aggregate_commits
+    from analysis.commit_cache import load_commit_table
+    from analysis.commit_ingest import ingest_commits
+    from analysis.git_objects import NativeReadError, read_commit_table
+
+    table = ingest_commits(str(repo))
+
+    def native() -> None:
+        try:
+            read_commit_table(str(repo))
+        except NativeReadError as e:
+            raise SkipStage(str(e)) from e
+
+    return {
+        'python.ingest': (lambda: ingest_commits(str(repo)), None),
+        'python.ingest_native': (native, None),
+        'python.aggregate': (lambda: aggregate_commits(table), None),
+        'python.cache_cold': (lambda: load_commit_table(str(repo)),
+                              lambda: _clear_cache(cache_dir)),
+        'python.cache_warm': (lambda: load_commit_table(str(repo)), None),
+    }
+
+
+def _chart_stages(repo: Path, output_dir: Path) -> dict[str, tuple]:
+    from plotting.constants import FIGURE_HEIGHT, FIGURE_WIDTH_STANDARD
+    from plotting.plot_pie_day import DAY_LABELS
+    from plotting.plot_utils import (
+        create_bar_chart, create_pie_chart, get_pyplot, read_count_file, save_chart
+    )
+
+    counts_file = repo / 'commit_counts.txt'
+    if not counts_file.exists():
+        _run_script(repo, 'commit_history.sh')
+        _run_script(repo, 'commits_by_hour.sh')
+        _run_script(repo, 'commits_by_day_of_week.sh')
+    hours = read_count_file(str(counts_file), 24, 0, 23)
+    days = read_count_file(str(repo / 'commit_counts_day.txt'), 7, 0, 6)
+    figsize = (FIGURE_WIDTH_STANDARD, FIGURE_HEIGHT)
+    # Keep the one-off pyplot import out of the first timed run
+    get_pyplot()
+
+    def bar() -> None:
+        create_bar_chart([f"{h:02d}" for h in range(24)], hours, 'Hour of Day (0-23)',
+                         'Number of Commits', 'Commits by Hour', figsize)
+        save_chart(str(output_dir / 'bench_bar.png'))
+
+    def pie() -> None:
+        create_pie_chart(days, DAY_LABELS, 'Commits by Day of Week', figsize)
+        save_chart(str(output_dir / 'bench_pie.png'))
+
+    return {
+        'read_count_file': (lambda: read_count_file(str(counts_file), 24, 0, 23), None),
+        'chart.bar': (bar, None),
+        'chart.pie': (pie, None),
+    }
+
+
+def _wordcloud_stages(repo: Path, output_dir: Path) -> dict[str, tuple]:
+    from analysis.commit_ingest import iter_commit_messages
+    from plotting.generate_wordcloud import generate_wordcloud
+
+    def wordcloud() -> None:
+        try:
+            generate_wordcloud(output_file=str(output_dir / 'bench_wordcloud.png'),
+                               messages=iter_commit_messages(str(repo)))
+        except ImportError as e:
+            raise SkipStage(f"wordcloud is not installed ({e})") from e
+
+    return {'wordcloud': (wordcloud, None)}
+
+
+def _mcp_stages(repo: Path, cache_dir: Path) -> dict[str, tuple]:
+    import mcp_server
+
+    # FastMCP installs an INFO-level root handler on import; per-chart log
+    # lines would drown the report
+    logging.getLogger().setLevel(logging.WARNING)
+
+    def generate() -> None:
+        previous = os.getcwd()
+        os.chdir(repo)
+        try:
+            # Inline: render workers do not share this cwd, so files they
+            # wrote would land elsewhere
+            result = asyncio.run(mcp_server._generate_chart(
+                chart_type='commits_by_hour', render_job='hour_bar',
+                title_template='Git Commits by Hour of Day for {repo_name}', inline=True
+            ))
+        finally:
+            os.chdir(previous)
+        if isinstance(result, str):
+            raise RuntimeError(result)
+
+    # Start the render workers before timing anything
+    generate()
+    return {
+        'mcp.cold': (generate, lambda: _clear_cache(cache_dir)),
+        'mcp.warm': (generate, None),
+    }
+
+
+def run_size(commits: int, groups: list[str], runs: int, work_dir: Path, seed: int) -> dict:
+    """Benchmark the selected stage groups on a ``commits``-long history.
+
+    Returns:
+        ``{'commits', 'generate_seconds', 'stages': {stage: {...}}}`` where
+        each stage has ``median`` and ``runs`` (seconds) or ``skipped``
+    """
+    repo_dir = work_dir / 'repos' / f'synthetic-{commits}-s{seed}'
+    start = time.perf_counter()
+    repo = create_synthetic_repo(repo_dir, commits, seed)
+    generate_seconds = time.perf_counter() - start
+    cache_dir = Path(os.environ[CACHE_DIR_ENV])
+    output_dir = work_dir / 'charts'
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    builders = {
+        'shell': lambda: _shell_stages(repo),
+        'python': lambda: _python_stages(repo, cache_dir),
+        'charts': lambda: _chart_stages(repo, output_dir),
+        'wordcloud': lambda: _wordcloud_stages(repo, output_dir),
+        'mcp': lambda: _mcp_stages(repo, cache_dir),
+    }
+    results = {}
+    for group in groups:
+        for stage, (fn, setup) in builders[group]().items():
+            try:
+                samples = _median_seconds(fn, runs, setup)
+            except SkipStage as e:
+                results[stage] = {'skipped': str(e)}
+                continue
+            results[stage] = {'median': statistics.median(samples), 'runs': samples}
+            print(f"  {commits:>9} {stage:<22} {results[stage]['median'] * 1000:10.1f} ms",
+                  flush=True)
+    return {'commits': commits, 'generate_seconds': generate_seconds, 'stages': results}
+
+
+def compare(results: dict, baseline: dict, tolerance: float, slack: float) -> list[str]:
+    """Return a message for every stage slower than its baseline threshold."""
+    regressions = []
+    for size, measured in results['sizes'].items():
+        expected = baseline.get('sizes', {}).get(size, {})
+        for stage, timing in measured['stages'].items():
+            if 'median' not in timing or stage not in expected:
+                continue
+            limit = expected[stage] * tolerance + slack
+            if timing['median'] > limit:
+                regressions.append(
+                    f"{stage} @ {size} commits: {timing['median'] * 1000:.1f} ms exceeds "
+                    f"{limit * 1000:.1f} ms (baseline {expected[stage] * 1000:.1f} ms)"
+                )
+    return regressions
+
+
+def environment_differences(baseline: dict, current: dict) -> list[str]:
+    """Describe each ``ENVIRONMENT_KEYS`` field where the baseline was recorded elsewhere."""
+    recorded = baseline.get('environment', {})
+    return [
+        f"{key}: baseline {recorded.get(key)!r}, now {current.get(key)!r}"
+        for key in ENVIRONMENT_KEYS if recorded.get(key) != current.get(key)
+    ]
+
+
+def as_baseline(results: dict) -> dict:
+    """Reduce a results document to per-size stage medians."""
+    return {
+        'environment': results['environment'],
+        'sizes': {
+            size: {stage: round(timing['median'], 6)
+                   for stage, timing in measured['stages'].items() if 'median' in timing}
+            for size, measured in results['sizes'].items()
+        },
+    }
+
+
+def _environment() -> dict:
+    git = subprocess.run(['git', '--version'], capture_output=True, text=True).stdout.strip()
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'git': git,
+    }
+
+
+def main() -> int:
+    """Run the benchmark suite and check it against the baseline."""
+    parser = argparse.ArgumentParser(description='Benchmark the commit chart pipeline')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='History lengths to benchmark (default: 1000 10000 100000)')
+    parser.add_argument('--stages', nargs='+', choices=STAGE_GROUPS, default=list(STAGE_GROUPS),
+                        help='Stage groups to run (default: all)')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per stage (median is used)')
+    parser.add_argument('--seed', type=int, default=1, help='Synthetic history seed')
+    parser.add_argument('--work-dir', type=Path, default=DEFAULT_WORK_DIR,
+                        help=f'Synthetic repositories and caches (default: {DEFAULT_WORK_DIR})')
+    parser.add_argument('--output', type=Path,
+                        help='Results JSON (default: <work-dir>/results/pipeline-<time>.json)')
+    parser.add_argument('--baseline', type=Path,
+                        help=f'Baseline JSON (default: <work-dir>/{BASELINE_NAME})')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown factor over the baseline')
+    parser.add_argument('--slack', type=float, default=DEFAULT_SLACK_SECONDS,
+                        help='Allowed absolute slowdown in seconds on top of --tolerance')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Write this run as the new baseline instead of comparing')
+    parser.add_argument('--ignore-environment', action='store_true',
+                        help='Fail on regressions even if the baseline was recorded '
+                             'in a different environment')
+    args = parser.parse_args()
+    baseline_path = args.baseline or args.work_dir / BASELINE_NAME
+
+    # Isolate the commit and render caches from the user's, before any
+    # module reads the cache location
+    os.environ[CACHE_DIR_ENV] = str(args.work_dir / 'cache')
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+
+    started = datetime.now(timezone.utc)
+    results = {'started': started.isoformat(), 'environment': _environment(), 'sizes': {}}
+    print(f"  {'commits':>9} {'stage':<22} {'median':>13}")
+    try:
+        for commits in args.sizes:
+            results['sizes'][str(commits)] = run_size(
+                commits, args.stages, args.runs, args.work_dir, args.seed
+            )
+    finally:
+        if 'mcp_server' in sys.modules:
+            sys.modules['mcp_server']._render_pool.shutdown()
+
+    output = args.output or (
+        args.work_dir / 'results' / f"pipeline-{started.strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    regressions: list[str] = []
+    differences: list[str] = []
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(as_baseline(results), indent=2) + '\n')
+        print(f"Baseline written to {baseline_path}")
+    elif not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; record one with --update-baseline")
+    else:
+        baseline = json.loads(baseline_path.read_text())
+        regressions = compare(results, baseline, args.tolerance, args.slack)
+        differences = environment_differences(baseline, results['environment'])
+    results['regressions'] = regressions
+    results['environment_differences'] = differences
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + '\n')
+    print(f"Results written to {output}")
+
+    report_only = bool(differences) and not args.ignore_environment
+    if report_only:
+        print(f"Baseline {baseline_path} was recorded in another environment; "
+              "reporting regressions without failing:", file=sys.stderr)
+        for difference in differences:
+            print(f"  {difference}", file=sys.stderr)
+    for message in regressions:
+        print(f"{'WARN' if report_only else 'FAIL'} {message}", file=sys.stderr)
+    return 1 if regressions and not report_only else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
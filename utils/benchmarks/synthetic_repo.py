@@ -0,0 +1,141 @@
+"""Generate reproducible synthetic git repositories for benchmarking.
+
+Histories are written with a single ``git fast-import`` stream, so even a
+million commits take about a minute rather than hours of ``git commit``.
+Commit times follow a weekday/office-hours profile over a span that grows
+with the history, authors have fixed time zones, and messages are drawn
+from a small vocabulary so the word cloud has realistic repetition. The
+same size and seed always produce the same history (and commit SHAs).
+
+Each repository gets an ``origin`` remote so ``get_repo_name.sh`` (and the
+MCP server) can name it. The ``logs.txt`` input of the shell scripts is
+produced from it by ``analysis/commit_history.sh`` as usual.
+
+Usage (from ``utils/``)::
+
+    python -m benchmarks.synthetic_repo /tmp/bench-repo --commits 100000 [--seed 1]
+"""
+import argparse
+import logging
+import random
+import subprocess
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Written into .git once fast-import has finished, so half-built
+# repositories from an interrupted run are rebuilt rather than reused
+COMPLETE_MARKER = 'bench-complete'
+START_TIMESTAMP = 1_420_070_400  # 2015-01-01T00:00:00Z
+COMMITS_PER_DAY = 40
+MIN_SPAN_DAYS = 30
+AUTHORS = 50
+FILES = 200
+
+_TZ_OFFSETS = ('+0000', '+0100', '+0200', '+0530', '+0800', '-0300', '-0500', '-0800')
+# Relative commit frequency per local hour, peaking in office hours
+_HOUR_WEIGHTS = (1, 1, 1, 1, 1, 1, 2, 4, 8, 12, 14, 13, 9, 12, 14, 13, 11, 9, 6, 5, 4, 3, 2, 1)
+_VERBS = ('Fix', 'Add', 'Update', 'Refactor', 'Remove', 'Improve', 'Document', 'Test', 'Rename')
+_NOUNS = ('parser', 'cache', 'chart', 'config', 'tests', 'docs', 'logging', 'server',
+          'client', 'build', 'index', 'schema', 'renderer', 'scheduler', 'exporter')
+_DETAILS = ('edge case', 'race condition', 'memory usage', 'error handling', 'typing',
+            'performance', 'retry logic', 'timeouts', 'naming', 'dependencies')
+
+
+def _encode_tz(offset: str) -> int:
+    sign = -1 if offset[0] == '-' else 1
+    return sign * (int(offset[1:3]) * 3600 + int(offset[3:5]) * 60)
+
+
+def _commit_times(commits: int, rng: random.Random) -> list[tuple[int, int]]:
+    """Sorted (UTC timestamp, author index) pairs following the hour profile."""
+    span_days = max(MIN_SPAN_DAYS, commits // COMMITS_PER_DAY)
+    hours = rng.choices(range(24), weights=_HOUR_WEIGHTS, k=commits)
+    times = []
+    for hour in hours:
+        author = rng.randrange(AUTHORS)
+        day = rng.randrange(span_days)
+        # Weekend days are mostly moved onto the following Monday
+        if (day + 3) % 7 in (5, 6) and rng.random() < 0.8:
+            day += 7 - (day + 3) % 7
+        local = START_TIMESTAMP + day * 86400 + hour * 3600 + rng.randrange(3600)
+        times.append((local - _encode_tz(_TZ_OFFSETS[author % len(_TZ_OFFSETS)]), author))
+    times.sort()
+    return times
+
+
+def _message(rng: random.Random) -> str:
+    subject = f"{rng.choice(_VERBS)} {rng.choice(_NOUNS)} {rng.choice(_DETAILS)}"
+    if rng.random() < 0.3:
+        return f"{subject}\n\nAlso touches the {rng.choice(_NOUNS)} {rng.choice(_DETAILS)}.\n"
+    return subject + '\n'
+
+
+def fast_import_stream(commits: int, seed: int = 1) -> Iterator[bytes]:
+    """Yield a ``git fast-import`` stream for a synthetic linear history."""
+    rng = random.Random(seed)
+    for n, (timestamp, author) in enumerate(_commit_times(commits, rng), start=1):
+        ident = (f"Author {author} <author{author}@example.com> "
+                 f"{timestamp} {_TZ_OFFSETS[author % len(_TZ_OFFSETS)]}")
+        message = _message(rng).encode()
+        content = f"{n}\n".encode()
+        yield b''.join([
+            b'commit refs/heads/main\n',
+            f'author {ident}\ncommitter {ident}\n'.encode(),
+            b'data %d\n' % len(message), message,
+            f'M 644 inline src/module_{rng.randrange(FILES)}.py\n'.encode(),
+            b'data %d\n' % len(content), content, b'\n',
+        ])
+
+
+def create_synthetic_repo(path: Path, commits: int, seed: int = 1) -> Path:
+    """Create (or reuse) a synthetic repository with ``commits`` commits.
+
+    Args:
+        path: Directory for the repository; reused if a previous run completed it
+        commits: Number of commits in the linear history
+        seed: Random seed (same size and seed give the same history)
+
+    Returns:
+        The repository path
+
+    Raises:
+        subprocess.CalledProcessError: If git fails
+    """
+    marker = path / '.git' / COMPLETE_MARKER
+    if marker.exists():
+        return path
+    if (path / '.git').exists():
+        raise FileExistsError(f"{path} holds an incomplete repository; remove it first")
+    path.mkdir(parents=True, exist_ok=True)
+    subprocess.run(['git', 'init', '-q', '-b', 'main', str(path)], check=True)
+    subprocess.run(['git', 'remote', 'add', 'origin',
+                    f'https://example.com/bench/synthetic-{commits}'], cwd=path, check=True)
+    with subprocess.Popen(['git', 'fast-import', '--quiet'], cwd=path,
+                          stdin=subprocess.PIPE) as proc:
+        for chunk in fast_import_stream(commits, seed):
+            proc.stdin.write(chunk)
+        proc.stdin.close()
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+    marker.touch()
+    logger.info("Created synthetic repository %s with %d commits", path, commits)
+    return path
+
+
+def main() -> int:
+    """Create one synthetic repository."""
+    parser = argparse.ArgumentParser(description='Create a synthetic git repository')
+    parser.add_argument('path', type=Path, help='Directory for the repository')
+    parser.add_argument('--commits', type=int, default=10_000, help='History length')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    args = parser.parse_args()
+    create_synthetic_repo(args.path, args.commits, args.seed)
+    print(f"{args.path}: {args.commits} commits")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
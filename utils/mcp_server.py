@@ -1,99 +1,656 @@
 """MCP server for generating git commit visualization charts.
 
-Provides tools for generating bar and pie charts showing commit distributions
-by hour, day of week, and month for the current git repository.
+Provides tools for generating bar and pie charts, a multi-chart dashboard,
+aggregate counts, author profiles and commit message search for the current
+git repository. Settings are read from the environment (see README.md).
 """
-import subprocess
-from mcp.server.fastmcp import FastMCP
-from repo_utils import get_repo_name
+import asyncio
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Awaitable, Callable
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from mcp.server.fastmcp import FastMCP, Image
+from analysis.repo_utils import get_cache_dir, get_repo_name, resolve_tip
+from analysis.tracing import (
+    counters, export_path, in_context, increment, latency_stats, record_interval, span
+)
+from plotting.constants import SAVE_DPI_HIGH
+from plotting.render_cache import DEFAULT_MAX_AGE_SECONDS, RenderCache, write_file
+from plotting.render_pool import (
+    CHART_FIELDS, DEFAULT_MAX_JOBS_PER_WORKER, DEFAULT_POOL_SIZE, RenderPool
+)
+
+if TYPE_CHECKING:
+    from analysis.commit_aggregate import CommitAggregates
+    from analysis.commit_ingest import CommitTable
+    from analysis.commit_sketch import CommitSketch
+    from analysis.commit_watch import RepoWatcher
+
+MAX_CONCURRENT_CHARTS = int(os.environ.get('GIT_COMMIT_CHARTS_MAX_CONCURRENCY', '4'))
+CHART_TIMEOUT_SECONDS = float(os.environ.get('GIT_COMMIT_CHARTS_TIMEOUT', '120'))
+RENDER_CACHE_MAX_BYTES = int(os.environ.get('GIT_COMMIT_CHARTS_RENDER_CACHE_MB', '256')) * 1024 * 1024
+RENDER_CACHE_MAX_AGE_SECONDS = float(
+    os.environ.get('GIT_COMMIT_CHARTS_RENDER_CACHE_TTL', str(DEFAULT_MAX_AGE_SECONDS))
+)
+RENDER_WORKERS = int(os.environ.get('GIT_COMMIT_CHARTS_RENDER_WORKERS', str(DEFAULT_POOL_SIZE)))
+RENDER_MAX_JOBS = int(
+    os.environ.get('GIT_COMMIT_CHARTS_RENDER_MAX_JOBS', str(DEFAULT_MAX_JOBS_PER_WORKER))
+)
+WATCH_REPO = os.environ.get('GIT_COMMIT_CHARTS_WATCH', '') not in ('', '0')
 
 mcp = FastMCP("git_commit_charts")
 
+_chart_slots = asyncio.Semaphore(MAX_CONCURRENT_CHARTS)
+# Two data jobs per chart (repo name + history) may run side by side
+_data_executor = ThreadPoolExecutor(
+    max_workers=2 * MAX_CONCURRENT_CHARTS, thread_name_prefix='chart-data'
+)
+_render_pool = RenderPool(size=RENDER_WORKERS, max_jobs_per_worker=RENDER_MAX_JOBS)
+_render_cache = RenderCache(
+    get_cache_dir() / 'renders',
+    max_bytes=RENDER_CACHE_MAX_BYTES,
+    max_age_seconds=RENDER_CACHE_MAX_AGE_SECONDS,
+)
+# Set by main() when WATCH_REPO is enabled
+_watcher: 'RepoWatcher | None' = None
+# Cache key -> render in progress, joined by identical concurrent requests
+_renders_in_flight: dict[str, asyncio.Task] = {}
+
+
+def _run_data(func: Callable, *args: Any) -> asyncio.Future:
+    """Run blocking git/data work on the data executor, inside the current trace."""
+    return asyncio.get_running_loop().run_in_executor(_data_executor, in_context(func, *args))
+
+
+def _start_watcher() -> None:
+    """Load the history into memory and keep it updated on a background thread."""
+    global _watcher
+    from analysis.commit_watch import RepoWatcher
+    watcher = RepoWatcher()
+    watcher.start()
+    _watcher = watcher
+
+
+def _load_table(filters: dict[str, str]) -> 'CommitTable':
+    """Load (or refresh) the cached history, restricted to ``filters``.
+
+    NumPy and the analysis modules are imported here, on the first chart,
+    so that starting the server and listing tools stays cheap.
+
+    Args:
+        filters: Non-empty ``CommitFilter`` fields (since/until/author/path)
+    """
+    if not filters:
+        if _watcher is not None:
+            return _watcher.history.table
+        from analysis.commit_cache import load_commit_table
+        return load_commit_table()
+    from analysis.commit_query import CommitFilter, load_commit_index
+    return load_commit_index().filter(CommitFilter(**filters))
+
+
+def _load_aggregates(filters: dict[str, str], approximate: bool = False) -> 'CommitAggregates':
+    """Load the (filtered) cached history and aggregate it.
+
+    With ``approximate`` the history is streamed into constant-memory
+    sketches instead (``analysis.commit_sketch``).
+    """
+    if _watcher is not None and not filters:
+        return _watcher.aggregates
+    if approximate:
+        return _sketch_history(filters).to_aggregates()
+    from analysis.commit_aggregate import aggregate_commits
+    table = _load_table(filters)
+    with span('aggregate', commits=len(table)):
+        return aggregate_commits(table)
+
+
+def _sketch_history(filters: dict[str, str]) -> 'CommitSketch':
+    if filters:
+        raise ValueError("approximate mode does not support filters")
+    from analysis.commit_sketch import sketch_commits
+    with span('sketch'):
+        return sketch_commits()
+
+
+def _chart_version(render_job: str) -> str:
+    """Digest of the in-memory counts a chart draws (watch mode only)."""
+    aggregates = _watcher.aggregates
+    digest = hashlib.sha1(render_job.encode())
+    for field in CHART_FIELDS[render_job]:
+        digest.update(getattr(aggregates, field).tobytes())
+    return f'counts:{digest.hexdigest()}'
+
+
+def _collect_filters(**values: str | None) -> dict[str, str]:
+    """Keep the filter arguments that were actually given."""
+    return {name: value for name, value in values.items() if value}
+
+
+def _describe_filters(filters: dict[str, str]) -> str:
+    return ', '.join(f"{name} {value}" for name, value in filters.items())
+
+
+def _render_once(cache_key: str, render: Callable[[], Awaitable[bytes]]) -> Awaitable[bytes]:
+    """Run ``render`` for ``cache_key``, or join the identical render already running.
+
+    The render is shielded, so a caller that times out does not cancel it
+    for the others.
+    """
+    task = _renders_in_flight.get(cache_key)
+    if task is None:
+        task = asyncio.ensure_future(render())
+        _renders_in_flight[cache_key] = task
+
+        def done(task: asyncio.Task) -> None:
+            del _renders_in_flight[cache_key]
+            # Retrieve the outcome even if every caller has given up
+            if not task.cancelled():
+                task.exception()
+        task.add_done_callback(done)
+    else:
+        increment('mcp.render_coalesced')
+    return asyncio.shield(task)
+
+
+async def _render_chart(
+    cache_key: str,
+    render_job: str,
+    title: str,
+    filters: dict[str, str],
+    approximate: bool
+) -> bytes:
+    """Aggregate, render into memory and store the PNG under ``cache_key``."""
+    with span('mcp.load_aggregates'):
+        aggregates = await _run_data(_load_aggregates, filters, approximate)
+    with span('mcp.render', job=render_job):
+        png = await asyncio.wrap_future(_render_pool.submit_png(
+            render_job, title=title, aggregates=aggregates
+        ))
+    with span('mcp.cache_store'):
+        await _run_data(_render_cache.put_bytes, cache_key, png)
+    return png
 
-def _generate_chart(
+
+async def _generate_chart(
     chart_type: str,
-    data_script: str,
-    plot_script: str,
-    title_template: str
-) -> str:
+    render_job: str,
+    title_template: str,
+    since: str | None = None,
+    until: str | None = None,
+    author: str | None = None,
+    path: str | None = None,
+    inline: bool = False,
+    approximate: bool = False
+) -> str | Image:
     """
     Common helper for generating charts.
 
     Args:
         chart_type: Type of chart (e.g., "hour bar chart", "day pie chart")
-        data_script: Shell script to collect data
-        plot_script: Python script to generate the plot
+        render_job: ``render_pool`` job name (e.g. "hour_bar", "day_pie")
         title_template: Title template with {repo_name} placeholder
+        since: Only count commits on or after this ISO date/datetime
+        until: Only count commits before this ISO datetime (a bare date is inclusive)
+        author: Only count commits whose "Name <email>" contains this text
+        path: Only count commits touching this file or directory
+        inline: Render into memory and return the PNG instead of writing a file
+        approximate: Aggregate via constant-memory sketches; the charted
+            histograms are exact either way, so renders share cache entries
 
     Returns:
-        Success message with output file path or error message
+        The PNG image if ``inline``, else a success message with the output
+        file path; or an error message
     """
     try:
-        repo_name = get_repo_name()
-        if not repo_name:
-            return "Error: Could not determine repository name"
-
-        # Run data collection script
-        subprocess.run([data_script], check=True)
+        with span('mcp.chart', chart=render_job, inline=inline, approximate=approximate) as attrs:
+            queued_ns, queued = time.time_ns(), time.perf_counter_ns()
+            async with _chart_slots, asyncio.timeout(CHART_TIMEOUT_SECONDS):
+                record_interval('mcp.queue', queued_ns, time.perf_counter_ns() - queued)
+                filters = _collect_filters(since=since, until=until, author=author, path=path)
+                attrs['filtered'] = bool(filters)
+                # In watch mode unfiltered charts are versioned by their counts,
+                # so a commit that leaves them unchanged is still a cache hit
+                version = (
+                    partial(_chart_version, render_job)
+                    if _watcher is not None and not filters else resolve_tip
+                )
+                repo_name, tip = await asyncio.gather(
+                    _run_data(get_repo_name),
+                    _run_data(version),
+                )
+                if not repo_name:
+                    attrs['result'] = 'no_repo_name'
+                    return "Error: Could not determine repository name"
 
-        # Generate output filename and title
-        output_file = f"{chart_type.replace(' ', '_')}_{repo_name}.png"
-        title = title_template.format(repo_name=repo_name)
+                # Generate output filename and title
+                output_file = f"{chart_type.replace(' ', '_')}_{repo_name}.png"
+                title = title_template.format(repo_name=repo_name)
+                if filters:
+                    filter_id = hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+                    output_file = output_file.replace('.png', f'_{filter_id[:8]}.png')
+                    title = f"{title} ({_describe_filters(filters)})"
 
-        # Run plotting script
-        subprocess.run(
-            ["/opt/homebrew/bin/python3", plot_script, f"--output={output_file}", f"--title={title}"],
-            check=True
-        )
+                cache_key = RenderCache.make_key(
+                    tip=tip, chart=chart_type, plot=render_job, title=title,
+                    dpi=SAVE_DPI_HIGH, filters=filters
+                )
+                with span('mcp.cache_lookup'):
+                    if inline:
+                        png = await _run_data(_render_cache.get_bytes, cache_key)
+                        cached = png is not None
+                    else:
+                        png = None
+                        cached = await _run_data(_render_cache.fetch, cache_key, output_file)
+                attrs['cached'] = cached
+                if cached and not inline:
+                    return f"{chart_type.capitalize()} generated at {output_file} (cached)"
+                if png is None:
+                    png = await _render_once(cache_key, partial(
+                        _render_chart, cache_key, render_job, title, filters, approximate
+                    ))
+                if inline:
+                    return Image(data=png, format='png')
+                # Renamed into place, so concurrent calls never leave a partial file
+                await _run_data(write_file, output_file, png)
 
         return f"{chart_type.capitalize()} generated at {output_file}"
+    except TimeoutError:
+        return f"Error generating {chart_type}: timed out after {CHART_TIMEOUT_SECONDS:g}s"
     except Exception as e:
         return f"Error generating {chart_type}: {str(e)}"
 
 
-@mcp.tool()
-async def generate_hour_bar_chart() -> str:
+@mcp.tool(structured_output=False)
+async def generate_hour_bar_chart(
+    since: str | None = None,
+    until: str | None = None,
+    author: str | None = None,
+    path: str | None = None,
+    inline: bool = False,
+    approximate: bool = False
+) -> str | Image:
     """Generate a bar chart of commits by hour of day.
 
+    Args:
+        since: Only count commits on or after this ISO date/datetime
+        until: Only count commits up to this ISO date (inclusive) or datetime
+        author: Only count commits whose "Name <email>" contains this text
+        path: Only count commits touching this file or directory
+        inline: Return the PNG image itself instead of writing it to the
+            server's working directory (use this for remote clients)
+        approximate: Stream history through constant-memory sketches instead
+            of loading it (for very large repositories; counts stay exact)
+
     Returns:
-        Success message with output file path or error message.
+        The chart image if inline, else a success message with the output
+        file path; or an error message.
     """
-    return _generate_chart(
+    return await _generate_chart(
         chart_type="commits_by_hour",
-        data_script="./commits_by_hour.sh",
-        plot_script="plot_commits_by_hour.py",
-        title_template="Git Commits by Hour of Day for {repo_name}"
+        render_job="hour_bar",
+        title_template="Git Commits by Hour of Day for {repo_name}",
+        since=since, until=until, author=author, path=path, inline=inline,
+        approximate=approximate
     )
 
 
-@mcp.tool()
-async def generate_day_pie_chart() -> str:
+@mcp.tool(structured_output=False)
+async def generate_day_pie_chart(
+    since: str | None = None,
+    until: str | None = None,
+    author: str | None = None,
+    path: str | None = None,
+    inline: bool = False,
+    approximate: bool = False
+) -> str | Image:
     """Generate a pie chart of commits by day of week.
 
+    Args:
+        since: Only count commits on or after this ISO date/datetime
+        until: Only count commits up to this ISO date (inclusive) or datetime
+        author: Only count commits whose "Name <email>" contains this text
+        path: Only count commits touching this file or directory
+        inline: Return the PNG image itself instead of writing it to the
+            server's working directory (use this for remote clients)
+        approximate: Stream history through constant-memory sketches instead
+            of loading it (for very large repositories; counts stay exact)
+
     Returns:
-        Success message with output file path or error message.
+        The chart image if inline, else a success message with the output
+        file path; or an error message.
     """
-    return _generate_chart(
+    return await _generate_chart(
         chart_type="commits_by_day",
-        data_script="./commits_by_day_of_week.sh",
-        plot_script="plot_pie_day.py",
-        title_template="Commits by Day of Week for {repo_name}"
+        render_job="day_pie",
+        title_template="Commits by Day of Week for {repo_name}",
+        since=since, until=until, author=author, path=path, inline=inline,
+        approximate=approximate
     )
 
 
-@mcp.tool()
-async def generate_month_pie_chart() -> str:
+@mcp.tool(structured_output=False)
+async def generate_month_pie_chart(
+    since: str | None = None,
+    until: str | None = None,
+    author: str | None = None,
+    path: str | None = None,
+    inline: bool = False,
+    approximate: bool = False
+) -> str | Image:
     """Generate a pie chart of commits by month.
 
+    Args:
+        since: Only count commits on or after this ISO date/datetime
+        until: Only count commits up to this ISO date (inclusive) or datetime
+        author: Only count commits whose "Name <email>" contains this text
+        path: Only count commits touching this file or directory
+        inline: Return the PNG image itself instead of writing it to the
+            server's working directory (use this for remote clients)
+        approximate: Stream history through constant-memory sketches instead
+            of loading it (for very large repositories; counts stay exact)
+
     Returns:
-        Success message with output file path or error message.
+        The chart image if inline, else a success message with the output
+        file path; or an error message.
     """
-    return _generate_chart(
+    return await _generate_chart(
         chart_type="commits_by_month",
-        data_script="./commits_by_month.sh",
-        plot_script="plot_pie_month.py",
-        title_template="Commits by Month for {repo_name}"
+        render_job="month_pie",
+        title_template="Commits by Month for {repo_name}",
+        since=since, until=until, author=author, path=path, inline=inline,
+        approximate=approximate
     )
 
+
+@mcp.tool(structured_output=False)
+async def generate_dashboard(
+    charts: list[str] | None = None,
+    panel: bool = False,
+    inline: bool = False,
+    approximate: bool = False,
+    since: str | None = None,
+    until: str | None = None,
+    author: str | None = None,
+    path: str | None = None
+) -> str | list:
+    """Generate several charts from one history load, rendered concurrently.
+
+    Args:
+        charts: Any of "hour_bar", "day_pie", "month_pie", "day_month_pie",
+            "avg_bar", "wordcloud" (default: all six). The word cloud sizes
+            each word by the number of commits using it, or with approximate
+            by the number of times it occurs
+        panel: Also compose the hour, distribution, weekday and month charts
+            into one multi-panel figure
+        inline: Return the PNG images themselves instead of writing files
+            to the server's working directory
+        approximate: Stream history and word counts through constant-memory
+            sketches (no filters, avg_bar or panel); estimates and error
+            bounds are added to the report
+        since: Only count commits on or after this ISO date/datetime
+        until: Only count commits up to this ISO date (inclusive) or datetime
+        author: Only count commits whose "Name <email>" contains this text
+        path: Only count commits touching this file or directory
+
+    Returns:
+        JSON report with commit count, written files, per-chart errors and
+        per-stage timings in ms (ingest, aggregate, words, render and each
+        chart); if inline, preceded by the images of the charts that
+        rendered, which the report names in order under "inline". Or an
+        error message.
+    """
+    from plotting.plot_dashboard import DEFAULT_CHARTS, build_dashboard
+    filters = _collect_filters(since=since, until=until, author=author, path=path)
+    try:
+        with span('mcp.dashboard', inline=inline, approximate=approximate) as attrs:
+            async with _chart_slots, asyncio.timeout(CHART_TIMEOUT_SECONDS):
+                repo_name = await _run_data(get_repo_name)
+                if not repo_name:
+                    return "Error: Could not determine repository name"
+                commit_filter = None
+                if filters:
+                    from analysis.commit_query import CommitFilter
+                    commit_filter = CommitFilter(**filters)
+                if not charts:
+                    # The daily distribution cannot be sketched
+                    charts = [job for job in DEFAULT_CHARTS if not (approximate and job == 'avg_bar')]
+                attrs['charts'] = len(charts)
+                result = await _run_data(partial(
+                    build_dashboard, '.', charts, _render_pool, repo_name,
+                    output_dir=None if inline else Path('.'), commit_filter=commit_filter,
+                    panel=panel, approximate=approximate
+                ))
+    except TimeoutError:
+        return f"Error generating dashboard: timed out after {CHART_TIMEOUT_SECONDS:g}s"
+    except Exception as e:
+        return f"Error generating dashboard: {str(e)}"
+
+    report = json.dumps(result.summary())
+    if not inline:
+        return report
+    images = [Image(data=png, format='png') for png in result.images()]
+    return [*images, report]
+
+
+@mcp.tool()
+async def get_commit_aggregates(
+    since: str | None = None,
+    until: str | None = None,
+    author: str | None = None,
+    path: str | None = None,
+    approximate: bool = False
+) -> str:
+    """Return the commit histograms behind the charts as numbers, without rendering.
+
+    Args:
+        since: Only count commits on or after this ISO date/datetime
+        until: Only count commits up to this ISO date (inclusive) or datetime
+        author: Only count commits whose "Name <email>" contains this text
+        path: Only count commits touching this file or directory
+        approximate: Stream history into constant-memory sketches (no
+            filters); histograms stay exact, active_days/days_by_hour become
+            estimates, daily_distribution is unavailable, and an "estimates"
+            object reports distinct authors and the error bounds
+
+    Returns:
+        JSON object with total, active_days, by_hour (0-23), by_weekday
+        (0 = Sunday), by_month (0 = January), hour_weekday (7x24),
+        days_by_hour, average_by_hour and daily_distribution (days per
+        commits-per-day bucket); or an error message.
+    """
+    filters = _collect_filters(since=since, until=until, author=author, path=path)
+    try:
+        async with asyncio.timeout(CHART_TIMEOUT_SECONDS):
+            with span('mcp.aggregates', approximate=approximate, filtered=bool(filters)):
+                if approximate:
+                    sketch = await _run_data(_sketch_history, filters)
+                    aggregates = sketch.to_aggregates()
+                    estimates = {'estimates': sketch.summary()}
+                else:
+                    aggregates = await _run_data(_load_aggregates, filters)
+                    estimates = {}
+        report = {'filters': filters, **aggregates.as_dict(), **estimates}
+        if approximate:
+            del report['daily_distribution']
+        return json.dumps(report)
+    except TimeoutError:
+        return f"Error loading commit aggregates: timed out after {CHART_TIMEOUT_SECONDS:g}s"
+    except Exception as e:
+        return f"Error loading commit aggregates: {str(e)}"
+
+
+def _top_authors(filters: dict[str, str], limit: int, group_by: str) -> dict:
+    from analysis.commit_authors import aggregate_authors
+    table = _load_table(filters)
+    authors = aggregate_authors(table, group_by)
+    return {
+        'total_commits': len(table),
+        'total_authors': int((authors.commits > 0).sum()),
+        'filters': filters,
+        'authors': [authors.profile(row) for row in authors.top(limit)],
+    }
+
+
+@mcp.tool()
+async def get_top_authors(
+    limit: int = 10,
+    group_by: str = 'identity',
+    since: str | None = None,
+    until: str | None = None,
+    path: str | None = None
+) -> str:
+    """Report the most active authors with their hour/weekday/month activity.
+
+    All authors are profiled in one pass over the cached history.
+
+    Args:
+        limit: Number of authors to return, busiest first
+        group_by: "identity" (mailmapped "Name <email>"), "email" or "name"
+        since: Only count commits on or after this ISO date/datetime
+        until: Only count commits up to this ISO date (inclusive) or datetime
+        path: Only count commits touching this file or directory
+
+    Returns:
+        JSON object with totals and, per author, commit count, first/last
+        commit (epoch seconds) and by_hour (0-23), by_weekday (0 = Sunday)
+        and by_month (0 = January) counts; or an error message.
+    """
+    filters = _collect_filters(since=since, until=until, path=path)
+    try:
+        async with asyncio.timeout(CHART_TIMEOUT_SECONDS):
+            with span('mcp.top_authors', group_by=group_by, filtered=bool(filters)):
+                report = await _run_data(_top_authors, filters, limit, group_by)
+        return json.dumps(report)
+    except TimeoutError:
+        return f"Error listing top authors: timed out after {CHART_TIMEOUT_SECONDS:g}s"
+    except Exception as e:
+        return f"Error listing top authors: {str(e)}"
+
+
+def _search_messages(query: str, filters: dict[str, str]) -> dict:
+    from analysis.commit_messages import search_messages
+    from analysis.commit_query import CommitFilter
+    matches = search_messages(query, CommitFilter(**filters))
+    aggregates = matches.aggregates
+    return {
+        'query': query,
+        'words': list(matches.words),
+        'filters': filters,
+        'total': len(matches),
+        'first_commit': matches.first_commit,
+        'last_commit': matches.last_commit,
+        'by_hour': aggregates.by_hour.tolist(),
+        'by_weekday': aggregates.by_weekday.tolist(),
+        'by_month': aggregates.by_month.tolist(),
+    }
+
+
+@mcp.tool()
+async def search_commit_messages(
+    query: str,
+    since: str | None = None,
+    until: str | None = None,
+    author: str | None = None,
+    path: str | None = None
+) -> str:
+    """Count the commits whose messages mention every query word, and when they were made.
+
+    Answered from an on-disk inverted index of commit messages that is
+    updated with only the new commits, instead of grepping ``git log``.
+    Words are matched case-insensitively with their plural/singular;
+    numbers, stopwords and commit types ("fix", "docs", ...) are not indexed.
+
+    Args:
+        query: Words that must all occur; "word*" matches any word with that prefix
+        since: Only count commits on or after this ISO date/datetime
+        until: Only count commits up to this ISO date (inclusive) or datetime
+        author: Only count commits whose "Name <email>" contains this text
+        path: Only count commits touching this file or directory
+
+    Returns:
+        JSON object with the searched words, total matching commits,
+        first/last match (epoch seconds, 0 if none) and by_hour (0-23),
+        by_weekday (0 = Sunday) and by_month (0 = January) counts; or an
+        error message.
+    """
+    filters = _collect_filters(since=since, until=until, author=author, path=path)
+    try:
+        async with asyncio.timeout(CHART_TIMEOUT_SECONDS):
+            with span('mcp.search_messages', filtered=bool(filters)):
+                report = await _run_data(_search_messages, query, filters)
+        return json.dumps(report)
+    except TimeoutError:
+        return f"Error searching commit messages: timed out after {CHART_TIMEOUT_SECONDS:g}s"
+    except Exception as e:
+        return f"Error searching commit messages: {str(e)}"
+
+
+@mcp.tool()
+async def get_render_cache_stats() -> str:
+    """Report render cache hit/miss/eviction counters.
+
+    Returns:
+        JSON object with hits, misses, evictions and hit_rate.
+    """
+    return json.dumps(_render_cache.stats.as_dict())
+
+
+def _hit_rate(hits: int, total: int) -> float:
+    return round(hits / total, 4) if total else 0.0
+
+
+@mcp.tool()
+async def get_trace_stats() -> str:
+    """Report rolling per-stage latencies and cache hit rates.
+
+    Every chart call is traced stage by stage (queueing, repository name,
+    tip resolution, cache lookup, history load/ingest, aggregation, render
+    round trip and, inside the render worker, drawing and PNG encoding).
+
+    Returns:
+        JSON object with "spans" (per stage: count, errors and p50/p95/max
+        ms over the most recent calls), "caches" (render and commit-history
+        cache hit rates), "counters" and the trace "export_file" if spans
+        are also written to JSONL (GIT_COMMIT_VIZ_TRACE_FILE).
+    """
+    events = counters()
+    history_lookups = sum(events.get(f'commit_cache.{kind}', 0)
+                          for kind in ('hit', 'append', 'rebuild'))
+    return json.dumps({
+        'spans': latency_stats(),
+        'caches': {
+            'render': _render_cache.stats.as_dict(),
+            'commit_history': {
+                'hits': events.get('commit_cache.hit', 0),
+                'appends': events.get('commit_cache.append', 0),
+                'rebuilds': events.get('commit_cache.rebuild', 0),
+                'hit_rate': _hit_rate(events.get('commit_cache.hit', 0), history_lookups),
+            },
+        },
+        'counters': events,
+        'export_file': export_path(),
+    })
+
+
+def main():
+    """Start the render workers (and repository watcher), then serve MCP over stdio."""
+    _render_pool.warm()
+    if WATCH_REPO:
+        _start_watcher()
+    try:
+        mcp.run()
+    finally:
+        if _watcher is not None:
+            _watcher.stop()
+        _render_pool.shutdown()
+
+
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,4 @@
+"""Chart rendering for commit activity.
+
+matplotlib and wordcloud are imported on first render, not at import time.
+"""
@@ -22,6 +22,7 @@ FIGURE_SIZE_SQUARE = 6
 # Output settings
 SAVE_DPI_HIGH = 300
 SAVE_DPI_STANDARD = 150
+SAVE_DPI_PREVIEW = 72
 PIE_START_ANGLE = 90
 GRID_ALPHA = 0.7
 XLABEL_ROTATION = 45
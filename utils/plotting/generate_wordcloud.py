@@ -1,74 +1,93 @@
 #!/usr/bin/env python3
 """Generate a word cloud from commit messages."""
 
+import argparse
 import logging
-import re
-import sys
-from pathlib import Path
+from collections import Counter
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
 
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-
-sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'config'))
-
-logger = logging.getLogger(__name__)
-from constants import (
+# STOPWORDS/COMMIT_TYPE_WORDS are re-exported for existing importers
+from analysis.commit_text import COMMIT_TYPE_WORDS, STOPWORDS, TOKEN_PATTERN, is_excluded  # noqa: F401
+from .constants import (
     WORDCLOUD_WIDTH, WORDCLOUD_HEIGHT, WORDCLOUD_MAX_FONT_SIZE, WORDCLOUD_PREFER_HORIZONTAL,
     FIGURE_WIDTH_LARGE, FIGURE_HEIGHT, SAVE_DPI_STANDARD
 )
+from .plot_utils import get_pyplot
+
+if TYPE_CHECKING:
+    from wordcloud import WordCloud
+
+logger = logging.getLogger(__name__)
+
+MAX_WORDS = 100
+
+
+def count_words(lines: Iterable[str]) -> Counter[str]:
+    """Tokenize commit text in a single streaming pass.
+
+    Memory grows with the vocabulary, not with the amount of text.
+
+    Args:
+        lines: Commit messages or lines of text, consumed lazily
 
-# Stopwords to exclude from word cloud
-STOPWORDS = {
-    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-    'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
-    'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
-    'could', 'should', 'may', 'might', 'must', 'shall', 'can', 'need',
-    'this', 'that', 'these', 'those', 'it', 'its', 'they', 'them', 'their',
-    'we', 'us', 'our', 'you', 'your', 'i', 'me', 'my', 'he', 'she', 'his', 'her',
-    'not', 'no', 'yes', 'so', 'if', 'then', 'else', 'when', 'where', 'which',
-    'who', 'whom', 'what', 'how', 'why', 'all', 'each', 'every', 'both',
-    'few', 'more', 'most', 'other', 'some', 'such', 'only', 'own', 'same',
-    'than', 'too', 'very', 'just', 'also', 'now', 'here', 'there', 'use',
-    'used', 'using', 'add', 'added', 'adding', 'update', 'updated', 'updating',
-    'remove', 'removed', 'removing', 'change', 'changed', 'changes', 'changing',
-    'new', 'file', 'files', 'code', 'via', 'into', 'etc', 'eg', 'ie'
-}
-
-
-def _clean_commit_text(text: str) -> str:
-    """Clean commit message text for word cloud generation."""
-    # Remove conventional commit prefixes
-    text = re.sub(r'\b(fix|feat|docs|style|refactor|chore|test|perf|ci|build)\b', '', text, flags=re.IGNORECASE)
-    # Remove scope parentheses content but keep the word
-    text = re.sub(r'\(([^)]+)\):', r'\1', text)
-    # Remove URLs
-    text = re.sub(r'https?://\S+', '', text)
-    # Remove file paths
-    text = re.sub(r'[\w/]+\.(js|ts|tsx|jsx|scss|css|html|md|json|yml|yaml|py|sh)', '', text)
-    # Remove numbers
-    text = re.sub(r'\b\d+\b', '', text)
-    # Remove special characters but keep spaces
-    return re.sub(r'[^\w\s]', ' ', text)
-
-
-def _create_wordcloud(text: str) -> WordCloud:
-    """Create a WordCloud object from cleaned text."""
+    Returns:
+        Raw token counts, before stopword filtering and case folding
+    """
+    counts: Counter[str] = Counter()
+    findall = TOKEN_PATTERN.findall
+    for line in lines:
+        counts.update(findall(line))
+    del counts['']
+    return counts
+
+
+def word_frequencies(counts: Counter[str]) -> dict[str, int]:
+    """Filter and fold raw token counts the way ``WordCloud.generate`` would.
+
+    Numbers, stopwords and commit type prefixes are dropped. Case variants
+    are merged under their most common spelling, and plurals are merged into
+    their singular when both occur.
+
+    Returns:
+        Word to frequency mapping for ``WordCloud.generate_from_frequencies``
+    """
+    variants: dict[str, Counter[str]] = {}
+    for word, count in counts.items():
+        if is_excluded(word):
+            continue
+        lower = word.lower()
+        variants.setdefault(lower, Counter())[word] += count
+
+    totals = {lower: sum(forms.values()) for lower, forms in variants.items()}
+    for lower in list(totals):
+        singular = lower[:-1]
+        if lower.endswith('s') and not lower.endswith('ss') and singular in totals:
+            totals[singular] += totals.pop(lower)
+            variants[singular].update(variants.pop(lower))
+
+    return {variants[lower].most_common(1)[0][0]: total for lower, total in totals.items()}
+
+
+def _create_wordcloud(frequencies: dict[str, int]) -> 'WordCloud':
+    """Create a WordCloud object from word frequencies."""
+    from wordcloud import WordCloud
     return WordCloud(
         width=WORDCLOUD_WIDTH,
         height=WORDCLOUD_HEIGHT,
         background_color='white',
         colormap='viridis',
-        max_words=100,
-        stopwords=STOPWORDS,
+        max_words=MAX_WORDS,
         min_font_size=10,
         max_font_size=WORDCLOUD_MAX_FONT_SIZE,
         relative_scaling=0.5,
         prefer_horizontal=WORDCLOUD_PREFER_HORIZONTAL
-    ).generate(text)
+    ).generate_from_frequencies(frequencies)
 
 
-def _save_wordcloud(wordcloud: WordCloud, output_file: str) -> None:
+def _save_wordcloud(wordcloud: 'WordCloud', output_file: str) -> None:
     """Save word cloud image to file."""
+    plt = get_pyplot()
     plt.figure(figsize=(FIGURE_WIDTH_LARGE, FIGURE_HEIGHT))
     plt.imshow(wordcloud, interpolation='bilinear')
     plt.axis('off')
@@ -78,17 +97,58 @@ def _save_wordcloud(wordcloud: WordCloud, output_file: str) -> None:
     logger.info("Word cloud saved as %s", output_file)
 
 
+def _count_tokens(lines: Iterable[str], approximate: bool) -> Counter[str]:
+    if not approximate:
+        return count_words(lines)
+    from analysis.commit_sketch import sketch_tokens
+    sketch = sketch_tokens(lines, TOKEN_PATTERN.findall)
+    logger.info("Approximate token counts: %s", sketch.error_bounds())
+    return sketch.most_common()
+
+
 def generate_wordcloud(
     input_file: str = 'commit_messages.txt',
-    output_file: str = 'images/commit_wordcloud.png'
+    output_file: str = 'images/commit_wordcloud.png',
+    messages: Iterable[str] | None = None,
+    approximate: bool = False,
+    frequencies: dict[str, int] | None = None
 ) -> None:
-    """Generate a word cloud from commit messages."""
-    with open(input_file, 'r') as f:
-        text = f.read()
+    """Generate a word cloud from commit messages.
 
-    cleaned_text = _clean_commit_text(text)
-    wordcloud = _create_wordcloud(cleaned_text)
+    Words read from messages are sized by how often they occur, so a word
+    repeated within one message counts every time (``plot_dashboard`` passes
+    ``frequencies`` that count commits instead).
+    ``messages`` (e.g. ``commit_ingest.iter_commit_messages()``) takes
+    precedence over ``input_file`` when given. Either source is streamed, so
+    peak memory depends on the vocabulary size rather than the history size.
+    With ``approximate`` it is constant instead: tokens go through a
+    count-min sketch (``analysis.commit_sketch``) and only the heaviest
+    candidates are kept. ``frequencies`` (already filtered and folded by
+    ``word_frequencies``, e.g. from ``commit_messages.message_word_counts``)
+    skips reading messages altogether.
+    """
+    if frequencies is None:
+        if messages is not None:
+            counts = _count_tokens(messages, approximate)
+        else:
+            with open(input_file, 'r') as f:
+                counts = _count_tokens(f, approximate)
+        frequencies = word_frequencies(counts)
+    if not frequencies:
+        raise ValueError("No words left to draw after filtering commit messages")
+    wordcloud = _create_wordcloud(frequencies)
     _save_wordcloud(wordcloud, output_file)
 
+
 if __name__ == '__main__':
-    generate_wordcloud()
+    parser = argparse.ArgumentParser(
+        description='Generate a word cloud from commit messages, sizing words by how often '
+                    'they occur'
+    )
+    parser.add_argument('--input', default='commit_messages.txt', help='Commit messages file')
+    parser.add_argument('--output', default='images/commit_wordcloud.png', help='Output PNG file')
+    parser.add_argument('--approximate', action='store_true',
+                        help='Count words with a fixed-size count-min sketch (constant memory)')
+    args = parser.parse_args()
+    generate_wordcloud(input_file=args.input, output_file=args.output,
+                       approximate=args.approximate)
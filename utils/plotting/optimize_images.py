@@ -0,0 +1,355 @@
+"""Post-render stage: optimized web variants of rendered charts.
+
+Charts come out of matplotlib as 300-DPI PNGs, far heavier than a page
+needs. For every PNG under a source directory this writes a
+palette-quantized PNG and a WebP at each responsive width (plus the
+source width), spread across a process pool. A manifest maps each source
+to its variants, ready-made ``srcset`` strings and the smallest
+full-width file, so site templates can pick variants without probing the
+disk (e.g. ``--manifest ../_data/charts.json`` for Jekyll's
+``site.data.charts``).
+
+Sources are keyed by SHA-256: an image whose bytes and settings are
+unchanged since the last run is skipped. Variants of removed sources, or
+left over from old settings, are deleted.
+
+Usage (from ``utils/``)::
+
+    python -m plotting.optimize_images images --output-dir images/web
+    python -m plotting.optimize_images images/batch --widths 320 640 1280 --base-url /assets/charts/
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from analysis.repo_utils import atomic_write
+from analysis.tracing import span
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+WEB_DIR = 'web'
+DEFAULT_WIDTHS = (480, 960, 1600)
+DEFAULT_COLORS = 256
+DEFAULT_WEBP_QUALITY = 82
+FORMATS = ('webp', 'png')
+
+
+@dataclass(frozen=True)
+class WebSettings:
+    """How variants are produced; changing any field regenerates every image.
+
+    Attributes:
+        widths: Responsive widths in pixels; those not below the source
+            width are dropped (the source width is always included)
+        colors: Palette size of the quantized PNGs (2-256)
+        webp_quality: Lossy WebP quality (0-100)
+    """
+    widths: tuple[int, ...] = DEFAULT_WIDTHS
+    colors: int = DEFAULT_COLORS
+    webp_quality: int = DEFAULT_WEBP_QUALITY
+
+    def fingerprint(self) -> str:
+        widths = ','.join(map(str, sorted(set(self.widths))))
+        return f'widths={widths};colors={self.colors};webp_quality={self.webp_quality}'
+
+
+@dataclass(frozen=True)
+class VariantResult:
+    """Variants written for one source image, or the error that stopped it."""
+    source: str
+    entry: dict | None
+    error: str | None = None
+
+
+@dataclass
+class OptimizeReport:
+    """Outcome of one ``optimize_images`` run.
+
+    Attributes:
+        processed: Sources whose variants were (re)written
+        skipped: Sources unchanged since the last run
+        removed: Sources dropped from the manifest because they are gone
+        errors: Source -> error message
+        source_bytes: Total size of every source PNG
+        smallest_bytes: Total size of every source's smallest full-width variant
+        seconds: Wall time
+    """
+    processed: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    errors: dict[str, str] = field(default_factory=dict)
+    source_bytes: int = 0
+    smallest_bytes: int = 0
+    seconds: float = 0.0
+
+
+def file_hash(path: Path) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _flatten(image: 'Image.Image') -> 'Image.Image':
+    """RGB copy of opaque images, RGBA of translucent ones."""
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    if image.mode == 'RGBA' and image.getextrema()[3][0] == 255:
+        image = image.convert('RGB')
+    return image
+
+
+def _quantize(image: 'Image.Image', colors: int) -> 'Image.Image':
+    from PIL import Image
+    # Undithered: chart fills stay flat, which also compresses far better
+    method = Image.Quantize.FASTOCTREE if image.mode == 'RGBA' else Image.Quantize.MEDIANCUT
+    return image.quantize(colors=colors, method=method, dither=Image.Dither.NONE)
+
+
+def write_variants(source: str, rel_path: str, source_hash: str, output_dir: str,
+                   settings: WebSettings) -> VariantResult:
+    """Worker: write every variant of one source image; never raises.
+
+    Args:
+        source: Path of the source PNG
+        rel_path: Its path relative to the source directory (manifest key)
+        source_hash: ``file_hash`` of the source, recorded in the manifest
+        output_dir: Directory the variants are written under
+        settings: Variant widths, palette size and WebP quality
+    """
+    try:
+        from PIL import Image
+        with Image.open(source) as opened:
+            image = _flatten(opened)
+        width, height = image.size
+        widths = sorted({w for w in settings.widths if 0 < w < width} | {width})
+        stem = Path(rel_path).with_suffix('')
+        variants = []
+        for target in widths:
+            resized = image if target == width else image.resize(
+                (target, max(1, round(height * target / width))), Image.Resampling.LANCZOS
+            )
+            for fmt in FORMATS:
+                variant = stem.parent / f'{stem.name}-{target}.{fmt}'
+                out_path = Path(output_dir) / variant
+                out_path.parent.mkdir(parents=True, exist_ok=True)
+                if fmt == 'webp':
+                    resized.save(out_path, 'WEBP', quality=settings.webp_quality)
+                else:
+                    _quantize(resized, settings.colors).save(out_path, 'PNG', optimize=True)
+                variants.append({
+                    'path': variant.as_posix(),
+                    'format': fmt,
+                    'width': resized.width,
+                    'height': resized.height,
+                    'bytes': out_path.stat().st_size,
+                })
+    except Exception as e:
+        return VariantResult(rel_path, None, f'{type(e).__name__}: {e}')
+
+    full_width = [v for v in variants if v['width'] == width]
+    return VariantResult(rel_path, {
+        'source_hash': source_hash,
+        'settings': settings.fingerprint(),
+        'width': width,
+        'height': height,
+        'bytes': Path(source).stat().st_size,
+        'variants': variants,
+        'smallest': min(full_width, key=lambda v: v['bytes'])['path'],
+    })
+
+
+def _srcsets(entry: dict, base_url: str) -> dict[str, str]:
+    return {
+        fmt: ', '.join(f"{base_url}{v['path']} {v['width']}w"
+                       for v in entry['variants'] if v['format'] == fmt)
+        for fmt in FORMATS
+    }
+
+
+def read_manifest(path: Path) -> dict:
+    """Load a manifest, or an empty one if it is missing, unreadable or outdated."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable manifest %s: %s", path, e)
+    return {'version': MANIFEST_VERSION, 'images': {}}
+
+
+def write_manifest(path: Path, manifest: dict) -> None:
+    """Atomically write ``manifest`` as JSON."""
+    with atomic_write(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def _remove_variants(output_dir: Path, entry: dict, keep: set[str] = frozenset()) -> None:
+    for variant in entry.get('variants', []):
+        if variant['path'] not in keep:
+            (output_dir / variant['path']).unlink(missing_ok=True)
+
+
+def _is_current(entry: dict | None, source_hash: str, settings: WebSettings,
+                output_dir: Path) -> bool:
+    return (entry is not None
+            and entry.get('source_hash') == source_hash
+            and entry.get('settings') == settings.fingerprint()
+            and all((output_dir / v['path']).exists() for v in entry['variants']))
+
+
+def find_sources(source_dir: Path, output_dir: Path) -> dict[str, Path]:
+    """Every PNG under ``source_dir`` (outside ``output_dir``), keyed by relative path."""
+    output_dir = output_dir.resolve()
+    sources = {}
+    for path in sorted(source_dir.rglob('*.png')):
+        if path.resolve().is_relative_to(output_dir):
+            continue
+        sources[path.relative_to(source_dir).as_posix()] = path
+    return sources
+
+
+def optimize_images(
+    source_dir: str | Path,
+    output_dir: str | Path | None = None,
+    manifest_path: str | Path | None = None,
+    settings: WebSettings = WebSettings(),
+    base_url: str = '',
+    max_workers: int | None = None
+) -> OptimizeReport:
+    """Write web variants of every changed chart and update the manifest.
+
+    Args:
+        source_dir: Directory searched (recursively) for rendered PNGs
+        output_dir: Where variants go (default: ``<source_dir>/web``)
+        manifest_path: Manifest file (default: ``<output_dir>/manifest.json``)
+        settings: Variant widths, palette size and WebP quality
+        base_url: Prefix for the paths in the ``srcset`` strings
+        max_workers: Worker processes (default: CPU count)
+
+    Returns:
+        What was processed, skipped, removed or failed
+    """
+    start = time.perf_counter()
+    source_dir = Path(source_dir)
+    output_dir = Path(output_dir) if output_dir is not None else source_dir / WEB_DIR
+    manifest_path = Path(manifest_path) if manifest_path is not None else output_dir / MANIFEST_FILE
+    report = OptimizeReport()
+    manifest = read_manifest(manifest_path)
+    images: dict[str, dict] = manifest['images']
+    sources = find_sources(source_dir, output_dir)
+
+    for rel_path in sorted(set(images) - set(sources)):
+        _remove_variants(output_dir, images.pop(rel_path))
+        report.removed.append(rel_path)
+
+    pending: dict[str, str] = {}
+    with span('images.hash', images=len(sources)):
+        for rel_path, path in sources.items():
+            source_hash = file_hash(path)
+            if _is_current(images.get(rel_path), source_hash, settings, output_dir):
+                report.skipped.append(rel_path)
+            else:
+                pending[rel_path] = source_hash
+
+    with span('images.optimize', images=len(pending)):
+        if pending:
+            max_workers = max_workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+                futures = {
+                    pool.submit(write_variants, str(sources[rel_path]), rel_path, source_hash,
+                                str(output_dir), settings): rel_path
+                    for rel_path, source_hash in pending.items()
+                }
+                for future in as_completed(futures):
+                    rel_path = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # Worker process died; isolate it like any other failure
+                        result = VariantResult(rel_path, None, f"worker failed: {e}")
+                    if result.error is not None:
+                        report.errors[rel_path] = result.error
+                        continue
+                    old = images.get(rel_path)
+                    if old is not None:
+                        _remove_variants(output_dir, old,
+                                         keep={v['path'] for v in result.entry['variants']})
+                    images[rel_path] = result.entry
+                    report.processed.append(rel_path)
+
+    for entry in images.values():
+        entry['srcset'] = _srcsets(entry, base_url)
+        smallest = next(v for v in entry['variants'] if v['path'] == entry['smallest'])
+        report.source_bytes += entry['bytes']
+        report.smallest_bytes += smallest['bytes']
+    manifest['base_url'] = base_url
+    write_manifest(manifest_path, manifest)
+    report.processed.sort()
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def print_report(report: OptimizeReport) -> None:
+    """Print a one-line summary plus any failures."""
+    saved = 1 - report.smallest_bytes / report.source_bytes if report.source_bytes else 0.0
+    print(f"{len(report.processed)} optimized, {len(report.skipped)} unchanged, "
+          f"{len(report.removed)} removed in {report.seconds:.2f}s; smallest variants "
+          f"{report.smallest_bytes / 1e6:.2f} MB vs {report.source_bytes / 1e6:.2f} MB "
+          f"sources ({saved:.0%} smaller)")
+    for rel_path, error in report.errors.items():
+        print(f"  failed: {rel_path}: {error}")
+
+
+def main() -> int:
+    """Parse arguments and optimize a directory of charts."""
+    parser = argparse.ArgumentParser(description='Write optimized web variants of rendered charts')
+    parser.add_argument('source_dir', help='Directory of rendered PNG charts (searched recursively)')
+    parser.add_argument('--output-dir', help=f'Variant directory (default: SOURCE_DIR/{WEB_DIR})')
+    parser.add_argument('--manifest', help=f'Manifest file (default: OUTPUT_DIR/{MANIFEST_FILE})')
+    parser.add_argument('--widths', type=int, nargs='+', default=list(DEFAULT_WIDTHS),
+                        help='Responsive widths in pixels (the source width is always added)')
+    parser.add_argument('--colors', type=int, default=DEFAULT_COLORS,
+                        help=f'Palette size of the quantized PNGs (default: {DEFAULT_COLORS})')
+    parser.add_argument('--webp-quality', type=int, default=DEFAULT_WEBP_QUALITY,
+                        help=f'WebP quality 0-100 (default: {DEFAULT_WEBP_QUALITY})')
+    parser.add_argument('--base-url', default='', help='Prefix for srcset paths, e.g. /assets/charts/')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+    if not 2 <= args.colors <= 256:
+        parser.error('--colors must be between 2 and 256')
+    if not 0 <= args.webp_quality <= 100:
+        parser.error('--webp-quality must be between 0 and 100')
+    if not Path(args.source_dir).is_dir():
+        parser.error(f'{args.source_dir} is not a directory')
+
+    report = optimize_images(
+        args.source_dir, args.output_dir, args.manifest,
+        WebSettings(tuple(args.widths), args.colors, args.webp_quality),
+        base_url=args.base_url, max_workers=args.workers
+    )
+    print_report(report)
+    return 1 if report.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
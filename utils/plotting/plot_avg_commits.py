@@ -3,15 +3,18 @@
 import argparse
 import logging
 import re
-import sys
-from pathlib import Path
+from typing import TYPE_CHECKING
 
-import matplotlib.pyplot as plt
+from .constants import FIGURE_WIDTH_STANDARD, FIGURE_HEIGHT, SAVE_DPI_HIGH, XLABEL_ROTATION
+from .plot_utils import (
+    get_pyplot, load_repo_aggregates, load_repo_table, add_filter_arguments, filter_from_args,
+    is_snapshot_file, read_snapshot_aggregates
+)
 
-sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'config'))
+if TYPE_CHECKING:
+    from analysis.commit_aggregate import CommitAggregates
 
 logger = logging.getLogger(__name__)
-from constants import FIGURE_WIDTH_STANDARD, FIGURE_HEIGHT, SAVE_DPI_HIGH, XLABEL_ROTATION
 
 COMMIT_PATTERN = re.compile(r'Commits (\d+)-(\d+): (\d+) days')
 
@@ -70,37 +73,95 @@ def parse_results(file_path: str) -> tuple[list[str] | None, list[int] | None]:
         return None, None
     return categories, days
 
-def plot_bar_chart(categories: list[str], days: list[int], output_file: str) -> None:
+def plot_bar_chart(
+    categories: list[str],
+    days: list[int],
+    output_file: str,
+    title: str = 'Distribution of Daily Commit Counts'
+) -> None:
     """Create a bar chart of commit count distribution.
 
     Args:
         categories: X-axis category labels (commit ranges).
         days: Y-axis values (number of days for each category).
         output_file: Path to save the output PNG.
+        title: Title of the plot.
     """
+    plt = get_pyplot()
     plt.figure(figsize=(FIGURE_WIDTH_STANDARD, FIGURE_HEIGHT))
     plt.bar(categories, days, color='skyblue', edgecolor='black')
     plt.xlabel('Commits per Day')
     plt.ylabel('Number of Days')
-    plt.title('Distribution of Daily Commit Counts')
+    plt.title(title)
     plt.xticks(rotation=XLABEL_ROTATION, ha='right')
     plt.tight_layout()
     plt.savefig(output_file, dpi=SAVE_DPI_HIGH)
     plt.close()
     logger.info("Bar chart saved as %s", output_file)
 
+def plot_avg_commits(
+    input_file: str = 'average_commits.txt',
+    output_file: str = 'images/average_commits.png',
+    title: str = 'Distribution of Daily Commit Counts',
+    aggregates: 'CommitAggregates | None' = None
+) -> None:
+    """Generate the commits-per-day distribution bar chart.
+
+    Args:
+        input_file: Path to the commit_distribution.sh output, or to a binary
+            snapshot (``analysis.commit_snapshot``).
+        output_file: Path to save the output PNG.
+        title: Title of the plot.
+        aggregates: Precomputed histograms; when given, ``input_file`` is ignored.
+    """
+    if aggregates is None and is_snapshot_file(input_file):
+        aggregates = read_snapshot_aggregates(input_file)
+        if aggregates is None:
+            return
+    if aggregates is not None:
+        categories, days = aggregates.distribution_items()
+    else:
+        categories, days = parse_results(input_file)
+    if categories and days:
+        plot_bar_chart(categories, days, output_file, title)
+
 def main():
     """Parse arguments and generate commit distribution bar chart."""
     parser = argparse.ArgumentParser(description='Plot commit distribution as a bar chart.')
-    parser.add_argument('-i', '--input', default='average_commits.txt', help='Input file with commit data (default: results.txt)')
+    parser.add_argument('-i', '--input', default='average_commits.txt', help='Input file with commit data, or a binary snapshot (.npz) (default: average_commits.txt)')
     parser.add_argument('-o', '--output', default='images/average_commits.png', help='Output file for the bar chart (default: images/average_commits.png)')
+    parser.add_argument('--repo', help='Read history directly from this git repository instead of --input')
+    parser.add_argument('--buckets', metavar='EDGES',
+                        help='Comma-separated lower bucket edges, e.g. 1,2,5,10,20 '
+                             '(requires --repo or a snapshot --input)')
+    add_filter_arguments(parser)
     args = parser.parse_args()
 
-    # Parse the results file
-    categories, days = parse_results(args.input)
-    if categories and days:
-        # Generate the bar chart
-        plot_bar_chart(categories, days, args.output)
+    if args.buckets:
+        if not args.repo and not is_snapshot_file(args.input):
+            parser.error('--buckets requires --repo or a snapshot --input')
+        from analysis.commit_timeseries import daily_series, parse_bucket_edges
+        try:
+            edges = parse_bucket_edges(args.buckets)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.repo:
+            series = daily_series(load_repo_table(args.repo, filter_from_args(args)))
+        else:
+            from analysis.commit_snapshot import load_snapshot
+            try:
+                series = load_snapshot(args.input).daily
+            except (OSError, ValueError) as e:
+                parser.error(str(e))
+        categories, days = series.distribution_items(edges)
+        if categories:
+            plot_bar_chart(categories, days, args.output)
+        else:
+            logger.warning("No commits in the selected history")
+        return
+
+    aggregates = load_repo_aggregates(args.repo, filter_from_args(args)) if args.repo else None
+    plot_avg_commits(input_file=args.input, output_file=args.output, aggregates=aggregates)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,158 @@
+"""Generate charts for many repositories at once.
+
+Repositories are ingested and aggregated in parallel, per-repo charts are
+rendered by the warm render pool, and org-wide charts are drawn from the
+sum of every repository's aggregates.
+
+Usage (from ``utils/``)::
+
+    python -m plotting.plot_batch ~/src/repo-a ~/src/repo-b
+    python -m plotting.plot_batch --scan ~/src --output-dir images/batch
+"""
+import argparse
+import logging
+import re
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .render_engine import add_profile_argument
+from .render_pool import CHART_JOBS, CHART_OUTPUTS, RenderPool
+
+if TYPE_CHECKING:
+    from analysis.repo_batch import RepoAnalysis
+
+logger = logging.getLogger(__name__)
+
+COMBINED_NAME = 'all-repositories'
+
+DEFAULT_CHARTS = ['hour_bar', 'day_month_pie']
+
+
+def _safe_dir_name(name: str, used: set[str]) -> str:
+    """Return a filesystem-safe directory name not already in ``used``."""
+    base = re.sub(r'[^\w.-]+', '_', name) or 'repository'
+    candidate, suffix = base, 2
+    while candidate in used:
+        candidate = f'{base}-{suffix}'
+        suffix += 1
+    used.add(candidate)
+    return candidate
+
+
+def _print_progress(result: 'RepoAnalysis', done: int, total: int) -> None:
+    if result.ok:
+        status = f"{result.aggregates.total} commits"
+    else:
+        status = f"FAILED: {result.error}"
+    print(f"[{done}/{total}] {result.repo_name}: {status} ({result.seconds:.2f}s)", flush=True)
+
+
+def render_batch(
+    results: 'list[RepoAnalysis]',
+    output_dir: Path,
+    charts: list[str],
+    pool: RenderPool,
+    profile: str | None = None
+) -> list[str]:
+    """Render per-repo and combined charts.
+
+    Args:
+        results: Per-repository analyses; failed ones are skipped
+        output_dir: Root directory for the per-repo and combined chart directories
+        charts: ``CHART_JOBS`` names to render for each
+        pool: Render pool to run the chart jobs on
+        profile: ``render_engine.RENDER_PROFILES`` name; the chart types
+            the engine supports then reuse template figures across repositories
+
+    Returns:
+        Error messages for charts that failed to render
+    """
+    succeeded = [r for r in results if r.ok]
+    targets = []
+    used: set[str] = {COMBINED_NAME}
+    for result in succeeded:
+        targets.append((result.repo_name, _safe_dir_name(result.repo_name, used), result.aggregates))
+    if succeeded:
+        from analysis.commit_aggregate import combine_aggregates
+        combined = combine_aggregates([r.aggregates for r in succeeded])
+        targets.append(('all repositories', COMBINED_NAME, combined))
+
+    options = {'profile': profile} if profile is not None else {}
+    futures = []
+    for name, dir_name, aggregates in targets:
+        chart_dir = output_dir / dir_name
+        chart_dir.mkdir(parents=True, exist_ok=True)
+        for job in charts:
+            stem, title = CHART_OUTPUTS[job]
+            output_file = str(chart_dir / f'{stem}.png')
+            future = pool.submit(
+                job, output_file=output_file, title=title.format(name=name), aggregates=aggregates,
+                **options
+            )
+            futures.append((output_file, future))
+
+    errors = []
+    for output_file, future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            errors.append(f"{output_file}: {e}")
+    return errors
+
+
+def main() -> int:
+    """Parse arguments, analyze repositories and render their charts."""
+    parser = argparse.ArgumentParser(description='Generate commit charts for many repositories')
+    parser.add_argument('repos', nargs='*', help='Repository paths')
+    parser.add_argument('--scan', metavar='DIR', help='Also analyze every repository found under DIR')
+    parser.add_argument('--scan-depth', type=int, default=2,
+                        help='Directory levels below --scan to search (default: 2)')
+    parser.add_argument('--output-dir', default='images/batch', help='Root directory for charts')
+    parser.add_argument('--workers', type=int, help='Parallel analysis processes (default: CPU count)')
+    parser.add_argument('--render-workers', type=int, default=2, help='Parallel render processes')
+    parser.add_argument('--charts', nargs='+', choices=sorted(CHART_JOBS), default=DEFAULT_CHARTS,
+                        help='Charts to render per repository and for the combined view')
+    add_profile_argument(parser)
+    parser.add_argument('--web', action='store_true',
+                        help='Also write optimized web variants (quantized PNG, WebP, responsive '
+                             'widths) and a manifest to OUTPUT_DIR/web')
+    args = parser.parse_args()
+
+    # NumPy and the analysis modules load only once there is work to do
+    from analysis.repo_batch import analyze_repos, discover_repos
+    repo_paths = list(args.repos)
+    if args.scan:
+        repo_paths += discover_repos(args.scan, args.scan_depth)
+    repo_paths = list(dict.fromkeys(repo_paths))
+    if not repo_paths:
+        parser.error('no repositories given (pass paths or --scan DIR)')
+
+    results = analyze_repos(repo_paths, max_workers=args.workers, on_result=_print_progress)
+
+    pool = RenderPool(size=args.render_workers)
+    try:
+        render_errors = render_batch(results, Path(args.output_dir), args.charts, pool,
+                                     args.profile)
+    finally:
+        pool.shutdown()
+
+    if args.web:
+        from .optimize_images import optimize_images, print_report
+        web_report = optimize_images(args.output_dir)
+        print_report(web_report)
+        render_errors += [f"{path}: {error}" for path, error in web_report.errors.items()]
+
+    failed = [r for r in results if not r.ok]
+    total_commits = sum(r.aggregates.total for r in results if r.ok)
+    print(f"\nAnalyzed {len(results) - len(failed)}/{len(results)} repositories "
+          f"({total_commits} commits); charts in {args.output_dir}")
+    for result in failed:
+        print(f"  failed: {result.repo_path}: {result.error}")
+    for error in render_errors:
+        print(f"  render failed: {error}")
+    return 1 if failed or render_errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,41 +1,57 @@
 """Plot commits by hour of day - DRY refactored."""
 import argparse
 import logging
-import sys
-from pathlib import Path
+from typing import TYPE_CHECKING
 
-sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'config'))
+from .constants import HOURS_IN_DAY, HOUR_INDEX_MIN, HOUR_INDEX_MAX, FIGURE_WIDTH_STANDARD, FIGURE_HEIGHT
+from .plot_utils import (
+    read_count_file, is_snapshot_file, read_snapshot_aggregates, create_bar_chart, save_chart,
+    load_repo_aggregates, add_approximate_argument, add_filter_arguments, add_weight_argument,
+    filter_from_args,
+    value_label
+)
+
+if TYPE_CHECKING:
+    from analysis.commit_aggregate import CommitAggregates
 
 logger = logging.getLogger(__name__)
-from constants import HOURS_IN_DAY, HOUR_INDEX_MIN, HOUR_INDEX_MAX, FIGURE_WIDTH_STANDARD, FIGURE_HEIGHT
-from plot_utils import read_count_file, create_bar_chart, save_chart
 
 
 def plot_commits_by_hour(
     input_file: str = 'commit_counts.txt',
     output_file: str = 'images/commits_by_hour.png',
-    title: str = 'Git Commits by Hour of Day'
+    title: str = 'Git Commits by Hour of Day',
+    aggregates: 'CommitAggregates | None' = None
 ) -> None:
     """Generate a bar graph of commit counts by hour.
 
     Args:
-        input_file: Path to the input file with hour and count data.
+        input_file: Path to the input file with hour and count data, or to a
+            binary snapshot (``analysis.commit_snapshot``).
         output_file: Path to save the output PNG.
         title: Title of the plot.
+        aggregates: Precomputed histograms; when given, ``input_file`` is ignored.
     """
-    try:
-        hour_counts = read_count_file(
-            input_file, HOURS_IN_DAY, HOUR_INDEX_MIN, HOUR_INDEX_MAX
-        )
-    except FileNotFoundError:
-        logger.error("File not found: %s", input_file)
-        return
+    if aggregates is None and is_snapshot_file(input_file):
+        aggregates = read_snapshot_aggregates(input_file)
+        if aggregates is None:
+            return
+    if aggregates is not None:
+        hour_counts = aggregates.by_hour
+    else:
+        try:
+            hour_counts = read_count_file(
+                input_file, HOURS_IN_DAY, HOUR_INDEX_MIN, HOUR_INDEX_MAX
+            )
+        except FileNotFoundError:
+            logger.error("File not found: %s", input_file)
+            return
 
     hours = [f"{h:02d}" for h in range(HOURS_IN_DAY)]
     create_bar_chart(
         hours, hour_counts,
         xlabel='Hour of Day (0-23)',
-        ylabel='Number of Commits',
+        ylabel=value_label(aggregates),
         title=title,
         figsize=(FIGURE_WIDTH_STANDARD, FIGURE_HEIGHT)
     )
@@ -45,11 +61,22 @@ def plot_commits_by_hour(
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Generate bar graph of commits by hour')
     parser.add_argument('--input', default='commit_counts.txt',
-                        help='Input file with hour and count data')
+                        help='Input file with hour and count data, or a binary snapshot (.npz)')
     parser.add_argument('--output', default='images/commits_by_hour.png',
                         help='Output PNG file')
     parser.add_argument('--title', default='Git Commits by Hour of Day',
                         help='Chart title')
+    parser.add_argument('--repo',
+                        help='Read history directly from this git repository instead of --input')
+    add_weight_argument(parser)
+    add_approximate_argument(parser)
+    add_filter_arguments(parser)
 
     args = parser.parse_args()
-    plot_commits_by_hour(input_file=args.input, output_file=args.output, title=args.title)
+    aggregates = (
+        load_repo_aggregates(
+            args.repo, filter_from_args(args), args.weight, args.approximate
+        ) if args.repo else None
+    )
+    plot_commits_by_hour(input_file=args.input, output_file=args.output, title=args.title,
+                         aggregates=aggregates)
@@ -0,0 +1,347 @@
+"""Render every commit chart for a repository from one ingestion pass.
+
+The history is loaded (from the commit cache) and aggregated once; all
+requested charts are then rendered concurrently by the warm render pool,
+optionally alongside a single multi-panel dashboard figure. The word cloud
+is weighted from the message index (``analysis.commit_messages``) for the
+same commits, so its messages are not read again: each word is sized by the
+number of commits using it. With ``--approximate``, as in the standalone
+``generate_wordcloud``, words are sized by how often they occur instead, so
+a word repeated within one message counts every time. Wall time is recorded
+per stage (ingest, aggregate, words, render and each chart) so slow stages
+are easy to spot.
+
+Usage (from ``utils/``)::
+
+    python -m plotting.plot_dashboard --repo . --output-dir images --panel
+    python -m plotting.plot_dashboard --charts hour_bar wordcloud --since 2024-01-01
+"""
+import argparse
+import hashlib
+import logging
+import re
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterator
+from concurrent.futures import wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
+
+from analysis.repo_utils import get_repo_name
+from .constants import FIGURE_HEIGHT, FIGURE_WIDTH_LARGE, GRID_ALPHA, HOURS_IN_DAY, PIE_START_ANGLE
+from .plot_pie_day_month import DAY_LABELS, MONTH_LABELS
+from .plot_utils import (
+    add_approximate_argument, add_filter_arguments, filter_from_args, get_pyplot, save_chart,
+    value_label
+)
+from .render_engine import add_profile_argument
+from .render_pool import CHART_JOBS, CHART_OUTPUTS, WORDCLOUD_JOB, RenderPool
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from analysis.commit_aggregate import CommitAggregates
+    from analysis.commit_query import CommitFilter
+
+logger = logging.getLogger(__name__)
+
+# render_pool job for the multi-panel figure
+PANEL_JOB = 'dashboard'
+# The six single charts an agent would otherwise request one by one
+DEFAULT_CHARTS = ['hour_bar', 'day_pie', 'month_pie', 'day_month_pie', 'avg_bar', WORDCLOUD_JOB]
+WORDCLOUD_OUTPUT = ('commit_wordcloud', 'Commit Message Word Cloud for {name}')
+
+
+def plot_dashboard(
+    output_file: 'str | BinaryIO' = 'images/commit_dashboard.png',
+    title: str = 'Commit Activity',
+    aggregates: 'CommitAggregates | None' = None
+) -> None:
+    """Draw hour, daily-distribution, weekday and month panels in one figure.
+
+    Args:
+        output_file: Path (or binary buffer) to save the PNG to
+        title: Figure title
+        aggregates: Histograms to draw
+    """
+    if aggregates is None:
+        raise ValueError("The dashboard panel is drawn from aggregates only")
+    fig, axes = get_pyplot().subplots(2, 2, figsize=(FIGURE_WIDTH_LARGE, 2 * FIGURE_HEIGHT))
+    fig.suptitle(title)
+    (hour_ax, distribution_ax), (day_ax, month_ax) = axes
+
+    hour_ax.bar([f"{h:02d}" for h in range(HOURS_IN_DAY)], aggregates.by_hour,
+                color='#4e79a7', edgecolor='#2e4977', linewidth=1)
+    hour_ax.set_xlabel('Hour of Day (0-23)')
+    hour_ax.set_ylabel(value_label(aggregates))
+    hour_ax.set_title('By Hour of Day')
+    hour_ax.grid(True, axis='y', linestyle='--', alpha=GRID_ALPHA)
+
+    categories, days = aggregates.distribution_items()
+    distribution_ax.bar(categories, days, color='skyblue', edgecolor='black')
+    distribution_ax.set_xlabel('Commits per Day')
+    distribution_ax.set_ylabel('Number of Days')
+    distribution_ax.set_title('Distribution of Daily Commit Counts')
+
+    day_ax.pie(aggregates.by_weekday, labels=DAY_LABELS, autopct='%1.1f%%',
+               startangle=PIE_START_ANGLE)
+    day_ax.set_title('By Day of Week')
+    month_ax.pie(aggregates.by_month, labels=MONTH_LABELS, autopct='%1.1f%%',
+                 startangle=PIE_START_ANGLE)
+    month_ax.set_title('By Month')
+
+    fig.tight_layout()
+    save_chart(output_file)
+
+
+@dataclass
+class DashboardResult:
+    """Outcome of one dashboard run.
+
+    Attributes:
+        commits: Number of commits charted
+        outputs: Chart job -> output path, or PNG bytes when rendered in memory
+        errors: Chart job -> error message for charts that failed
+        timings: Stage -> wall seconds (``ingest``, ``aggregate``, ``words``,
+            ``render``, ``render.<job>`` per chart and ``total``)
+        estimates: Sketch estimates and error bounds in approximate mode
+    """
+    commits: int = 0
+    outputs: dict[str, str | bytes] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)
+    estimates: dict | None = None
+
+    def summary(self) -> dict:
+        """JSON-serializable report (paths, errors and timings, no image bytes).
+
+        In-memory runs list their rendered jobs under ``inline``, in the
+        order of ``images()``.
+        """
+        images = [job for job, out in self.outputs.items() if isinstance(out, bytes)]
+        return {
+            'commits': self.commits,
+            'files': {job: out for job, out in self.outputs.items() if isinstance(out, str)},
+            **({'inline': images} if images else {}),
+            'errors': self.errors,
+            'timings_ms': {stage: round(s * 1000, 1) for stage, s in self.timings.items()},
+            **({'estimates': self.estimates} if self.estimates is not None else {}),
+        }
+
+    def images(self) -> list[bytes]:
+        """PNG bytes of the charts rendered in memory, in job order."""
+        return [out for out in self.outputs.values() if isinstance(out, bytes)]
+
+
+@contextmanager
+def _stage(timings: dict[str, float], name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - start
+
+
+def _output_spec(job: str) -> tuple[str, str]:
+    return WORDCLOUD_OUTPUT if job == WORDCLOUD_JOB else CHART_OUTPUTS[job]
+
+
+def _word_frequencies(repo_path: str, rows: 'np.ndarray | None') -> dict[str, int]:
+    """Word cloud weights of the charted commits, from the message index.
+
+    Each word weighs the number of charted commits using it, not its number
+    of occurrences as in ``generate_wordcloud.count_words``. The index is
+    cached and only appended to, so this reads no messages that an earlier
+    run already indexed. Only the words the cloud can draw are kept, so the
+    job sent to the render pool stays small.
+    """
+    from analysis.commit_messages import message_word_counts
+    from .generate_wordcloud import MAX_WORDS, word_frequencies
+    frequencies = Counter(word_frequencies(message_word_counts(rows, repo_path)))
+    return dict(frequencies.most_common(MAX_WORDS))
+
+
+def build_dashboard(
+    repo_path: str,
+    charts: list[str],
+    pool: RenderPool,
+    name: str,
+    output_dir: Path | None = None,
+    commit_filter: 'CommitFilter | None' = None,
+    panel: bool = False,
+    approximate: bool = False,
+    profile: str | None = None
+) -> DashboardResult:
+    """Ingest and aggregate once, then render every chart concurrently.
+
+    Args:
+        repo_path: Repository to chart
+        charts: ``CHART_JOBS``/``WORDCLOUD_JOB`` names to render
+        pool: Render pool to run the chart jobs on
+        name: Repository name for titles and file names
+        output_dir: Directory for ``<stem>_<name>.png`` files; None renders
+            into memory (``outputs`` then holds PNG bytes)
+        commit_filter: Restrict every chart, the word cloud included, to
+            matching commits
+        panel: Also render the multi-panel dashboard figure
+        approximate: Stream the history (and word counts) into constant-memory
+            sketches instead of loading it (``analysis.commit_sketch``); the
+            word cloud then weighs word occurrences rather than commits
+        profile: ``render_engine.RENDER_PROFILES`` name to draw the charts the
+            engine supports with its reusable template figures
+
+    Returns:
+        Outputs, per-chart errors and per-stage timings
+
+    Raises:
+        ValueError: If a chart name is unknown, or ``approximate`` is asked
+            for with a filter or a chart that needs the daily distribution
+    """
+    unknown = [job for job in charts if job not in CHART_JOBS and job != WORDCLOUD_JOB]
+    if unknown:
+        raise ValueError(f"Unknown charts: {', '.join(unknown)}")
+    if approximate and (commit_filter is not None or panel
+                        or {'avg_bar', PANEL_JOB}.intersection(charts)):
+        raise ValueError("Approximate mode supports neither filters nor the daily "
+                         "distribution (avg_bar, dashboard panel)")
+    result = DashboardResult()
+    timings = result.timings
+    run_start = time.perf_counter()
+    if approximate:
+        from analysis.commit_sketch import sketch_commits
+        with _stage(timings, 'ingest'):
+            sketch = sketch_commits(repo_path)
+        with _stage(timings, 'aggregate'):
+            aggregates = sketch.to_aggregates()
+        result.commits = sketch.commits
+        result.estimates = sketch.summary()
+    else:
+        rows = None
+        with _stage(timings, 'ingest'):
+            if commit_filter is None:
+                from analysis.commit_cache import load_commit_table
+                table = load_commit_table(repo_path)
+            else:
+                from analysis.commit_query import load_commit_index
+                index = load_commit_index(repo_path)
+                rows = index.select(commit_filter)
+                table = index.table.take(rows)
+        with _stage(timings, 'aggregate'):
+            from analysis.commit_aggregate import aggregate_commits
+            aggregates = aggregate_commits(table)
+        result.commits = len(table)
+        if WORDCLOUD_JOB in charts:
+            with _stage(timings, 'words'):
+                words = _word_frequencies(repo_path, rows)
+
+    suffix = ''
+    title_suffix = ''
+    if commit_filter is not None:
+        description = commit_filter.describe()
+        suffix = '_' + hashlib.sha1(description.encode()).hexdigest()[:8]
+        title_suffix = f' ({description})'
+    file_name = re.sub(r'[^\w.-]+', '_', name)
+
+    jobs = list(dict.fromkeys(charts + ([PANEL_JOB] if panel else [])))
+    futures = {}
+    render_start = time.perf_counter()
+    for job in jobs:
+        stem, title = _output_spec(job)
+        if job == WORDCLOUD_JOB:
+            if approximate:
+                kwargs = {'repo_path': repo_path, 'approximate': True}
+            else:
+                kwargs = {'frequencies': words}
+        else:
+            kwargs = {'title': title.format(name=name) + title_suffix, 'aggregates': aggregates}
+            if profile is not None:
+                kwargs['profile'] = profile
+        if output_dir is None:
+            future = pool.submit_png(job, **kwargs)
+        else:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            kwargs['output_file'] = str(output_dir / f'{stem}_{file_name}{suffix}.png')
+            future = pool.submit(job, **kwargs)
+        future.add_done_callback(
+            lambda _, job=job: timings.__setitem__(
+                f'render.{job}', time.perf_counter() - render_start
+            )
+        )
+        futures[job] = (future, kwargs.get('output_file'))
+
+    wait([future for future, _ in futures.values()])
+    timings['render'] = time.perf_counter() - render_start
+    for job, (future, output_file) in futures.items():
+        try:
+            png = future.result()
+        except Exception as e:
+            result.errors[job] = str(e)
+            continue
+        result.outputs[job] = output_file if output_file is not None else png
+    timings['total'] = time.perf_counter() - run_start
+    return result
+
+
+def main() -> int:
+    """Parse arguments and render the dashboard charts."""
+    parser = argparse.ArgumentParser(
+        description='Render all commit charts for a repository from one ingestion pass',
+        epilog='The word cloud sizes each word by the number of commits using it; with '
+               '--approximate, by the number of times it occurs.'
+    )
+    parser.add_argument('--repo', default='.', help='Repository to chart (default: .)')
+    parser.add_argument('--output-dir', default='images', help='Directory for the charts')
+    parser.add_argument('--charts', nargs='+', choices=sorted([*CHART_JOBS, WORDCLOUD_JOB]),
+                        default=DEFAULT_CHARTS, help='Charts to render')
+    parser.add_argument('--panel', action='store_true',
+                        help='Also render all aggregate charts as one multi-panel figure')
+    parser.add_argument('--render-workers', type=int, default=2, help='Parallel render processes')
+    add_approximate_argument(parser)
+    add_profile_argument(parser)
+    parser.add_argument('--web', action='store_true',
+                        help='Also write optimized web variants (quantized PNG, WebP, responsive '
+                             'widths) and a manifest to OUTPUT_DIR/web')
+    add_filter_arguments(parser)
+    args = parser.parse_args()
+    if args.approximate and 'avg_bar' in args.charts:
+        args.charts = [job for job in args.charts if job != 'avg_bar']
+        logger.warning("Skipping avg_bar: the daily distribution is not available approximately")
+
+    pool = RenderPool(size=args.render_workers)
+    try:
+        result = build_dashboard(
+            args.repo, args.charts, pool, get_repo_name(args.repo) or 'Repository',
+            output_dir=Path(args.output_dir), commit_filter=filter_from_args(args),
+            panel=args.panel, approximate=args.approximate, profile=args.profile
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        pool.shutdown()
+    web_report = None
+    if args.web:
+        from .optimize_images import optimize_images
+        with _stage(result.timings, 'web'):
+            web_report = optimize_images(args.output_dir)
+
+    print(f"{result.commits} commits")
+    if result.estimates is not None:
+        print(f"Estimates: {result.estimates}")
+    for job, output in result.outputs.items():
+        print(f"  {job:<14} {output}")
+    for job, error in result.errors.items():
+        print(f"  {job:<14} FAILED: {error}")
+    if web_report is not None:
+        from .optimize_images import print_report
+        print_report(web_report)
+    print('Timings:')
+    for stage, seconds in result.timings.items():
+        print(f"  {stage:<24} {seconds * 1000:8.1f} ms")
+    return 1 if result.errors or (web_report is not None and web_report.errors) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,19 +1,20 @@
 """Plot commits by day and month combined - DRY refactored."""
 import logging
-import sys
-from pathlib import Path
+from typing import TYPE_CHECKING
 
-import matplotlib.pyplot as plt
-
-sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'config'))
-
-logger = logging.getLogger(__name__)
-from constants import (
+from .constants import (
     DAYS_IN_WEEK, DAY_INDEX_MIN, DAY_INDEX_MAX,
     MONTHS_IN_YEAR, MONTH_INDEX_MIN, MONTH_INDEX_MAX,
     FIGURE_WIDTH_LARGE, FIGURE_HEIGHT, PIE_START_ANGLE
 )
-from plot_utils import read_count_file, save_chart
+from .plot_utils import (
+    get_pyplot, is_snapshot_file, read_count_file, read_snapshot_aggregates, save_chart
+)
+
+if TYPE_CHECKING:
+    from analysis.commit_aggregate import CommitAggregates
+
+logger = logging.getLogger(__name__)
 
 DAY_LABELS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
 MONTH_LABELS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
@@ -24,26 +25,41 @@ def plot_pie_day_month(
     day_file: str = 'commit_counts_day.txt',
     month_file: str = 'commit_counts_month.txt',
     output_file: str = 'images/commits_by_day_month.png',
-    title: str = 'Commits by Day of Week and Month'
+    title: str = 'Commits by Day of Week and Month',
+    aggregates: 'CommitAggregates | None' = None
 ) -> None:
-    """Generate two pie charts: commits by day and by month."""
-    try:
-        day_counts = read_count_file(
-            day_file, DAYS_IN_WEEK, DAY_INDEX_MIN, DAY_INDEX_MAX
-        )
-    except FileNotFoundError:
-        logger.error("File not found: %s", day_file)
-        return
-
-    try:
-        month_counts = read_count_file(
-            month_file, MONTHS_IN_YEAR, MONTH_INDEX_MIN, MONTH_INDEX_MAX, index_offset=1
-        )
-    except FileNotFoundError:
-        logger.error("File not found: %s", month_file)
-        return
-
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(FIGURE_WIDTH_LARGE, FIGURE_HEIGHT))
+    """Generate two pie charts: commits by day and by month.
+
+    When ``aggregates`` is given the counts come from it and
+    ``day_file``/``month_file`` are ignored. If either names a binary
+    snapshot (``analysis.commit_snapshot``), both charts are drawn from it.
+    """
+    snapshot_file = next((f for f in (day_file, month_file) if is_snapshot_file(f)), None)
+    if aggregates is None and snapshot_file is not None:
+        aggregates = read_snapshot_aggregates(snapshot_file)
+        if aggregates is None:
+            return
+    if aggregates is not None:
+        day_counts = aggregates.by_weekday
+        month_counts = aggregates.by_month
+    else:
+        try:
+            day_counts = read_count_file(
+                day_file, DAYS_IN_WEEK, DAY_INDEX_MIN, DAY_INDEX_MAX
+            )
+        except FileNotFoundError:
+            logger.error("File not found: %s", day_file)
+            return
+
+        try:
+            month_counts = read_count_file(
+                month_file, MONTHS_IN_YEAR, MONTH_INDEX_MIN, MONTH_INDEX_MAX, index_offset=1
+            )
+        except FileNotFoundError:
+            logger.error("File not found: %s", month_file)
+            return
+
+    fig, (ax1, ax2) = get_pyplot().subplots(1, 2, figsize=(FIGURE_WIDTH_LARGE, FIGURE_HEIGHT))
     fig.suptitle(title)
 
     ax1.pie(day_counts, labels=DAY_LABELS, autopct='%1.1f%%', startangle=PIE_START_ANGLE)
@@ -1,14 +1,19 @@
 """Plot commits by month - DRY refactored."""
 import argparse
 import logging
-import sys
-from pathlib import Path
+from typing import TYPE_CHECKING
 
-sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'config'))
+from .constants import MONTHS_IN_YEAR, MONTH_INDEX_MIN, MONTH_INDEX_MAX, FIGURE_SIZE_SQUARE
+from .plot_utils import (
+    read_count_file, is_snapshot_file, read_snapshot_aggregates, create_pie_chart, save_chart,
+    load_repo_aggregates, add_approximate_argument, add_filter_arguments, add_weight_argument,
+    filter_from_args
+)
+
+if TYPE_CHECKING:
+    from analysis.commit_aggregate import CommitAggregates
 
 logger = logging.getLogger(__name__)
-from constants import MONTHS_IN_YEAR, MONTH_INDEX_MIN, MONTH_INDEX_MAX, FIGURE_SIZE_SQUARE
-from plot_utils import read_count_file, create_pie_chart, save_chart
 
 MONTH_LABELS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
                 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
@@ -17,16 +22,29 @@ MONTH_LABELS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
 def plot_pie_month(
     input_file: str = 'commit_counts_month.txt',
     output_file: str = 'images/commits_by_month.png',
-    title: str = 'Commits by Month'
+    title: str = 'Commits by Month',
+    aggregates: 'CommitAggregates | None' = None
 ) -> None:
-    """Generate a pie chart of commit counts by month."""
-    try:
-        month_counts = read_count_file(
-            input_file, MONTHS_IN_YEAR, MONTH_INDEX_MIN, MONTH_INDEX_MAX, index_offset=1
-        )
-    except FileNotFoundError:
-        logger.error("File not found: %s", input_file)
-        return
+    """Generate a pie chart of commit counts by month.
+
+    When ``aggregates`` is given the counts come from it and ``input_file``
+    is ignored; ``input_file`` may also be a binary snapshot
+    (``analysis.commit_snapshot``).
+    """
+    if aggregates is None and is_snapshot_file(input_file):
+        aggregates = read_snapshot_aggregates(input_file)
+        if aggregates is None:
+            return
+    if aggregates is not None:
+        month_counts = aggregates.by_month
+    else:
+        try:
+            month_counts = read_count_file(
+                input_file, MONTHS_IN_YEAR, MONTH_INDEX_MIN, MONTH_INDEX_MAX, index_offset=1
+            )
+        except FileNotFoundError:
+            logger.error("File not found: %s", input_file)
+            return
 
     create_pie_chart(
         month_counts, MONTH_LABELS, title, (FIGURE_SIZE_SQUARE, FIGURE_SIZE_SQUARE)
@@ -37,11 +55,22 @@ def plot_pie_month(
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Generate pie chart of commits by month')
     parser.add_argument('--input', default='commit_counts_month.txt',
-                        help='Input file with month and count data')
+                        help='Input file with month and count data, or a binary snapshot (.npz)')
     parser.add_argument('--output', default='images/commits_by_month.png',
                         help='Output PNG file')
     parser.add_argument('--title', default='Commits by Month',
                         help='Chart title')
+    parser.add_argument('--repo',
+                        help='Read history directly from this git repository instead of --input')
+    add_weight_argument(parser)
+    add_approximate_argument(parser)
+    add_filter_arguments(parser)
 
     args = parser.parse_args()
-    plot_pie_month(input_file=args.input, output_file=args.output, title=args.title)
+    aggregates = (
+        load_repo_aggregates(
+            args.repo, filter_from_args(args), args.weight, args.approximate
+        ) if args.repo else None
+    )
+    plot_pie_month(input_file=args.input, output_file=args.output, title=args.title,
+               aggregates=aggregates)
@@ -4,15 +4,14 @@ Wrapper script that creates charts with repository name in title and output
 filename based on the current git repository name.
 """
 import argparse
-import sys
-from pathlib import Path
 
-# Add analysis directory to path for repo_utils
-sys.path.insert(0, str(Path(__file__).parent.parent / 'analysis'))
-
-from plot_commits_by_hour import plot_commits_by_hour
-from plot_pie_day_month import plot_pie_day_month
-from repo_utils import get_repo_name
+from analysis.repo_utils import get_repo_name
+from .plot_commits_by_hour import plot_commits_by_hour
+from .plot_pie_day_month import plot_pie_day_month
+from .plot_utils import (
+    add_approximate_argument, add_filter_arguments, add_weight_argument, filter_from_args,
+    load_repo_aggregates
+)
 
 
 def main():
@@ -26,22 +25,50 @@ def main():
         default='hour',
         help='Chart type: "hour" for bar chart by hour, "pie" for day/month pie charts'
     )
+    parser.add_argument(
+        '--from-files',
+        action='store_true',
+        help='Read the commit_counts*.txt files from the analysis scripts '
+             'instead of ingesting git history directly'
+    )
+    parser.add_argument(
+        '--snapshot',
+        metavar='FILE',
+        help='Read every count from this binary snapshot '
+             '(python -m analysis.commit_snapshot build) instead of git history'
+    )
+    add_weight_argument(parser)
+    add_approximate_argument(parser)
+    add_filter_arguments(parser)
     args = parser.parse_args()
+    commit_filter = filter_from_args(args)
+    from_files = args.from_files or args.snapshot is not None
+    if args.from_files and args.snapshot:
+        parser.error('--from-files and --snapshot are mutually exclusive')
+    if from_files and (commit_filter is not None or args.weight != 'commits'):
+        parser.error('history filters and --weight cannot be combined with --from-files/--snapshot')
+    if args.approximate and (from_files or commit_filter is not None or args.weight != 'commits'):
+        parser.error('--approximate cannot be combined with --from-files, --snapshot, filters or --weight')
 
     repo_name = get_repo_name() or "Repository"
+    aggregates = None if from_files else load_repo_aggregates(
+        '.', commit_filter, args.weight, args.approximate
+    )
 
     if args.chart_type == 'hour':
         plot_commits_by_hour(
-            input_file='commit_counts.txt',
+            input_file=args.snapshot or 'commit_counts.txt',
             output_file=f'images/commits_by_hour_{repo_name}.png',
-            title=f'Git Commits by Hour of Day for {repo_name}'
+            title=f'Git Commits by Hour of Day for {repo_name}',
+            aggregates=aggregates
         )
     else:  # pie
         plot_pie_day_month(
-            day_file='commit_counts_day.txt',
+            day_file=args.snapshot or 'commit_counts_day.txt',
             month_file='commit_counts_month.txt',
             output_file=f'images/commits_by_day_month_{repo_name}.png',
-            title=f'Commits by Day of Week and Month for {repo_name}'
+            title=f'Commits by Day of Week and Month for {repo_name}',
+            aggregates=aggregates
         )
 
 
@@ -0,0 +1,118 @@
+"""Plot daily commits over the full history with rolling statistics.
+
+The daily series, rolling mean and rolling percentile band are computed
+over every day (``analysis.commit_timeseries``); only the plotted points are
+downsampled with LTTB, so a ten-year chart draws a few thousand points
+rather than every day and the PNG stays small.
+
+Usage (from ``utils/``)::
+
+    python -m plotting.plot_timeseries --repo . --window 28 --percentiles 10 90
+    python -m plotting.plot_timeseries --repo . --since 2020-01-01 --max-points 500
+    python -m plotting.plot_timeseries --snapshot commit_snapshot.npz --resample 7
+"""
+import argparse
+import logging
+from typing import TYPE_CHECKING
+
+from .constants import FIGURE_HEIGHT, FIGURE_WIDTH_LARGE, GRID_ALPHA
+from .plot_utils import add_filter_arguments, filter_from_args, get_pyplot, load_repo_table, save_chart
+
+if TYPE_CHECKING:
+    from analysis.commit_timeseries import DailySeries
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_DAYS = 28
+DEFAULT_MAX_POINTS = 2000
+
+
+def plot_timeseries(
+    series: 'DailySeries',
+    output_file: str = 'images/commits_timeseries.png',
+    title: str = 'Commits per Day',
+    window: int = DEFAULT_WINDOW_DAYS,
+    percentiles: tuple[float, float] | None = None,
+    max_points: int = DEFAULT_MAX_POINTS
+) -> None:
+    """Plot daily commits, their rolling mean and an optional percentile band.
+
+    Args:
+        series: Daily commit series
+        output_file: Path to save the output PNG
+        title: Title of the plot
+        window: Rolling window in entries (days, or weeks when resampled weekly)
+        percentiles: Lower and upper rolling percentiles to shade, e.g. (10, 90)
+        max_points: Points kept per line after LTTB downsampling
+    """
+    from analysis.commit_timeseries import lttb
+
+    if not len(series):
+        logger.warning("No commits to plot")
+        return
+    days = series.dates
+    x = days.astype('int64')
+    mean = series.rolling_mean(window)
+    span = window * series.step
+    unit = 'day' if series.step == 1 else f'{series.step} days'
+
+    plt = get_pyplot()
+    fig, ax = plt.subplots(figsize=(FIGURE_WIDTH_LARGE, FIGURE_HEIGHT))
+    kept = lttb(x, series.counts, max_points)
+    ax.plot(days[kept], series.counts[kept], color='#a0cbe8', linewidth=0.6, label=f'Commits per {unit}')
+    # The band is sampled where the mean is, so it follows the trend line
+    kept = lttb(x, mean, max_points)
+    if percentiles is not None:
+        low, high = series.rolling_percentiles(window, list(percentiles))
+        ax.fill_between(days[kept], low[kept], high[kept], color='#f28e2b', alpha=0.3,
+                        label=f'{span}-day p{percentiles[0]:g}-p{percentiles[1]:g}')
+    ax.plot(days[kept], mean[kept], color='#4e79a7', linewidth=1.5, label=f'{span}-day mean')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Number of Commits')
+    ax.set_title(title)
+    ax.grid(True, axis='y', linestyle='--', alpha=GRID_ALPHA)
+    ax.legend(loc='upper left')
+    fig.autofmt_xdate()
+    save_chart(output_file)
+
+
+def main():
+    """Parse arguments and plot the repository's daily commit series."""
+    parser = argparse.ArgumentParser(description='Plot daily commits with rolling statistics')
+    parser.add_argument('--repo', default='.', help='Repository to read (default: .)')
+    parser.add_argument('--snapshot', metavar='FILE',
+                        help='Use the daily series stored in this binary snapshot instead of --repo')
+    parser.add_argument('--output', default='images/commits_timeseries.png', help='Output PNG file')
+    parser.add_argument('--title', default='Commits per Day', help='Chart title')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW_DAYS,
+                        help=f'Rolling window in (resampled) points (default: {DEFAULT_WINDOW_DAYS})')
+    parser.add_argument('--percentiles', type=float, nargs=2, metavar=('LOW', 'HIGH'),
+                        help='Shade the rolling LOW-HIGH percentile band, e.g. 10 90')
+    parser.add_argument('--resample', type=int, default=1, metavar='DAYS',
+                        help='Sum into DAYS-day buckets first (e.g. 7 for weekly)')
+    parser.add_argument('--max-points', type=int, default=DEFAULT_MAX_POINTS,
+                        help='Points drawn per line after LTTB downsampling')
+    add_filter_arguments(parser)
+    args = parser.parse_args()
+
+    commit_filter = filter_from_args(args)
+    if args.snapshot:
+        if commit_filter is not None:
+            parser.error('history filters cannot be combined with --snapshot')
+        from analysis.commit_snapshot import load_snapshot
+        try:
+            series = load_snapshot(args.snapshot).daily
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    else:
+        from analysis.commit_timeseries import daily_series
+        series = daily_series(load_repo_table(args.repo, commit_filter))
+    if args.resample > 1:
+        series = series.resample(args.resample)
+    title = args.title if args.resample == 1 or args.title != parser.get_default('title') \
+        else f'Commits per {args.resample} Days'
+    plot_timeseries(series, args.output, title, args.window, args.percentiles, args.max_points)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,146 @@
 """Shared plotting utilities - DRY refactored from individual plot modules."""
+import argparse
 import logging
-import sys
-from pathlib import Path
+from types import ModuleType
+from typing import TYPE_CHECKING, BinaryIO
 
-import matplotlib.pyplot as plt
+from analysis.tracing import span
+from .constants import PIE_START_ANGLE, SAVE_DPI_HIGH, GRID_ALPHA
 
-sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'config'))
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
+    from analysis.commit_aggregate import CommitAggregates
+    from analysis.commit_ingest import CommitTable
+    from analysis.commit_query import CommitFilter
 
 logger = logging.getLogger(__name__)
-from constants import PIE_START_ANGLE, SAVE_DPI_HIGH, GRID_ALPHA
+
+# What the hour/day/month histograms can measure, with their axis labels
+WEIGHT_LABELS = {
+    'commits': 'Number of Commits',
+    'churn': 'Lines Changed',
+    'added': 'Lines Added',
+    'removed': 'Lines Removed',
+}
+# Count inputs with this suffix are binary snapshots (``analysis.commit_snapshot``)
+SNAPSHOT_SUFFIX = '.npz'
+
+
+def get_pyplot() -> ModuleType:
+    """Import ``matplotlib.pyplot`` on first render.
+
+    Deferring the import keeps ``--help`` and MCP tool listing fast; the
+    module is cached by Python after the first call.
+    """
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add ``--since``/``--until``/``--author``/``--path`` history filters."""
+    group = parser.add_argument_group('history filters (only when reading git history)')
+    group.add_argument('--since', help='Only commits on or after this ISO date/datetime')
+    group.add_argument('--until', help='Only commits before this ISO datetime, or on/before this date')
+    group.add_argument('--author', help='Only commits whose "Name <email>" contains this text')
+    group.add_argument('--path', help='Only commits touching this file or directory')
+
+
+def add_weight_argument(parser: argparse.ArgumentParser) -> None:
+    """Add ``--weight`` to count commits or sum their churn."""
+    parser.add_argument('--weight', choices=list(WEIGHT_LABELS), default='commits',
+                        help='Count commits, or sum lines changed/added/removed per commit '
+                             '(churn needs --repo; diffs are cached per commit)')
+
+
+def add_approximate_argument(parser: argparse.ArgumentParser) -> None:
+    """Add ``--approximate`` for constant-memory sketches (``analysis.commit_sketch``)."""
+    parser.add_argument('--approximate', action='store_true',
+                        help='Stream history into fixed-size sketches instead of loading it '
+                             '(constant memory; needs --repo, no filters or --weight)')
+
+
+def filter_from_args(args: argparse.Namespace) -> 'CommitFilter | None':
+    """Build a ``CommitFilter`` from ``add_filter_arguments`` options, if any were given."""
+    values = {name: getattr(args, name, None) for name in ('since', 'until', 'author', 'path')}
+    if all(value is None for value in values.values()):
+        return None
+    from analysis.commit_query import CommitFilter
+    return CommitFilter(**values)
+
+
+def load_repo_table(
+    repo_path: str,
+    commit_filter: 'CommitFilter | None' = None
+) -> 'CommitTable':
+    """Load a repository's history via the commit cache, optionally filtered."""
+    if commit_filter is None:
+        from analysis.commit_cache import load_commit_table
+        return load_commit_table(repo_path)
+    from analysis.commit_query import load_commit_index
+    return load_commit_index(repo_path).filter(commit_filter)
+
+
+def load_repo_aggregates(
+    repo_path: str,
+    commit_filter: 'CommitFilter | None' = None,
+    weight: str = 'commits',
+    approximate: bool = False
+) -> 'CommitAggregates':
+    """Load (via the commit cache) and aggregate a repository's history.
+
+    Args:
+        repo_path: Path to the git working tree
+        commit_filter: Restrict the aggregation to matching commits
+        weight: One of ``WEIGHT_LABELS``; anything but ``"commits"`` weights
+            the hour/day/month histograms by per-commit churn
+        approximate: Stream the history into constant-memory sketches; the
+            hour/day/month histograms stay exact, day counts are estimates
+            and the daily distribution is unavailable
+
+    Raises:
+        ValueError: If ``approximate`` is combined with a filter or weight
+    """
+    if approximate:
+        if commit_filter is not None or weight != 'commits':
+            raise ValueError("Approximate mode does not support filters or weights")
+        from analysis.commit_sketch import sketch_commits
+        sketch = sketch_commits(repo_path)
+        logger.info("Sketch estimates: %s", sketch.summary())
+        return sketch.to_aggregates()
+    from analysis.commit_aggregate import aggregate_commits
+    table = load_repo_table(repo_path, commit_filter)
+    if weight == 'commits':
+        return aggregate_commits(table)
+    from analysis.commit_churn import aggregate_churn
+    return aggregate_churn(repo_path, table, weight)
+
+
+def value_label(aggregates: 'CommitAggregates | None') -> str:
+    """Axis label for what ``aggregates`` histograms measure."""
+    return WEIGHT_LABELS.get(aggregates.weight if aggregates is not None else 'commits',
+                             WEIGHT_LABELS['commits'])
+
+
+def is_snapshot_file(filepath: 'str | None') -> bool:
+    """Whether a count input path names a binary snapshot rather than a text file."""
+    return filepath is not None and str(filepath).endswith(SNAPSHOT_SUFFIX)
+
+
+def read_snapshot_aggregates(filepath: str) -> 'CommitAggregates | None':
+    """Histograms from a binary snapshot, mapped without copying.
+
+    Returns:
+        The snapshot's aggregates, or None (logged) if it cannot be read
+    """
+    from analysis.commit_snapshot import load_snapshot
+    try:
+        return load_snapshot(filepath).aggregates
+    except FileNotFoundError:
+        logger.error("File not found: %s", filepath)
+    except ValueError as e:
+        logger.error("Unreadable snapshot: %s", e)
+    return None
 
 
 def _parse_count_line(line: str) -> tuple[int, int] | None:
@@ -58,14 +190,17 @@ def read_count_file(
     return counts
 
 
-def save_chart(output_file: str, dpi: int = SAVE_DPI_HIGH) -> None:
+def save_chart(output_file: 'str | BinaryIO', dpi: int = SAVE_DPI_HIGH) -> None:
     """Save the current matplotlib figure and close it.
 
     Args:
-        output_file: Path to save the figure
+        output_file: Path to save the figure, or a binary buffer to write a PNG into
         dpi: Resolution for saved image
     """
-    plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+    plt = get_pyplot()
+    # Rasterizing and PNG encoding both happen here
+    with span('plot.save_chart', dpi=dpi):
+        plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
     plt.close()
     logger.info("Chart saved as %s", output_file)
 
@@ -76,7 +211,7 @@ def create_pie_chart(
     title: str,
     figsize: tuple[float, float],
     start_angle: int = PIE_START_ANGLE
-) -> plt.Axes:
+) -> 'Axes':
     """Create a pie chart with the given data.
 
     Args:
@@ -89,9 +224,10 @@ def create_pie_chart(
     Returns:
         The matplotlib Axes object
     """
-    fig, ax = plt.subplots(figsize=figsize)
-    ax.pie(counts, labels=labels, autopct='%1.1f%%', startangle=start_angle)
-    ax.set_title(title)
+    with span('plot.create_chart', kind='pie'):
+        fig, ax = get_pyplot().subplots(figsize=figsize)
+        ax.pie(counts, labels=labels, autopct='%1.1f%%', startangle=start_angle)
+        ax.set_title(title)
     return ax
 
 
@@ -105,7 +241,7 @@ def create_bar_chart(
     color: str = '#4e79a7',
     edgecolor: str = '#2e4977',
     show_grid: bool = True
-) -> plt.Axes:
+) -> 'Axes':
     """Create a bar chart with the given data.
 
     Args:
@@ -122,12 +258,14 @@ def create_bar_chart(
     Returns:
         The matplotlib Axes object
     """
-    fig, ax = plt.subplots(figsize=figsize)
-    ax.bar(x_values, y_values, color=color, edgecolor=edgecolor, linewidth=1)
-    ax.set_xlabel(xlabel)
-    ax.set_ylabel(ylabel)
-    ax.set_title(title)
-    if show_grid:
-        ax.grid(True, axis='y', linestyle='--', alpha=GRID_ALPHA)
-    plt.tight_layout()
+    plt = get_pyplot()
+    with span('plot.create_chart', kind='bar'):
+        fig, ax = plt.subplots(figsize=figsize)
+        ax.bar(x_values, y_values, color=color, edgecolor=edgecolor, linewidth=1)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.set_title(title)
+        if show_grid:
+            ax.grid(True, axis='y', linestyle='--', alpha=GRID_ALPHA)
+        plt.tight_layout()
     return ax
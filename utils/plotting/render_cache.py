@@ -0,0 +1,174 @@
+"""Content-addressed cache of rendered chart images.
+
+Keys are hashes of everything that determines a chart's pixels (repository
+tip SHA, chart type, title, render parameters), so a hit can be served by
+copying a PNG instead of re-aggregating and re-drawing. Entries are evicted
+least-recently-used first once the cache exceeds its size budget, and any
+entry idle for longer than the maximum age is dropped. Entries and the
+copies handed out are written to a temporary file and renamed into place,
+so a concurrent reader sees either the whole image or none.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from analysis.repo_utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Bump when plotting code changes in a way that alters rendered output
+RENDER_CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+
+def write_file(path: str | Path, data: bytes) -> None:
+    """Atomically replace ``path`` with ``data``."""
+    with atomic_write(path) as f:
+        f.write(data)
+
+
+def copy_file(source: str | Path, path: str | Path) -> None:
+    """Atomically replace ``path`` with a copy of ``source``."""
+    with open(source, 'rb') as src, atomic_write(path) as f:
+        shutil.copyfileobj(src, f)
+
+
+@dataclass
+class RenderCacheStats:
+    """Counters describing render cache effectiveness."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {**asdict(self), 'hit_rate': round(self.hit_rate, 4)}
+
+
+class RenderCache:
+    """On-disk LRU cache of rendered images keyed by render inputs."""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+        suffix: str = '.png'
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.suffix = suffix
+        self.stats = RenderCacheStats()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(**parts: object) -> str:
+        """Hash the render inputs into a cache key."""
+        payload = json.dumps(
+            {'version': RENDER_CACHE_VERSION, **parts}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f'{key}{self.suffix}'
+
+    def get(self, key: str) -> Path | None:
+        """Return the cached file for ``key`` and mark it as recently used.
+
+        Returns:
+            Path to the cached image, or None on a miss
+        """
+        path = self._path(key)
+        now = time.time()
+        try:
+            if now - path.stat().st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                raise FileNotFoundError(path)
+            os.utime(path, (now, now))
+        except FileNotFoundError:
+            with self._lock:
+                self.stats.misses += 1
+            return None
+        with self._lock:
+            self.stats.hits += 1
+        return path
+
+    def fetch(self, key: str, output_file: str) -> bool:
+        """Copy the cached image for ``key`` to ``output_file`` on a hit."""
+        cached = self.get(key)
+        if cached is None:
+            return False
+        try:
+            copy_file(cached, output_file)
+        except FileNotFoundError:
+            # Evicted by another caller between lookup and copy
+            return False
+        return True
+
+    def get_bytes(self, key: str) -> bytes | None:
+        """Return the cached image for ``key`` on a hit, else None."""
+        cached = self.get(key)
+        if cached is None:
+            return None
+        try:
+            return cached.read_bytes()
+        except FileNotFoundError:
+            # Evicted by another caller between lookup and read
+            return None
+
+    def put(self, key: str, source_file: str) -> Path:
+        """Store a copy of ``source_file`` under ``key`` and enforce limits."""
+        path = self._path(key)
+        copy_file(source_file, path)
+        self.evict()
+        return path
+
+    def put_bytes(self, key: str, data: bytes) -> Path:
+        """Store ``data`` under ``key`` and enforce limits."""
+        path = self._path(key)
+        write_file(path, data)
+        self.evict()
+        return path
+
+    def evict(self) -> int:
+        """Drop idle entries, then least-recently-used ones over the size budget.
+
+        Returns:
+            Number of entries removed
+        """
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.glob(f'*{self.suffix}'):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if total <= self.max_bytes and now - mtime <= self.max_age_seconds:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        if removed:
+            with self._lock:
+                self.stats.evictions += removed
+            logger.info("Evicted %d rendered charts from %s", removed, self.cache_dir)
+        return removed
@@ -0,0 +1,299 @@
+"""Batch rendering fast path: reusable template figures and render profiles.
+
+``create_bar_chart``/``create_pie_chart`` build, lay out, save and close a
+new figure for every chart. ``ChartEngine`` instead keeps one template
+figure per chart type and only updates what differs between repositories:
+bar heights and y limits, wedge angles with their label positions and
+percentages, and the title texts. ``tight_layout`` runs once per template
+and y-axis label width and is reused after that. Templates are plain
+``matplotlib.figure.Figure`` objects on an Agg canvas, never registered
+with pyplot.
+
+Render profiles (``RENDER_PROFILES``) make the quality/speed trade
+explicit: ``preview`` saves small, quickly compressed PNGs without the
+extra tight-bounding-box pass, ``publication`` matches the chart CLIs.
+
+The render pool uses an engine (one per profile and worker) for jobs
+submitted with ``profile=``; ``plot_batch``, ``plot_dashboard`` and
+``watch_charts`` take ``--profile``.
+
+Usage (from ``utils/``)::
+
+    python -m plotting.plot_batch --scan ~/src --profile preview
+"""
+import argparse
+import logging
+import math
+from collections.abc import Hashable, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from analysis.tracing import span
+from .constants import (
+    FIGURE_HEIGHT, FIGURE_SIZE_SQUARE, FIGURE_WIDTH_LARGE, FIGURE_WIDTH_STANDARD, GRID_ALPHA,
+    HOURS_IN_DAY, PIE_START_ANGLE, SAVE_DPI_HIGH, SAVE_DPI_PREVIEW, SAVE_DPI_STANDARD,
+    XLABEL_ROTATION
+)
+from .plot_pie_day_month import DAY_LABELS, MONTH_LABELS
+from .plot_utils import value_label
+
+if TYPE_CHECKING:
+    from matplotlib.text import Text
+
+    from analysis.commit_aggregate import CommitAggregates
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    """How charts are rasterized and encoded.
+
+    Attributes:
+        dpi: Output resolution
+        tight_bbox: Crop the PNG to the drawn artists (``bbox_inches='tight'``),
+            which costs an extra layout pass per save
+        compress_level: zlib level of the PNG (0-9; lower is faster but larger)
+    """
+    dpi: int
+    tight_bbox: bool = True
+    compress_level: int = 6
+
+
+RENDER_PROFILES = {
+    'preview': RenderProfile(dpi=SAVE_DPI_PREVIEW, tight_bbox=False, compress_level=1),
+    'standard': RenderProfile(dpi=SAVE_DPI_STANDARD, tight_bbox=False),
+    'publication': RenderProfile(dpi=SAVE_DPI_HIGH),
+}
+DEFAULT_PROFILE = 'publication'
+# render_pool jobs the engine can draw; others fall back to their plot module
+ENGINE_JOBS = ('hour_bar', 'day_pie', 'month_pie', 'day_month_pie', 'avg_bar')
+
+PIE_LABEL_DISTANCE = 1.1
+PIE_PCT_DISTANCE = 0.6
+PIE_PCT_FORMAT = '%1.1f%%'
+HOUR_LABELS = [f"{h:02d}" for h in range(HOURS_IN_DAY)]
+
+
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    """Add ``--profile`` to pick a render profile."""
+    parser.add_argument('--profile', choices=list(RENDER_PROFILES), default=DEFAULT_PROFILE,
+                        help='Render profile: preview (low DPI, fast), standard, or '
+                             f'publication (default: {DEFAULT_PROFILE})')
+
+
+class _Template:
+    """A figure kept alive between renders, with its cached layouts.
+
+    ``crop`` is False for charts whose plot module saves the full figure
+    rather than a tight bounding box.
+    """
+
+    def __init__(self, figsize: tuple[float, float], crop: bool = True) -> None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        self.crop = crop
+        self.figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figure)
+        self._layouts: dict[Hashable, tuple[float, ...]] = {}
+
+    def layout(self, key: Hashable) -> None:
+        """Apply the tight layout computed for ``key``, computing it on first use."""
+        params = self._layouts.get(key)
+        if params is None:
+            self.figure.tight_layout()
+            p = self.figure.subplotpars
+            self._layouts[key] = (p.left, p.bottom, p.right, p.top, p.wspace, p.hspace)
+        else:
+            self.figure.subplots_adjust(*params)
+
+
+class _BarTemplate(_Template):
+    """Bar chart whose bar heights, y label and title are updated in place."""
+
+    def __init__(
+        self,
+        figsize: tuple[float, float],
+        categories: Sequence[str],
+        xlabel: str,
+        bar_style: dict[str, Any],
+        show_grid: bool = False,
+        rotate_labels: bool = False,
+        crop: bool = True
+    ) -> None:
+        super().__init__(figsize, crop)
+        ax = self.ax = self.figure.subplots()
+        self.bars = ax.bar(categories, [0] * len(categories), **bar_style)
+        ax.set_xlabel(xlabel)
+        self.ylabel = ax.set_ylabel('')
+        self.title = ax.set_title('')
+        if show_grid:
+            ax.grid(True, axis='y', linestyle='--', alpha=GRID_ALPHA)
+        if rotate_labels:
+            for label in ax.get_xticklabels():
+                label.set(rotation=XLABEL_ROTATION, ha='right')
+
+    def draw(self, heights: Sequence[int], title: str, ylabel: str) -> None:
+        for bar, height in zip(self.bars, heights):
+            bar.set_height(height)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.title.set_text(title)
+        self.ylabel.set_text(ylabel)
+        # Only the y tick labels' width changes the layout between charts
+        self.layout((len(f'{self.ax.get_ylim()[1]:.0f}'), ylabel))
+
+
+class _PieTemplate(_Template):
+    """One or more pies whose wedges, labels and titles are updated in place."""
+
+    def __init__(
+        self,
+        figsize: tuple[float, float],
+        panels: Sequence[tuple[Sequence[str], str | None]],
+        suptitle: bool = False
+    ) -> None:
+        super().__init__(figsize)
+        axes = self.figure.subplots(1, len(panels), squeeze=False)[0]
+        self.pies = []
+        for ax, (labels, subtitle) in zip(axes, panels):
+            # Equal placeholder slices; draw() sets the real angles
+            wedges, texts, autotexts = ax.pie(
+                [1] * len(labels), labels=labels, autopct=PIE_PCT_FORMAT,
+                startangle=PIE_START_ANGLE
+            )
+            self.pies.append((wedges, texts, autotexts))
+            if subtitle is not None:
+                ax.set_title(subtitle)
+        self.title = self.figure.suptitle('') if suptitle else axes[0].set_title('')
+
+    def draw(self, counts: Sequence[Sequence[int]], title: str) -> None:
+        for (wedges, texts, autotexts), values in zip(self.pies, counts):
+            _update_pie(wedges, texts, autotexts, values)
+        self.title.set_text(title)
+
+
+def _update_pie(wedges: list, texts: list['Text'], autotexts: list['Text'],
+                values: Sequence[int]) -> None:
+    """Move wedges and their labels to ``values`` the way ``Axes.pie`` places them."""
+    total = float(sum(values))
+    if total <= 0:
+        raise ValueError("Cannot draw a pie chart of all-zero counts")
+    theta1 = PIE_START_ANGLE / 360
+    for wedge, label, pct, value in zip(wedges, texts, autotexts, values):
+        frac = value / total
+        theta2 = theta1 + frac
+        wedge.set_theta1(360 * theta1)
+        wedge.set_theta2(360 * theta2)
+        thetam = math.pi * (theta1 + theta2)
+        x, y = math.cos(thetam), math.sin(thetam)
+        label.set_position((PIE_LABEL_DISTANCE * x, PIE_LABEL_DISTANCE * y))
+        label.set_horizontalalignment('left' if x > 0 else 'right')
+        pct.set_position((PIE_PCT_DISTANCE * x, PIE_PCT_DISTANCE * y))
+        pct.set_text(PIE_PCT_FORMAT % (100 * frac))
+        theta1 = theta2
+
+
+class ChartEngine:
+    """Renders chart jobs by updating long-lived template figures.
+
+    Not thread-safe; the render pool keeps one engine per profile in each
+    worker process (``engine_for``).
+    """
+
+    def __init__(self, profile: str = DEFAULT_PROFILE) -> None:
+        try:
+            self.profile = RENDER_PROFILES[profile]
+        except KeyError:
+            raise ValueError(f"Unknown render profile: {profile}") from None
+        self.profile_name = profile
+        self._templates: dict[Hashable, _Template] = {}
+
+    def _template(self, key: Hashable, build: Any) -> tuple[Any, bool]:
+        template = self._templates.get(key)
+        if template is not None:
+            return template, True
+        template = self._templates[key] = build()
+        return template, False
+
+    def render(
+        self,
+        job: str,
+        output_file: 'str | BinaryIO',
+        title: str,
+        aggregates: 'CommitAggregates | None' = None
+    ) -> None:
+        """Draw one chart into ``output_file`` (a path or a binary buffer).
+
+        Args:
+            job: One of ``ENGINE_JOBS``
+            output_file: Where to save the PNG
+            title: Chart (or figure) title
+            aggregates: Histograms to draw
+
+        Raises:
+            ValueError: If the job is unknown, ``aggregates`` is missing or a
+                pie would be empty
+        """
+        if job not in ENGINE_JOBS:
+            raise ValueError(f"The render engine cannot draw {job}")
+        if aggregates is None:
+            raise ValueError("The render engine draws from aggregates only")
+        with span('plot.create_chart', kind=job, profile=self.profile_name) as attrs:
+            if job == 'hour_bar':
+                template, attrs['reused'] = self._template(job, lambda: _BarTemplate(
+                    (FIGURE_WIDTH_STANDARD, FIGURE_HEIGHT), HOUR_LABELS, 'Hour of Day (0-23)',
+                    {'color': '#4e79a7', 'edgecolor': '#2e4977', 'linewidth': 1},
+                    show_grid=True,
+                ))
+                template.draw(aggregates.by_hour, title, value_label(aggregates))
+            elif job == 'avg_bar':
+                categories, days = aggregates.distribution_items()
+                if not categories:
+                    logger.warning("No commit distribution data; skipping %s", output_file)
+                    return
+                # One template per set of non-empty buckets
+                template, attrs['reused'] = self._template(
+                    (job, tuple(categories)), lambda: _BarTemplate(
+                        (FIGURE_WIDTH_STANDARD, FIGURE_HEIGHT), categories, 'Commits per Day',
+                        {'color': 'skyblue', 'edgecolor': 'black'}, rotate_labels=True,
+                        crop=False,
+                    )
+                )
+                template.draw(days, title, 'Number of Days')
+            elif job == 'day_month_pie':
+                template, attrs['reused'] = self._template(job, lambda: _PieTemplate(
+                    (FIGURE_WIDTH_LARGE, FIGURE_HEIGHT),
+                    [(DAY_LABELS, 'Commits by Day of Week'), (MONTH_LABELS, 'Commits by Month')],
+                    suptitle=True,
+                ))
+                template.draw([aggregates.by_weekday, aggregates.by_month], title)
+            else:
+                labels, counts = ((DAY_LABELS, aggregates.by_weekday) if job == 'day_pie'
+                                  else (MONTH_LABELS, aggregates.by_month))
+                template, attrs['reused'] = self._template(job, lambda: _PieTemplate(
+                    (FIGURE_SIZE_SQUARE, FIGURE_SIZE_SQUARE), [(labels, None)]
+                ))
+                template.draw([counts], title)
+        self._save(template, output_file)
+
+    def _save(self, template: _Template, output_file: 'str | BinaryIO') -> None:
+        profile = self.profile
+        with span('plot.save_chart', dpi=profile.dpi, profile=self.profile_name):
+            template.figure.savefig(
+                output_file, dpi=profile.dpi,
+                bbox_inches='tight' if profile.tight_bbox and template.crop else None,
+                pil_kwargs={'compress_level': profile.compress_level},
+            )
+        logger.info("Chart saved as %s", output_file)
+
+
+_engines: dict[str, ChartEngine] = {}
+
+
+def engine_for(profile: str) -> ChartEngine:
+    """This process's engine for ``profile``, created on first use."""
+    engine = _engines.get(profile)
+    if engine is None:
+        engine = _engines[profile] = ChartEngine(profile)
+    return engine
@@ -0,0 +1,237 @@
+"""Pool of long-lived, pre-warmed chart render workers.
+
+Each worker process selects the Agg backend and imports matplotlib, the
+plotting modules and their fonts once, then renders any number of chart
+jobs sent over the executor's queue. Workers are recycled after a fixed
+number of jobs so matplotlib's caches (and ``render_engine`` templates)
+cannot grow without bound.
+"""
+import importlib
+import io
+import logging
+import multiprocessing
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from analysis.tracing import Span, collect, current_parent, record_interval, record_spans, span
+from .render_engine import DEFAULT_PROFILE, ENGINE_JOBS, RENDER_PROFILES, engine_for
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_JOBS_PER_WORKER = 50
+
+# Job name -> (plotting submodule, function); every function accepts
+# output_file/title/aggregates
+CHART_JOBS = {
+    'hour_bar': ('.plot_commits_by_hour', 'plot_commits_by_hour'),
+    'day_pie': ('.plot_pie_day', 'plot_pie_day'),
+    'month_pie': ('.plot_pie_month', 'plot_pie_month'),
+    'day_month_pie': ('.plot_pie_day_month', 'plot_pie_day_month'),
+    'avg_bar': ('.plot_avg_commits', 'plot_avg_commits'),
+    'dashboard': ('.plot_dashboard', 'plot_dashboard'),
+}
+WORDCLOUD_JOB = 'wordcloud'
+
+# Job name -> (output file stem, title template with a {name} placeholder)
+CHART_OUTPUTS = {
+    'hour_bar': ('commits_by_hour', 'Git Commits by Hour of Day for {name}'),
+    'day_pie': ('commits_by_day', 'Commits by Day of Week for {name}'),
+    'month_pie': ('commits_by_month', 'Commits by Month for {name}'),
+    'day_month_pie': ('commits_by_day_month', 'Commits by Day of Week and Month for {name}'),
+    'avg_bar': ('average_commits', 'Distribution of Daily Commit Counts for {name}'),
+    'dashboard': ('commit_dashboard', 'Commit Activity for {name}'),
+}
+# Job name -> CommitAggregates fields it draws; it only needs redrawing
+# when one of them changes
+CHART_FIELDS = {
+    'hour_bar': ('by_hour',),
+    'day_pie': ('by_weekday',),
+    'month_pie': ('by_month',),
+    'day_month_pie': ('by_weekday', 'by_month'),
+    'avg_bar': ('daily_distribution',),
+    'dashboard': ('by_hour', 'by_weekday', 'by_month', 'daily_distribution'),
+}
+
+_worker_jobs: dict[str, Any] = {}
+# Set by _warm_worker and reported with the worker's first job, so a
+# recycled worker's start-up shows up in the trace that waited for it
+_worker_start: tuple[int, int] | None = None
+
+
+def _render_wordcloud(
+    output_file: str,
+    repo_path: str = '.',
+    approximate: bool = False,
+    frequencies: dict[str, int] | None = None,
+    **_: Any
+) -> None:
+    """Worker-side word cloud job.
+
+    Draws ``frequencies`` when the caller counted the words already, and
+    otherwise streams every message of the repository.
+    """
+    from .generate_wordcloud import generate_wordcloud
+    if frequencies is not None:
+        generate_wordcloud(output_file=output_file, frequencies=frequencies)
+        return
+    from analysis.commit_ingest import iter_commit_messages
+    generate_wordcloud(output_file=output_file, messages=iter_commit_messages(repo_path),
+                       approximate=approximate)
+
+
+def _warm_worker() -> None:
+    """Process initializer: import the plotting stack once per worker."""
+    global _worker_start
+    start_ns, start = time.time_ns(), time.perf_counter_ns()
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    for name, (module, func) in CHART_JOBS.items():
+        _worker_jobs[name] = getattr(importlib.import_module(module, __package__), func)
+    _worker_jobs[WORDCLOUD_JOB] = _render_wordcloud
+
+    # Load the font cache now rather than on the first real chart
+    fig, ax = plt.subplots()
+    ax.set_title('warm-up')
+    fig.canvas.draw()
+    plt.close(fig)
+    _worker_start = (start_ns, time.perf_counter_ns() - start)
+
+
+def _run_job(job: str, kwargs: dict[str, Any]) -> None:
+    if 'profile' in kwargs:
+        kwargs = dict(kwargs)
+        profile = kwargs.pop('profile')
+        if job in ENGINE_JOBS:
+            engine_for(profile).render(job, **kwargs)
+            return
+    try:
+        render = _worker_jobs[job]
+    except KeyError:
+        raise ValueError(f"Unknown chart job: {job}") from None
+    render(**kwargs)
+
+
+def _traced_job(
+    target: Callable[[str, dict[str, Any]], Any],
+    job: str,
+    kwargs: dict[str, Any],
+    parent: tuple[str, str] | None
+) -> tuple[Any, list[Span]]:
+    """Run ``target`` in the worker, returning its result and the spans it recorded."""
+    global _worker_start
+    with collect(parent) as spans:
+        if _worker_start is not None:
+            record_interval('render.worker_start', *_worker_start)
+            _worker_start = None
+        with span('render.worker', job=job):
+            result = target(job, kwargs)
+    return result, spans
+
+
+def _render_png(job: str, kwargs: dict[str, Any]) -> bytes:
+    """Render a chart job into memory and return the PNG bytes."""
+    buffer = io.BytesIO()
+    _run_job(job, {**kwargs, 'output_file': buffer})
+    return buffer.getvalue()
+
+
+def _unwrap_traced(traced: Future) -> Future:
+    """Future of a ``_traced_job`` result that records the worker's spans here."""
+    future = Future()
+
+    def done(inner: Future) -> None:
+        if inner.cancelled():
+            future.cancel()
+            future.set_running_or_notify_cancel()
+            return
+        try:
+            result, spans = inner.result()
+        except BaseException as e:
+            future.set_exception(e)
+            return
+        record_spans(spans)
+        future.set_result(result)
+
+    traced.add_done_callback(done)
+    return future
+
+
+def _noop() -> None:
+    return None
+
+
+class RenderPool:
+    """Dispatches chart jobs to a recycled pool of warm render processes."""
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER
+    ) -> None:
+        self.size = size
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # max_tasks_per_child requires a non-fork start method
+        return ProcessPoolExecutor(
+            max_workers=self.size,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_warm_worker,
+            max_tasks_per_child=self.max_jobs_per_worker,
+        )
+
+    def warm(self) -> None:
+        """Start every worker now so the first chart does not pay for it."""
+        for future in [self._executor.submit(_noop) for _ in range(self.size)]:
+            future.result()
+
+    def _submit(self, target: Callable[[str, dict[str, Any]], Any], job: str,
+                kwargs: dict[str, Any]) -> Future:
+        if job not in CHART_JOBS and job != WORDCLOUD_JOB:
+            raise ValueError(f"Unknown chart job: {job}")
+        if kwargs.get('profile', DEFAULT_PROFILE) not in RENDER_PROFILES:
+            raise ValueError(f"Unknown render profile: {kwargs['profile']}")
+        # The worker's spans join the trace of whatever span is submitting
+        args = (_traced_job, target, job, kwargs, current_parent())
+        try:
+            return _unwrap_traced(self._executor.submit(*args))
+        except BrokenProcessPool:
+            logger.warning("Render pool broken (worker died); restarting")
+            self._executor = self._new_executor()
+            return _unwrap_traced(self._executor.submit(*args))
+
+    def submit(self, job: str, **kwargs: Any) -> Future:
+        """Queue a chart job.
+
+        Args:
+            job: One of ``CHART_JOBS`` or ``WORDCLOUD_JOB``
+            **kwargs: Arguments for the job's render function; with
+                ``profile`` (a ``RENDER_PROFILES`` name), ``ENGINE_JOBS`` are
+                drawn by the worker's reusable ``ChartEngine`` instead
+
+        Returns:
+            Future resolving when the chart has been written
+        """
+        return self._submit(_run_job, job, kwargs)
+
+    def submit_png(self, job: str, **kwargs: Any) -> Future:
+        """Queue a chart job rendered to memory instead of a file.
+
+        Args:
+            job: One of ``CHART_JOBS`` or ``WORDCLOUD_JOB``
+            **kwargs: Arguments for the job's render function, except ``output_file``
+
+        Returns:
+            Future resolving to the PNG bytes
+        """
+        return self._submit(_render_png, job, kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,118 @@
+"""Keep a repository's charts up to date as commits land.
+
+Renders every requested chart once, then watches the repository's refs
+(``analysis.commit_watch.RepoWatcher``). On a change only the new commits
+are ingested and aggregated, and only charts whose underlying counts
+changed (``render_pool.CHART_FIELDS``) are redrawn by the warm render pool.
+
+Usage (from ``utils/``)::
+
+    python -m plotting.watch_charts --repo /path/to/repo --output-dir images
+    python -m plotting.watch_charts --charts hour_bar avg_bar --interval 5
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from analysis.repo_utils import get_repo_name
+from .render_engine import add_profile_argument
+from .render_pool import CHART_FIELDS, CHART_JOBS, CHART_OUTPUTS, RenderPool
+
+if TYPE_CHECKING:
+    from analysis.commit_watch import RepoWatcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHARTS = ['hour_bar', 'day_month_pie']
+
+
+def charts_to_redraw(charts: list[str], changed: set[str]) -> list[str]:
+    """Return the charts that draw at least one of the ``changed`` fields."""
+    return [job for job in charts if changed.intersection(CHART_FIELDS[job])]
+
+
+class ChartWatcher:
+    """Re-renders a fixed set of charts whenever their aggregates change."""
+
+    def __init__(
+        self,
+        watcher: 'RepoWatcher',
+        charts: list[str],
+        output_dir: Path,
+        pool: RenderPool,
+        name: str,
+        profile: str | None = None
+    ) -> None:
+        self.watcher = watcher
+        self.charts = charts
+        self.output_dir = output_dir
+        self.pool = pool
+        self.name = name
+        # Redraws reuse the worker's template figures (render_engine)
+        self.options = {'profile': profile} if profile is not None else {}
+
+    def output_file(self, job: str) -> Path:
+        stem, _ = CHART_OUTPUTS[job]
+        return self.output_dir / f'{stem}_{self.name}.png'
+
+    def render(self, changed: set[str]) -> list[str]:
+        """Redraw the charts affected by ``changed``; return those redrawn."""
+        jobs = charts_to_redraw(self.charts, changed)
+        aggregates = self.watcher.aggregates
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        futures = [
+            (job, self.pool.submit(
+                job, output_file=str(self.output_file(job)),
+                title=CHART_OUTPUTS[job][1].format(name=self.name), aggregates=aggregates,
+                **self.options
+            ))
+            for job in jobs
+        ]
+        for job, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error("Rendering %s failed: %s", self.output_file(job), e)
+        print(f"{self.watcher.history.tip[:12]}: {aggregates.total} commits; "
+              f"redrew {', '.join(jobs) or 'nothing'}", flush=True)
+        return jobs
+
+
+def main() -> int:
+    """Parse arguments, render once, then re-render on every change."""
+    parser = argparse.ArgumentParser(description='Re-render commit charts as the repository changes')
+    parser.add_argument('--repo', default='.', help='Repository to watch (default: .)')
+    parser.add_argument('--ref', default='HEAD', help='Revision whose history is charted')
+    parser.add_argument('--output-dir', default='images', help='Directory for the charts')
+    parser.add_argument('--charts', nargs='+', choices=sorted(CHART_JOBS), default=DEFAULT_CHARTS,
+                        help='Charts to keep up to date')
+    parser.add_argument('--interval', type=float,
+                        help='Seconds between ref checks (default: GIT_COMMIT_VIZ_WATCH_INTERVAL or 2)')
+    parser.add_argument('--render-workers', type=int, default=1, help='Render processes')
+    parser.add_argument('--once', action='store_true', help='Render once and exit')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    # NumPy and the analysis modules load only once there is work to do
+    from analysis.commit_watch import RepoWatcher
+    watcher = RepoWatcher(args.repo, args.ref, args.interval)
+    charts = ChartWatcher(
+        watcher, args.charts, Path(args.output_dir), RenderPool(size=args.render_workers),
+        name=get_repo_name(args.repo) or 'Repository', profile=args.profile
+    )
+    try:
+        charts.render(watcher.poll())
+        if not args.once:
+            watcher.run(charts.render)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        charts.pool.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
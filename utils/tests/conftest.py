@@ -0,0 +1,121 @@
+"""Shared fixtures: small git repositories built with plumbing commands."""
+import os
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from analysis.commit_ingest import CommitTable
+from analysis.repo_utils import CACHE_DIR_ENV
+
+AUTHORS = [
+    ('Ada Lovelace', 'ada@example.com', '+0000'),
+    ('Grace Hopper', 'grace@example.com', '-0500'),
+    ('Ken Thompson', 'ken@example.com', '+0530'),
+    ('Zoë Ümlaut', 'zoe@example.com', '+0100'),
+]
+WORDS = ['parser', 'deadlock', 'flaky', 'tests', 'cache', 'render', 'index', 'widgets',
+         'fix', 'the', '2024', 'https://example.com/x', 'src/app.py']
+START = 1_600_000_000
+
+
+def git(repo: Path, *args: str, env: dict[str, str] | None = None, stdin: str | None = None) -> str:
+    return subprocess.run(
+        ['git', *args], cwd=repo, check=True, capture_output=True, text=True,
+        input=stdin, env={**os.environ, **(env or {})},
+    ).stdout.strip()
+
+
+def message(n: int) -> str:
+    """Deterministic commit message; long, similar bodies so packs hold deltas."""
+    subject = ' '.join(WORDS[(n * k) % len(WORDS)] for k in (1, 3, 7))
+    body = '\n'.join(f'Line {i}: unchanged context for delta compression.' for i in range(40))
+    return f'{subject} #{n}\n\n{body}\nTrailer {n}\n'
+
+
+def assert_same_table(table: CommitTable, expected: CommitTable) -> None:
+    """Same commits in the same order, with the same dates and authors."""
+    assert table.shas.tolist() == expected.shas.tolist()
+    np.testing.assert_array_equal(table.timestamps, expected.timestamps)
+    np.testing.assert_array_equal(table.tz_offsets, expected.tz_offsets)
+    assert ([table.authors[i] for i in table.author_ids]
+            == [expected.authors[i] for i in expected.author_ids])
+
+
+class HistoryBuilder:
+    """Writes commits as loose objects with ``git commit-tree``."""
+
+    def __init__(self, repo: Path) -> None:
+        self.repo = repo
+        self.count = 0
+        self.tree = git(repo, 'mktree', stdin='')
+
+    def commit(self, parents: list[str], timestamp: int | None = None) -> str:
+        n = self.count
+        self.count += 1
+        name, email, tz = AUTHORS[n % len(AUTHORS)]
+        date = f'{timestamp if timestamp is not None else START + n * 3_700} {tz}'
+        env = {
+            'GIT_AUTHOR_NAME': name, 'GIT_AUTHOR_EMAIL': email, 'GIT_AUTHOR_DATE': date,
+            'GIT_COMMITTER_NAME': name, 'GIT_COMMITTER_EMAIL': email,
+            'GIT_COMMITTER_DATE': date,
+        }
+        args = ['commit-tree', self.tree, '-m', message(n)]
+        for parent in parents:
+            args += ['-p', parent]
+        return git(self.repo, *args, env=env)
+
+
+def build_history(repo: Path, commits: int = 60) -> list[str]:
+    """Create a repository whose ``main`` has merges and one clock-skewed commit.
+
+    Returns:
+        SHAs of the mainline commits, oldest first
+    """
+    repo.mkdir(parents=True, exist_ok=True)
+    git(repo, 'init', '-q', '-b', 'main')
+    builder = HistoryBuilder(repo)
+    mainline = [builder.commit([])]
+    side = None
+    for n in range(1, commits):
+        if n % 10 == 3:
+            side = builder.commit([mainline[-1]])
+        elif side is not None and n % 10 == 5:
+            side = builder.commit([side])
+        if side is not None and n % 10 == 7:
+            mainline.append(builder.commit([mainline[-1], side]))
+            side = None
+        elif n == commits // 2:
+            # Dated a day before its parent, as after a clock-skewed rebase
+            mainline.append(builder.commit([mainline[-1]], START + (n - 30) * 3_700))
+        else:
+            mainline.append(builder.commit([mainline[-1]]))
+    git(repo, 'update-ref', 'refs/heads/main', mainline[-1])
+    tagger = {'GIT_COMMITTER_NAME': 'Release Bot', 'GIT_COMMITTER_EMAIL': 'bot@example.com'}
+    git(repo, 'tag', '-a', 'v1', '-m', 'release', mainline[len(mainline) // 2], env=tagger)
+    return mainline
+
+
+@pytest.fixture
+def history_repo(tmp_path: Path) -> tuple[Path, list[str]]:
+    repo = tmp_path / 'repo'
+    return repo, build_history(repo)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep every commit/index cache inside the test's temporary directory."""
+    path = tmp_path / 'cache'
+    monkeypatch.setenv(CACHE_DIR_ENV, str(path))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def git_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Hide the developer's global and system git config from every test."""
+    path = tmp_path / 'gitconfig'
+    path.touch()
+    monkeypatch.setenv('GIT_CONFIG_GLOBAL', str(path))
+    monkeypatch.setenv('GIT_CONFIG_NOSYSTEM', '1')
+    return path
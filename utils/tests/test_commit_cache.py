@@ -0,0 +1,94 @@
+"""The commit cache must always match a fresh ``git log`` of the ref."""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from analysis import commit_cache
+from analysis.commit_cache import CachedHistory, cache_path, load_history, read_cache, write_cache
+from analysis.commit_ingest import CommitTable, ingest_commits
+from analysis.tracing import counters
+from conftest import START, HistoryBuilder, assert_same_table, git
+
+
+def load_counting(repo: Path) -> tuple[CachedHistory, dict[str, int]]:
+    """Run ``load_history`` for ``main`` and return the cache counters it bumped."""
+    before = counters()
+    history = load_history(str(repo), 'main')
+    after = counters()
+    bumped = {name: after[name] - before.get(name, 0) for name in after
+              if name.startswith('commit_cache.') and after[name] != before.get(name, 0)}
+    return history, bumped
+
+
+def assert_matches_git_log(repo: Path, history: CachedHistory) -> None:
+    assert history.tip == git(repo, 'rev-parse', 'main')
+    assert_same_table(history.table, ingest_commits(str(repo), ['main']))
+    stored = read_cache(cache_path(str(repo), 'main'))
+    assert stored is not None and stored.tip == history.tip
+    assert_same_table(stored.table, history.table)
+
+
+def test_new_commits_are_appended(history_repo: tuple[Path, list[str]],
+                                  monkeypatch: pytest.MonkeyPatch) -> None:
+    repo, mainline = history_repo
+    assert load_counting(repo)[1] == {'commit_cache.rebuild': 1}
+    assert load_counting(repo)[1] == {'commit_cache.hit': 1}
+
+    def no_rebuild(*args: object, **kwargs: object) -> None:
+        raise AssertionError('appending must not rebuild the history')
+
+    monkeypatch.setattr(commit_cache, 'ingest_commits_sharded', no_rebuild)
+    builder = HistoryBuilder(repo)
+    tip = mainline[-1]
+    for n in range(4):
+        tip = builder.commit([tip], START + 1_000_000 + n)
+    # An identity the cached author table does not have yet
+    eve = {f'GIT_{role}_{field}': value for role in ('AUTHOR', 'COMMITTER')
+           for field, value in (('NAME', 'Eve'), ('EMAIL', 'eve@example.com'),
+                                ('DATE', f'{START + 1_000_010} +0200'))}
+    tip = git(repo, 'commit-tree', builder.tree, '-p', tip, '-m', 'new author', env=eve)
+    git(repo, 'update-ref', 'refs/heads/main', tip)
+
+    history, bumped = load_counting(repo)
+    assert bumped == {'commit_cache.append': 1}
+    assert history.table.authors[-1] == 'Eve <eve@example.com>'
+    assert_matches_git_log(repo, history)
+
+
+@pytest.mark.parametrize('rewrite', ['reset', 'amend', 'rebase'])
+def test_rewritten_history_is_rebuilt(history_repo: tuple[Path, list[str]], rewrite: str) -> None:
+    repo, mainline = history_repo
+    load_history(str(repo), 'main')
+    builder = HistoryBuilder(repo)
+    builder.count = 1_000
+    if rewrite == 'reset':
+        tip = mainline[-4]
+    elif rewrite == 'amend':
+        tip = builder.commit([mainline[-2]])
+    else:
+        # Replay the newest commits onto an older base
+        tip = mainline[20]
+        for _ in range(15):
+            tip = builder.commit([tip])
+    git(repo, 'update-ref', 'refs/heads/main', tip)
+
+    history, bumped = load_counting(repo)
+    assert bumped == {'commit_cache.rebuild': 1}
+    assert_matches_git_log(repo, history)
+
+
+def test_failed_write_leaves_no_temporary_file(tmp_path: Path,
+                                               monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / 'cache' / 'history.npz'
+    write_cache(path, CachedHistory(tip='a' * 40, table=CommitTable.empty()))
+
+    def disk_full(*args: object, **kwargs: object) -> None:
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr(np, 'savez', disk_full)
+    with pytest.raises(OSError):
+        write_cache(path, CachedHistory(tip='b' * 40, table=CommitTable.empty()))
+    assert [p.name for p in path.parent.iterdir()] == ['history.npz']
+    monkeypatch.undo()
+    assert read_cache(path).tip == 'a' * 40
@@ -0,0 +1,170 @@
+"""Posting list encoding, incremental appends and searches of the message index."""
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from analysis.commit_cache import load_history
+from analysis.commit_ingest import iter_commit_messages
+from analysis.commit_messages import (
+    MAX_TERM_BYTES, MessageIndex, decode_varints, encode_varints, ingest_messages,
+    load_message_index, message_word_counts, messages_cache_path, query_words,
+    read_messages_cache, search_messages
+)
+from analysis.commit_query import CommitFilter, load_commit_index
+from analysis.commit_text import TOKEN_PATTERN, is_excluded
+from conftest import git
+
+
+@pytest.mark.parametrize('values', [
+    [],
+    [0],
+    [127, 128, 129],
+    [0, 1, 2 ** 14 - 1, 2 ** 14, 2 ** 21, 2 ** 31 - 1, 2 ** 35],
+])
+def test_varint_round_trip(values: list[int]) -> None:
+    encoded, lengths = encode_varints(np.array(values, dtype=np.int64))
+    assert lengths.sum() == len(encoded)
+    assert decode_varints(encoded).tolist() == values
+
+
+def test_varint_layout() -> None:
+    encoded, lengths = encode_varints(np.array([1, 300]))
+    # LEB128: low 7 bits first, high bit set on every byte but the last
+    assert encoded.tolist() == [0x01, 0xAC, 0x02]
+    assert lengths.tolist() == [1, 2]
+
+
+def _random_batches(seed: int, batches: int) -> list[tuple[list[bytes], list[list[int]]]]:
+    """Per batch: its vocabulary and, per commit, the word ids it uses."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(batches):
+        vocabulary = [f'w{i}'.encode() for i in rng.choice(300, 40, replace=False)]
+        commits = [sorted(set(rng.choice(len(vocabulary), rng.integers(0, 8)).tolist()))
+                   for _ in range(rng.integers(0, 200))]
+        out.append((vocabulary, commits))
+    return out
+
+
+def _append(index: MessageIndex, vocabulary: list[bytes], commits: list[list[int]]) -> MessageIndex:
+    entry_docs = [doc for doc, words in enumerate(commits) for _ in words]
+    entry_words = [word for words in commits for word in words]
+    shas = np.array([b'%040d' % (len(index) + doc) for doc in range(len(commits))])
+    return index.append(shas, vocabulary, np.array(entry_words, dtype=np.int32),
+                        np.array(entry_docs, dtype=np.int32))
+
+
+def test_appends_equal_a_single_build() -> None:
+    batches = _random_batches(seed=7, batches=6)
+    incremental = MessageIndex.empty()
+    expected: dict[bytes, list[int]] = {}
+    all_commits = []
+    for vocabulary, commits in batches:
+        for commit in commits:
+            words = [vocabulary[w] for w in commit]
+            for word in words:
+                expected.setdefault(word, []).append(len(all_commits))
+            all_commits.append(words)
+        incremental = _append(incremental, vocabulary, commits)
+
+    vocabulary = sorted(expected)
+    word_ids = {word: i for i, word in enumerate(vocabulary)}
+    single = _append(MessageIndex.empty(), vocabulary,
+                     [[word_ids[word] for word in words] for words in all_commits])
+
+    for index in (incremental, single):
+        assert index.terms.tolist() == vocabulary
+        for word, docs in expected.items():
+            assert index.docs_in_range(*index.term_range(word.decode())).tolist() == docs
+        assert index.counts.tolist() == [len(expected[word]) for word in vocabulary]
+    np.testing.assert_array_equal(incremental.postings, single.postings)
+    np.testing.assert_array_equal(incremental.offsets, single.offsets)
+
+
+def test_prefix_range_merges_lists() -> None:
+    index = _append(MessageIndex.empty(), [b'cache', b'cached', b'caches', b'cat'],
+                    [[0], [1, 3], [2], [0, 2], [3]])
+    assert index.docs_in_range(*index.term_range('cach', prefix=True)).tolist() == [0, 1, 2, 3]
+    assert index.docs_matching('cache').tolist() == [0, 2, 3]
+    assert index.docs_matching('caches').tolist() == [0, 2, 3]
+    assert index.docs_matching('dog').tolist() == []
+
+
+def test_query_words() -> None:
+    assert query_words('Deadlock in the Parser') == ('deadlock', 'parser')
+    assert query_words('fix* parsers') == ('fix*', 'parsers')
+    with pytest.raises(ValueError):
+        query_words('the 2024 fix')
+
+
+def message_terms(text: str) -> set[str]:
+    """Distinct lowercase words of a message, with the index's exclusions and length cut."""
+    words = {token.lower() for token in TOKEN_PATTERN.findall(text)}
+    return {word for word in words
+            if not is_excluded(word) and len(word.encode()) <= MAX_TERM_BYTES}
+
+
+def _brute_force(repo: Path, words: list[str]) -> set[str]:
+    """SHAs of commits whose cleaned message terms include every word (or its plural)."""
+    shas = git(repo, 'log', '--format=%H', 'main').split()
+    matches = set()
+    for sha, text in zip(shas, iter_commit_messages(str(repo), ['main'])):
+        terms = message_terms(text)
+        if all(word in terms or word + 's' in terms for word in words):
+            matches.add(sha)
+    return matches
+
+
+def test_incremental_update_matches_rebuild(history_repo: tuple[Path, list[str]]) -> None:
+    repo, mainline = history_repo
+    git(repo, 'update-ref', 'refs/heads/main', mainline[30])
+    first = load_message_index(str(repo), 'main')
+    assert len(first.index) == int(git(repo, 'rev-list', '--count', 'main'))
+
+    git(repo, 'update-ref', 'refs/heads/main', mainline[-1])
+    updated = load_message_index(str(repo), 'main')
+    assert updated.tip == mainline[-1]
+    assert updated.index.shas[:len(first.index)].tolist() == first.index.shas.tolist()
+
+    rebuilt = ingest_messages(str(repo), ['main'])
+    for word in ('parser', 'deadlock', 'flaky', 'cache', 'widget'):
+        got = set(updated.index.shas[updated.index.docs_matching(word)].tolist())
+        want = set(rebuilt.shas[rebuilt.docs_matching(word)].tolist())
+        assert got == want
+
+    cached = read_messages_cache(messages_cache_path(str(repo), 'main'))
+    assert cached is not None and cached.tip == mainline[-1]
+    np.testing.assert_array_equal(cached.index.postings, updated.index.postings)
+
+
+def test_search_matches_brute_force(history_repo: tuple[Path, list[str]]) -> None:
+    repo, _ = history_repo
+    table = load_history(str(repo), 'main').table
+    for query in ('deadlock', 'flaky deadlock', 'widget', 'cach*'):
+        matches = search_messages(query, repo_path=str(repo), ref='main')
+        found = {sha.decode() for sha in table.shas[matches.rows]}
+        assert 0 < len(found) < len(table)
+        if query.endswith('*'):
+            assert found == _brute_force(repo, ['cache'])
+        else:
+            assert found == _brute_force(repo, query.split())
+        assert matches.aggregates.by_hour.sum() == len(matches)
+
+    filtered = search_messages('parser', CommitFilter(author='grace'), str(repo), 'main')
+    authors = [table.authors[table.author_ids[row]] for row in filtered.rows]
+    assert authors and all('grace' in author for author in authors)
+
+
+def test_word_counts_cover_selected_rows(history_repo: tuple[Path, list[str]]) -> None:
+    repo, _ = history_repo
+    table = load_history(str(repo), 'main').table
+    messages = dict(zip(git(repo, 'log', '--format=%H', 'main').split(),
+                        iter_commit_messages(str(repo), ['main'])))
+    rows = load_commit_index(str(repo), 'main').select(CommitFilter(author='grace'))
+    assert 0 < len(rows) < len(table)
+    for selection in (None, rows):
+        shas = table.shas if selection is None else table.shas[selection]
+        expected = Counter(term for sha in shas for term in message_terms(messages[sha.decode()]))
+        assert message_word_counts(selection, str(repo), 'main') == expected
@@ -0,0 +1,93 @@
+"""Date, author and path filters agree with ``git log``."""
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from analysis.commit_paths import load_path_index
+from analysis.commit_query import CommitFilter, load_commit_index
+from conftest import AUTHORS, START, git
+
+DAY = 86_400
+# (files written, files removed, rename) per commit; author cycles through AUTHORS
+CHANGES = [
+    ({'old.txt': 'a', 'src/app.py': '1', 'src-extra/x.py': '1'}, [], None),
+    ({'old.txt': 'b'}, [], None),
+    ({'src/app.py': '2', 'docs/readme.md': 'r'}, [], None),
+    ({}, [], ('old.txt', 'new.txt')),
+    ({'new.txt': 'c'}, [], None),
+    ({'src/lib/util.py': 'u'}, ['docs/readme.md'], None),
+    ({'src-extra/x.py': '2'}, [], None),
+]
+
+
+@pytest.fixture
+def files_repo(tmp_path: Path) -> Path:
+    """A repository with real file changes, a rename and a deletion, one commit a day."""
+    repo = tmp_path / 'files'
+    repo.mkdir()
+    git(repo, 'init', '-q', '-b', 'main')
+    for n, (written, removed, rename) in enumerate(CHANGES):
+        for name, content in written.items():
+            (repo / name).parent.mkdir(parents=True, exist_ok=True)
+            (repo / name).write_text(content)
+        if rename is not None:
+            git(repo, 'mv', *rename)
+        if removed:
+            git(repo, 'rm', '-q', *removed)
+        git(repo, 'add', '-A')
+        name, email, tz = AUTHORS[n % len(AUTHORS)]
+        date = f'{START + n * DAY} {tz}'
+        git(repo, 'commit', '-q', '-m', f'change {n}', env={
+            'GIT_AUTHOR_NAME': name, 'GIT_AUTHOR_EMAIL': email, 'GIT_AUTHOR_DATE': date,
+            'GIT_COMMITTER_NAME': name, 'GIT_COMMITTER_EMAIL': email,
+            'GIT_COMMITTER_DATE': date,
+        })
+    return repo
+
+
+def selected(repo: Path, commit_filter: CommitFilter) -> list[str]:
+    index = load_commit_index(str(repo), 'main')
+    return [sha.decode() for sha in index.table.shas[index.select(commit_filter)]]
+
+
+@pytest.mark.parametrize('path', [
+    'old.txt', 'new.txt', 'src', 'src/', './src/lib', 'src/app.py', 'src-extra', 'docs', 'missing',
+])
+def test_path_filter_matches_git_log(files_repo: Path, path: str) -> None:
+    expected = git(files_repo, 'log', '--format=%H', 'main', '--', path.removeprefix('./')).split()
+    assert selected(files_repo, CommitFilter(path=path)) == expected
+
+
+def test_renames_are_indexed_under_both_paths(files_repo: Path) -> None:
+    # Rename detection in the user's config must not change the index
+    git(files_repo, 'config', 'diff.renames', 'copies')
+    index = load_path_index(str(files_repo), 'main')
+    rename = git(files_repo, 'rev-parse', 'main~3')
+    for path in ('old.txt', 'new.txt'):
+        assert rename in [index.shas[i].decode() for i in index.commits_touching(path)]
+    assert len(selected(files_repo, CommitFilter(path='old.txt'))) == 3
+
+
+def test_author_and_date_filters(files_repo: Path) -> None:
+    expected = git(files_repo, 'log', '--format=%H', 'main', '--author=grace').split()
+    assert selected(files_repo, CommitFilter(author='GRACE')) == expected
+
+    since, until = START + 2 * DAY, START + 5 * DAY
+    # git's --until is inclusive, the filter's is not
+    expected = git(files_repo, 'log', '--format=%H', 'main', f'--since=@{since}',
+                   f'--until=@{until - 1}').split()
+    assert len(expected) == 3
+    assert selected(files_repo, CommitFilter(since=iso(since), until=iso(until))) == expected
+    # A bare date includes that whole day
+    day = datetime.fromtimestamp(START + 4 * DAY, timezone.utc).date().isoformat()
+    assert len(selected(files_repo, CommitFilter(until=day))) == 5
+
+    touching = set(selected(files_repo, CommitFilter(path='src')))
+    recent = selected(files_repo, CommitFilter(since=iso(since)))
+    assert (selected(files_repo, CommitFilter(since=iso(since), path='src'))
+            == [sha for sha in recent if sha in touching])
+
+
+def iso(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
@@ -0,0 +1,48 @@
+"""Sharded ingestion must build exactly the table ``ingest_commits`` builds."""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from analysis import commit_shards
+from analysis.commit_ingest import CommitTable, ingest_commits
+from analysis.commit_shards import ingest_commits_sharded, merge_shards
+
+
+def assert_identical(table: CommitTable, expected: CommitTable) -> None:
+    """Every column equal, including the interned author ids and their order."""
+    assert table.shas.dtype == expected.shas.dtype
+    np.testing.assert_array_equal(table.shas, expected.shas)
+    np.testing.assert_array_equal(table.timestamps, expected.timestamps)
+    np.testing.assert_array_equal(table.tz_offsets, expected.tz_offsets)
+    np.testing.assert_array_equal(table.author_ids, expected.author_ids)
+    assert table.author_ids.dtype == expected.author_ids.dtype
+    assert table.authors == expected.authors
+
+
+@pytest.mark.parametrize('workers', [2, 3, 7])
+@pytest.mark.parametrize('rev_args', [['main'], ['HEAD~5'], ['HEAD~5..HEAD'], ['v1..main']])
+def test_matches_serial_ingest(history_repo: tuple[Path, list[str]],
+                               monkeypatch: pytest.MonkeyPatch,
+                               workers: int, rev_args: list[str]) -> None:
+    repo, _ = history_repo
+    monkeypatch.setattr(commit_shards, 'MIN_SHARDED_COMMITS', 1)
+    assert_identical(ingest_commits_sharded(str(repo), rev_args, workers=workers),
+                     ingest_commits(str(repo), rev_args))
+
+
+def test_known_authors_are_extended(history_repo: tuple[Path, list[str]],
+                                    monkeypatch: pytest.MonkeyPatch) -> None:
+    repo, _ = history_repo
+    monkeypatch.setattr(commit_shards, 'MIN_SHARDED_COMMITS', 1)
+    known = ('Someone Else <else@example.com>', 'Ken Thompson <ken@example.com>')
+    table = ingest_commits_sharded(str(repo), ['main'], known_authors=known, workers=3)
+    assert table.authors[:2] == known
+    assert_identical(table, ingest_commits(str(repo), ['main'], known_authors=known))
+
+
+def test_overlapping_shards_are_rejected(history_repo: tuple[Path, list[str]]) -> None:
+    repo, _ = history_repo
+    table = ingest_commits(str(repo), ['main'])
+    with pytest.raises(ValueError, match='overlap'):
+        merge_shards([table.take(np.arange(0, 20)), table.take(np.arange(15, 30))])
@@ -0,0 +1,71 @@
+"""HyperLogLog and count-min sketch estimates stay within their stated bounds."""
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from analysis.commit_aggregate import aggregate_commits
+from analysis.commit_ingest import ingest_commits
+from analysis.commit_sketch import (
+    CountMinSketch, HyperLogLog, hash_ints, sketch_commits, sketch_tokens
+)
+
+
+@pytest.mark.parametrize('distinct', [10, 1_000, 200_000])
+def test_hyperloglog_within_error(distinct: int) -> None:
+    hll = HyperLogLog(precision=12)
+    hashes = hash_ints(np.arange(distinct))
+    hll.add(hashes)
+    hll.add(hashes[::3])  # repeats must not count again
+    estimate = hll.estimate()[0]
+    # Four standard errors; the small-range correction is far tighter
+    assert abs(estimate - distinct) <= max(4 * hll.relative_error * distinct, 1)
+
+
+def test_hyperloglog_rows_are_independent() -> None:
+    hll = HyperLogLog(precision=10, rows=3)
+    hashes = hash_ints(np.arange(3_000))
+    hll.add(hashes, rows=np.arange(3_000) % 2)
+    estimates = hll.estimate()
+    assert estimates[2] == 0
+    for row in (0, 1):
+        assert abs(estimates[row] - 1_500) <= 4 * hll.relative_error * 1_500
+
+
+def test_count_min_bounds() -> None:
+    rng = np.random.default_rng(3)
+    counts = Counter({f'token{i}': int(c) for i, c in enumerate(rng.zipf(1.5, 5_000))})
+    sketch = CountMinSketch(width=512, depth=4)
+    for start in range(0, len(counts), 1_000):
+        sketch.update(Counter(dict(list(counts.items())[start:start + 1_000])))
+    assert sketch.total == sum(counts.values())
+
+    keys = list(counts)
+    overcount = sketch.estimate(keys) - np.array([counts[key] for key in keys])
+    assert (overcount >= 0).all()
+    within = overcount <= sketch.epsilon * sketch.total
+    assert within.mean() >= 1 - sketch.delta
+
+
+def test_sketch_tokens_finds_heavy_hitters() -> None:
+    lines = [f'alpha beta alpha {word}' for word in map(str, range(5_000))] + ['gamma'] * 300
+    sketch = sketch_tokens(lines, str.split, batch_lines=250, capacity=10)
+    top = sketch.most_common()
+    assert [word for word, _ in top.most_common(3)] == ['alpha', 'beta', 'gamma']
+    bounds = sketch.error_bounds()
+    assert bounds['tokens'] == 4 * 5_000 + 300
+    assert 10_000 <= top['alpha'] <= 10_000 + bounds['max_overcount']
+
+
+def test_sketch_commits_histograms_are_exact(history_repo: tuple[Path, list[str]]) -> None:
+    repo, _ = history_repo
+    sketch = sketch_commits(str(repo), ['main'], chunk_size=16)
+    table = ingest_commits(str(repo), ['main'], backend='git')
+    exact = aggregate_commits(table)
+    approximate = sketch.to_aggregates()
+    assert sketch.commits == len(table)
+    for field in ('by_hour', 'by_weekday', 'by_month', 'hour_weekday'):
+        np.testing.assert_array_equal(getattr(approximate, field), getattr(exact, field))
+    assert sketch.summary()['distinct_authors'] == len(set(table.authors))
+    assert abs(approximate.active_days - exact.active_days) <= 1
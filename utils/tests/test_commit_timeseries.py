@@ -0,0 +1,32 @@
+"""Rolling statistics of the daily commit series."""
+import numpy as np
+import pytest
+
+from analysis.commit_timeseries import DailySeries
+
+
+@pytest.mark.parametrize('window', [1, 3, 30])
+def test_rolling_percentiles_match_numpy(window: int) -> None:
+    counts = np.random.default_rng(7).poisson(3, size=200)
+    percentiles = [0, 10, 50, 90, 100]
+    result = DailySeries(0, counts).rolling_percentiles(window, percentiles)
+    for day in range(len(counts)):
+        days = counts[max(day + 1 - window, 0):day + 1]
+        expected = np.percentile(days, percentiles, method='inverted_cdf')
+        np.testing.assert_array_equal(result[:, day], expected)
+
+
+def test_rolling_percentiles_of_empty_series() -> None:
+    series = DailySeries(0, np.zeros(0, dtype=np.int64))
+    assert series.rolling_percentiles(7, [50, 90]).shape == (2, 0)
+
+
+@pytest.mark.parametrize('percentile', [-1, 100.5, float('nan')])
+def test_rolling_percentiles_reject_out_of_range(percentile: float) -> None:
+    with pytest.raises(ValueError):
+        DailySeries(0, np.array([1, 2, 3])).rolling_percentiles(7, [50, percentile])
+
+
+def test_distribution_items_drop_empty_buckets() -> None:
+    series = DailySeries(0, np.array([0, 1, 1, 7, 0, 30]))
+    assert series.distribution_items([1, 2, 5, 10, 20]) == (['1', '5-9', '20+'], [2, 1, 1])
@@ -0,0 +1,140 @@
+"""The native object database reader must reproduce ``git log`` exactly."""
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from analysis.commit_ingest import ingest_commits
+from analysis.git_objects import NativeReadError, apply_delta, read_commit_table
+from conftest import HistoryBuilder, assert_same_table, git
+
+
+def rev_specs(mainline: list[str]) -> list[list[str]]:
+    return [
+        ['main'],
+        [f'{mainline[-2]}..{mainline[-1]}'],
+        [f'{mainline[-15]}..main'],
+        [f'{mainline[5]}..{mainline[40]}'],
+        ['main', f'^{mainline[-25]}'],
+        [f'{mainline[-1]}..{mainline[-10]}'],
+        ['v1'],
+        ['v1..main'],
+    ]
+
+
+def pack_deltas(repo: Path) -> int:
+    """Number of deltified objects across the repository's packs."""
+    deltas = 0
+    for idx in (repo / '.git' / 'objects' / 'pack').glob('*.idx'):
+        for line in git(repo, 'verify-pack', '-v', str(idx)).splitlines():
+            fields = line.split()
+            # "<sha> <type> <size> <packed size> <offset> <depth> <base>"
+            if len(fields) == 7 and fields[1] in ('commit', 'tree', 'blob', 'tag'):
+                deltas += 1
+    return deltas
+
+
+LAYOUTS = {
+    'loose': [],
+    'packed_ofs_delta': [['repack', '-adf', '-q', '--window=50']],
+    'packed_ref_delta': [['-c', 'repack.useDeltaBaseOffset=false', 'repack', '-adf', '-q',
+                          '--window=50']],
+    'packed_refs': [['repack', '-adq'], ['pack-refs', '--all']],
+    'commit_graph': [['repack', '-adq'], ['commit-graph', 'write', '--reachable']],
+    'commit_graph_loose_tip': [['repack', '-adq'], ['commit-graph', 'write', '--reachable']],
+}
+
+
+@pytest.mark.parametrize('layout', list(LAYOUTS))
+def test_matches_git_log(history_repo: tuple[Path, list[str]], layout: str) -> None:
+    repo, mainline = history_repo
+    for command in LAYOUTS[layout]:
+        git(repo, *command)
+    if layout.startswith('packed_') and layout != 'packed_refs':
+        assert pack_deltas(repo) > 0
+    if layout == 'commit_graph_loose_tip':
+        # Commits newer than the commit-graph are read as loose objects
+        builder = HistoryBuilder(repo)
+        builder.count = len(mainline) + 40
+        tip = builder.commit([mainline[-1]])
+        git(repo, 'update-ref', 'refs/heads/main', tip)
+        mainline = [*mainline, tip]
+
+    for rev_args in rev_specs(mainline):
+        assert_same_table(read_commit_table(str(repo), rev_args),
+                          ingest_commits(str(repo), rev_args, backend='git'))
+
+
+def test_known_authors_keep_their_ids(history_repo: tuple[Path, list[str]]) -> None:
+    repo, mainline = history_repo
+    older = ingest_commits(str(repo), [mainline[-10]], backend='git')
+    newer = read_commit_table(str(repo), [f'{mainline[-10]}..main'], older.authors)
+    assert newer.authors[:len(older.authors)] == older.authors
+
+
+def test_unsupported_revision_syntax(history_repo: tuple[Path, list[str]]) -> None:
+    repo, _ = history_repo
+    with pytest.raises(NativeReadError):
+        read_commit_table(str(repo), ['main~3'])
+    with pytest.raises(NativeReadError):
+        read_commit_table(str(repo), ['--all'])
+
+
+def test_apply_delta() -> None:
+    base = b'0123456789abcdef'
+    # Source size 16, target size 10: copy base[4:10], then insert "wxyz"
+    delta = bytes([16, 10, 0x80 | 0x01 | 0x10, 4, 6, 4]) + b'wxyz'
+    assert apply_delta(base, delta) == b'456789wxyz'
+
+
+MAILMAP = 'Ada King <ada@example.com> Ada Lovelace <ada@example.com>\n'
+
+
+def assert_falls_back(repo: Path, author: str) -> None:
+    """The native reader refuses; the native backend then matches git, ``author`` included."""
+    with pytest.raises(NativeReadError):
+        read_commit_table(str(repo), ['main'])
+    expected = ingest_commits(str(repo), ['main'], backend='git')
+    assert author in expected.authors
+    assert_same_table(ingest_commits(str(repo), ['main'], backend='native'), expected)
+
+
+def test_non_utf8_commit_encoding(history_repo: tuple[Path, list[str]]) -> None:
+    repo, mainline = history_repo
+    commit = (f'tree {git(repo, "mktree", stdin="")}\nparent {mainline[-1]}\n'
+              'author José <j@x> 1700000000 +0000\ncommitter José <j@x> 1700000000 +0000\n'
+              'encoding ISO-8859-1\n\ncafé\n').encode('latin-1')
+    tip = subprocess.run(['git', 'hash-object', '-t', 'commit', '-w', '--stdin'], cwd=repo,
+                         input=commit, capture_output=True, check=True).stdout.decode().strip()
+    git(repo, 'update-ref', 'refs/heads/main', tip)
+    assert_falls_back(repo, 'José <j@x>')
+
+
+def test_global_mailmap_config(history_repo: tuple[Path, list[str]], git_config: Path,
+                               tmp_path: Path) -> None:
+    repo, _ = history_repo
+    mailmap = tmp_path / 'mailmap'
+    mailmap.write_text(MAILMAP)
+    git_config.write_text(f'[mailmap]\n\tfile = {mailmap}\n')
+    assert_falls_back(repo, 'Ada King <ada@example.com>')
+
+
+def test_linked_worktree_mailmap(history_repo: tuple[Path, list[str]], tmp_path: Path) -> None:
+    repo, _ = history_repo
+    worktree = tmp_path / 'worktree'
+    git(repo, 'worktree', 'add', '-q', '-b', 'side', str(worktree), 'main')
+    (worktree / '.mailmap').write_text(MAILMAP)
+    assert_falls_back(worktree, 'Ada King <ada@example.com>')
+
+
+def test_bare_repository_head_mailmap(history_repo: tuple[Path, list[str]], tmp_path: Path) -> None:
+    repo, mainline = history_repo
+    blob = git(repo, 'hash-object', '-w', '--stdin', stdin=MAILMAP)
+    tree = git(repo, 'mktree', stdin=f'100644 blob {blob}\t.mailmap\n')
+    builder = HistoryBuilder(repo)
+    builder.tree = tree
+    tip = builder.commit([mainline[-1]])
+    git(repo, 'update-ref', 'refs/heads/main', tip)
+    bare = tmp_path / 'bare.git'
+    git(tmp_path, 'clone', '-q', '--bare', str(repo), str(bare))
+    assert_falls_back(bare, 'Ada King <ada@example.com>')